@@ -0,0 +1,59 @@
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from utils.utils import decode_jwt
+from .cache import profile_cache
+from .models import UserProfile
+
+
+class MongoUser(dict):
+    """
+    A user profile from the `users` collection, usable as `request.user`.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    @property
+    def id(self):
+        return str(self["_id"])
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def email(self):
+        return self.get("email")
+
+
+class MongoJWTAuthentication(BaseAuthentication):
+    """
+    Authenticate `Authorization: Bearer <token>` with the HS256 tokens issued by LoginView.
+    Profiles are loaded with a projected lookup and kept in a short TTL cache, so polling
+    clients do not cost a Mongo read per request.
+    """
+    keyword = b"bearer"
+
+    def authenticate(self, request):
+        header = get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword:
+            return None
+        if len(header) != 2:
+            raise AuthenticationFailed("Invalid authorization header")
+
+        payload = decode_jwt(header[1].decode("utf-8", "replace"))
+        user_id = payload.get("user_id")
+        if not user_id:
+            raise AuthenticationFailed("Invalid token")
+
+        profile = profile_cache.get(user_id)
+        if profile is None:
+            profile = UserProfile.get_by_id(UserProfile.key(user_id), projection=UserProfile.PROFILE_FIELDS)
+            if profile is None:
+                raise AuthenticationFailed("User not found")
+            profile_cache.put(user_id, profile)
+        # A copy, so a view changing request.user does not change the cached profile
+        return MongoUser(profile), payload
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
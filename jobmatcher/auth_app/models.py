@@ -1,19 +1,38 @@
+from bson import ObjectId
 from django.conf import settings
 import uuid
 
+from .cache import profile_cache
+
 db = settings.MONGO_DB  
 
 class UserProfile:
     collection = db["users"]
+    # Fields loaded for authenticated requests; never the password hash
+    PROFILE_FIELDS = {"email": 1, "name": 1, "skills": 1, "education": 1, "experience": 1, "responsibilities": 1}
 
     @staticmethod
     def create(data):
         return UserProfile.collection.insert_one(data)
 
     @staticmethod
-    def get_by_email(email):
-        return UserProfile.collection.find_one({"email": email})
+    def get_by_email(email, projection=None):
+        return UserProfile.collection.find_one({"email": email}, projection)
+
+    @staticmethod
+    def key(user_id):
+        """
+        The stored _id for a user id taken from a token or URL: registered users have uuid
+        string ids, users created elsewhere may have ObjectIds.
+        """
+        return ObjectId(user_id) if ObjectId.is_valid(user_id) else user_id
+
+    @staticmethod
+    def get_by_id(user_id, projection=None):
+        return UserProfile.collection.find_one({"_id": user_id}, projection)
 
     @staticmethod
-    def get_by_id(user_id):
-        return UserProfile.collection.find_one({"_id": user_id})
+    def update(user_id, fields):
+        result = UserProfile.collection.update_one({"_id": user_id}, {"$set": fields})
+        profile_cache.invalidate(str(user_id))
+        return result
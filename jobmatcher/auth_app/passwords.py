@@ -0,0 +1,95 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from django.conf import settings
+
+
+class PasswordQueueFull(Exception):
+    """
+    Raised when the password hasher already has as much work as it accepts.
+    """
+
+
+class PasswordHasher:
+    """
+    Bounded pool for bcrypt work. bcrypt releases the GIL, so `workers` threads use at most
+    that many cores for password hashing however many logins arrive at once, leaving the rest
+    to the other requests. At most `max_pending` jobs (running or queued) are accepted;
+    beyond that `submit` fails immediately instead of piling up request threads.
+
+    A job holds its slot until it is done, not until its caller stops waiting, so the bound
+    counts the bcrypt work actually admitted. A caller that times out cancels its job if it
+    has not started yet, which frees the slot at once.
+    """
+
+    def __init__(self, workers, max_pending, rounds):
+        self.rounds = rounds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordQueueFull()
+        try:
+            future = self._executor.submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Also called when the job is cancelled before it runs
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def hash(self, password, timeout=None):
+        return self._result(self.submit(self._hash, password), timeout)
+
+    def check(self, password, hashed, timeout=None):
+        return self._result(self.submit(self._check, password, hashed), timeout)
+
+    @staticmethod
+    def _result(future, timeout):
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            # Nobody waits for a queued job any more; a running one keeps its slot until bcrypt returns
+            future.cancel()
+            raise
+
+    def _hash(self, password):
+        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=self.rounds)).decode("utf-8")
+
+    @staticmethod
+    def _check(password, hashed):
+        return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+    def needs_rehash(self, hashed):
+        """
+        Whether a stored hash ("$2b$<cost>$...") was made with a different cost than the configured one.
+        """
+        try:
+            return int(hashed.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def rehash_later(self, password, save):
+        """
+        Compute a hash with the configured cost in the background and pass it to `save`.
+        Skipped when the pool is full; the next login tries again.
+        """
+        def rehash():
+            save(self._hash(password))
+
+        try:
+            self.submit(rehash).add_done_callback(_log_rehash_error)
+        except PasswordQueueFull:
+            pass
+
+
+def _log_rehash_error(future):
+    if future.exception() is not None:
+        print(f"ERROR: Could not rehash a password: {str(future.exception())}")
+
+
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING, settings.BCRYPT_ROUNDS
+)
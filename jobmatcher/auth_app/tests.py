@@ -1,3 +1,181 @@
-from django.test import TestCase
+import datetime
+import threading
+import time
+import uuid
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from bson import ObjectId
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+
+from match.tests import MongoTestCase, fake_encode
+from .authentication import MongoJWTAuthentication
+from .cache import profile_cache
+from .models import UserProfile
+from .passwords import PasswordHasher, PasswordQueueFull
+
+
+def token_for(user_id):
+    payload = {"user_id": str(user_id), "exp": datetime.datetime.utcnow() + datetime.timedelta(minutes=5)}
+    return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm="HS256")
+
+
+class PasswordHasherTests(SimpleTestCase):
+    def setUp(self):
+        self.hasher = PasswordHasher(workers=1, max_pending=2, rounds=4)
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def blocking_job(self):
+        self.started.set()
+        self.release.wait(5)
+
+    def test_slot_is_held_while_the_job_runs(self):
+        running = self.hasher.submit(self.blocking_job)
+        self.assertTrue(self.started.wait(5))
+        self.hasher.submit(self.blocking_job)
+        # Both slots are taken by admitted work, although nobody waits for the running job
+        with self.assertRaises(PasswordQueueFull):
+            self.hasher.submit(self.blocking_job)
+        self.release.set()
+        running.result(5)
+        self.hasher.submit(lambda: None).result(5)
+
+    def test_timed_out_queued_job_frees_its_slot(self):
+        self.hasher.submit(self.blocking_job)
+        self.assertTrue(self.started.wait(5))
+        # Queued behind the running job, so the caller gives up before it starts
+        with self.assertRaises(TimeoutError):
+            self.hasher.hash("secret", timeout=0.01)
+        self.hasher.submit(lambda: None)
+        with self.assertRaises(PasswordQueueFull):
+            self.hasher.submit(lambda: None)
+
+    def test_hash_and_check(self):
+        hashed = self.hasher.hash("secret", timeout=5)
+        self.assertTrue(self.hasher.check("secret", hashed, timeout=5))
+        self.assertFalse(self.hasher.check("other", hashed, timeout=5))
+        self.assertFalse(self.hasher.needs_rehash(hashed))
+        self.assertTrue(PasswordHasher(workers=1, max_pending=1, rounds=5).needs_rehash(hashed))
+
+
+class MongoJWTAuthenticationTests(MongoTestCase):
+    def setUp(self):
+        super().setUp()
+        profile_cache.clear()
+        self.addCleanup(profile_cache.clear)
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return MongoJWTAuthentication().authenticate(request)
+
+    def test_uuid_string_id(self):
+        user_id = str(uuid.uuid4())
+        UserProfile.create({"_id": user_id, "email": "a@example.com", "password": "x", "skills": ["python"]})
+        user, payload = self.authenticate(token_for(user_id))
+        self.assertEqual(user.id, user_id)
+        self.assertEqual(user.email, "a@example.com")
+        self.assertNotIn("password", user)
+        self.assertEqual(payload["user_id"], user_id)
+        # Served from the profile cache the second time
+        self.assertEqual(self.authenticate(token_for(user_id))[0].id, user_id)
+
+    def test_object_id(self):
+        user_id = ObjectId()
+        UserProfile.create({"_id": user_id, "email": "b@example.com", "password": "x"})
+        self.assertEqual(self.authenticate(token_for(user_id))[0].id, str(user_id))
+
+    def test_rejected_tokens(self):
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token_for(uuid.uuid4()))  # No such user
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate("not-a-token")
+        self.assertIsNone(MongoJWTAuthentication().authenticate(APIRequestFactory().get("/")))
+
+
+class LoginPasswordTests(MongoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.hasher = PasswordHasher(workers=1, max_pending=1, rounds=5)
+        patcher = mock.patch("auth_app.views.password_hasher", self.hasher)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_user(self, rounds):
+        hashed = PasswordHasher(workers=1, max_pending=1, rounds=rounds).hash("secret-password")
+        UserProfile.create({"_id": str(uuid.uuid4()), "email": "c@example.com", "password": hashed})
+
+    def login(self):
+        return self.client.post("/api/auth/login/", {"email": "c@example.com", "password": "secret-password"}, format="json")
+
+    def test_saturated_hasher_answers_429(self):
+        self.create_user(rounds=5)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        self.hasher.submit(release.wait, 5)
+        response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_rehash_on_login(self):
+        self.create_user(rounds=4)
+        self.assertEqual(self.login().status_code, 200)
+        deadline = time.monotonic() + 5
+        while self.hasher.needs_rehash(UserProfile.get_by_email("c@example.com")["password"]):
+            self.assertLess(time.monotonic(), deadline, "The password was not rehashed")
+            time.sleep(0.01)
+        # The new hash still verifies
+        self.assertEqual(self.login().status_code, 200)
+
+
+@mock.patch("utils.utils._encode_uncached", fake_encode)
+class RegisterLoginProfileTests(MongoTestCase):
+    """
+    A token issued by LoginView authenticates the profile endpoints of the user it was issued to.
+    """
+    RESUME = "Experience: 5 years building Python and Django services. Responsible for developing APIs"
+
+    def setUp(self):
+        super().setUp()
+        profile_cache.clear()
+        self.addCleanup(profile_cache.clear)
+        self.client = APIClient()
+        patchers = [
+            mock.patch("auth_app.views.password_hasher", PasswordHasher(workers=1, max_pending=4, rounds=4)),
+            mock.patch("auth_app.views.extract_text_from_file", lambda uploaded_file: self.RESUME),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_register_login_and_read_profile(self):
+        resume = SimpleUploadedFile("resume.pdf", b"%PDF-1.4", content_type="application/pdf")
+        response = self.client.post(
+            "/api/auth/register/",
+            {"email": "d@example.com", "password": "secret-password", "name": "D", "resume_file": resume},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+
+        response = self.client.post("/api/auth/login/", {"email": "d@example.com", "password": "secret-password"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        user_id, token = response.data["user"]["id"], response.data["access_token"]
+
+        self.assertEqual(self.client.get(f"/api/auth/profile/{user_id}/").status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.get(f"/api/auth/profile/{user_id}/")
+        self.assertEqual(response.status_code, 200)
+        profile = response.data["user_profile"]
+        self.assertEqual(profile["email"], "d@example.com")
+        self.assertIn("python", profile["skills"])
+        self.assertEqual(self.client.get("/api/auth/profile/", {"email": "d@example.com"}).status_code, 200)
+        self.assertEqual(self.client.get(f"/api/auth/profile/{uuid.uuid4()}/").status_code, 403)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer not-a-token")
+        self.assertEqual(self.client.get(f"/api/auth/profile/{user_id}/").status_code, 401)
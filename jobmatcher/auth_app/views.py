@@ -2,17 +2,31 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.conf import settings
+from .authentication import MongoJWTAuthentication
 from .models import UserProfile
+from .passwords import PasswordQueueFull, password_hasher
 from .serializers import UserSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 import uuid
-import bcrypt
 import jwt
 import datetime
-from utils.utils import extract_responsibilities, extract_text_from_file, extract_skills, extract_education, extract_experience
+from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
+from utils.utils import build_embeddings, ensure_embeddings, extract_text_from_file
+from utils.vector_index import load_job_index_in_background, peek_job_index
+from match.models import JobDescription
+from utils.analysis import DocumentAnalysis
+from utils.pdf import DocumentError
+
+def too_many_requests():
+    """
+    429 for password work refused or not finished in time because the hasher is saturated.
+    """
+    response = Response({"error": "Too many requests, please try again shortly"}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    response["Retry-After"] = "1"
+    return response
 
-SECRET_KEY = "your-secret-key"  # Change this in production
 
 class RegisterView(APIView):
     def post(self, request):
@@ -20,22 +34,31 @@ class RegisterView(APIView):
         if serializer.is_valid():
             email = serializer.validated_data["email"]
             password = serializer.validated_data["password"]
-            hashed_password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
             # Check if user already exists
             if UserProfile.get_by_email(email):
                 return Response({"error": "User already exists"}, status=status.HTTP_400_BAD_REQUEST)
 
+            try:
+                hashed_password = password_hasher.hash(password, timeout=settings.PASSWORD_HASH_TIMEOUT)
+            except (PasswordQueueFull, TimeoutError):
+                return too_many_requests()
+
             # Extract resume data if uploaded
             resume_file = request.FILES.get("resume_file")
             if resume_file:
-                resume_text = extract_text_from_file(resume_file)
-                skills = extract_skills(resume_text)
-                education = extract_education(resume_text)
-                experience = extract_experience(resume_text)
-                responsibilities = extract_responsibilities(resume_text)
+                try:
+                    analysis = DocumentAnalysis(extract_text_from_file(resume_file))
+                except DocumentError as e:
+                    return Response({"error": str(e)}, status=e.status_code)
+                skills = analysis.skills
+                education = analysis.education
+                experience = analysis.experience
+                responsibilities = analysis.responsibilities
             else:
-                skills, education, experience = [], "Not specified", "Not specified"
+                skills, education, experience, responsibilities = [], "Not specified", "Not specified", "Not specified"
+            # Encoded once here, like a resume, so recommendations never wait for the model
+            embeddings = build_embeddings(experience, responsibilities)
 
             # Store user data
             user_data = {
@@ -47,8 +70,13 @@ class RegisterView(APIView):
                 "education": education,
                 "experience": experience,
                 "responsibilities": responsibilities,
+                "embeddings": embeddings,
             }
-            UserProfile.create(user_data)
+            try:
+                UserProfile.create(user_data)
+            except DuplicateKeyError:
+                # Registered concurrently, caught by the unique index on email
+                return Response({"error": "User already exists"}, status=status.HTTP_400_BAD_REQUEST)
             return Response({"message": "User registered successfully"}, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -60,17 +88,27 @@ class LoginView(APIView):
         password = request.data.get("password")
 
         # Fetch user from MongoDB
-        user = UserProfile.get_by_email(email)
-        if not user or not bcrypt.checkpw(password.encode("utf-8"), user["password"].encode("utf-8")):
+        user = UserProfile.get_by_email(email, projection={"embeddings": 0})
+        if not user or not password:
+            return Response({"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
+        try:
+            valid = password_hasher.check(password, user["password"], timeout=settings.PASSWORD_HASH_TIMEOUT)
+        except (PasswordQueueFull, TimeoutError):
+            return too_many_requests()
+        if not valid:
             return Response({"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
 
+        # Upgrade hashes made with another work factor, without making this login wait for it
+        if password_hasher.needs_rehash(user["password"]):
+            password_hasher.rehash_later(password, lambda hashed: UserProfile.update(user["_id"], {"password": hashed}))
+
         # Manually create JWT token for MongoDB user
         payload = {
             "user_id": str(user["_id"]),  # Ensure we use the correct field for user id
             "exp": datetime.datetime.utcnow() + datetime.timedelta(days=1),
             "iat": datetime.datetime.utcnow(),
         }
-        token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
+        token = jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm="HS256")
 
         return Response({
             "access_token": token,
@@ -87,7 +125,7 @@ class LoginView(APIView):
 
 class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [MongoJWTAuthentication]
 
     def get(self, request, user_id=None):
         try:
@@ -128,3 +166,63 @@ class UserProfileView(APIView):
             # Print the error details directly to the terminal
             print(f"ERROR: An unexpected error occurred while fetching user profile: {str(e)}")  # Print error to terminal
             return Response({"error": "An unexpected error occurred. Please try again later."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class RecommendationsView(APIView):
+    """
+    The job descriptions that best match a user's resume, scored like MatchView (50% text,
+    30% skills, 20% responsibilities) from the embedding stored at registration against the
+    in-memory job index, in one vectorized pass.
+    """
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [MongoJWTAuthentication]
+    # Job fields returned with each recommendation
+    JOB_FIELDS = {"title": 1, "required_skills": 1, "education": 1, "years_of_experience": 1, "responsibilities": 1}
+
+    def get(self, request, user_id):
+        if str(request.user.id) != str(user_id):
+            return Response({"error": "You are not authorized to view these recommendations."}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            k = int(request.query_params.get("k", 10))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= k <= settings.TOP_K_MAX:
+            return Response({"error": f"k must be between 1 and {settings.TOP_K_MAX}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = UserProfile.get_by_id(
+            UserProfile.key(user_id), {"embeddings": 1, "skills": 1, "experience": 1, "responsibilities": 1}
+        )
+        if not user:
+            return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        # Users registered before embeddings were stored are encoded once and updated in place
+        embeddings, refreshed = ensure_embeddings(user, "experience")
+        if refreshed:
+            UserProfile.update(user["_id"], {"embeddings": embeddings})
+
+        # The job matrix is never loaded inside a request: the first one starts loading it and is
+        # asked to retry (VECTOR_INDEX_LOAD_ON_STARTUP loads it before any request)
+        job_index = peek_job_index()
+        if job_index is None:
+            load_job_index_in_background()
+            response = Response(
+                {"error": "Recommendations are being prepared, please try again shortly"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            response["Retry-After"] = "5"
+            return response
+
+        ranked = job_index.search(embeddings, k, skills=user.get("skills", []))
+        jobs = {
+            str(job["_id"]): job
+            for job in JobDescription.collection.find(
+                {"_id": {"$in": [ObjectId(job_id) for job_id, _ in ranked]}}, self.JOB_FIELDS
+            )
+        }
+        results = []
+        for job_id, score in ranked:
+            job = jobs.get(job_id)
+            if job is not None:  # Deleted since the index was last refreshed
+                job["_id"] = job_id
+                results.append({"job_desc_id": job_id, "score": score, "job": job})
+        return Response({"user_id": str(user_id), "results": results}, status=status.HTTP_200_OK)
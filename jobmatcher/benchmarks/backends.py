@@ -0,0 +1,163 @@
+"""
+Benchmark the embedding backends and check that they agree on match scores.
+
+Every backend encodes the same fixed corpus of job descriptions and resumes. The script
+reports encode latency and model memory per backend, and compares the `analyze_match`
+scores of every (job, resume) pair with the reference torch backend.
+
+Run from the jobmatcher directory:
+    python -m benchmarks.backends --backends torch torch-int8 onnx
+"""
+import argparse
+import os
+import statistics
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "jobmatcher.settings")
+django.setup()
+
+from django.core.exceptions import ImproperlyConfigured  # noqa: E402
+
+from match.documents import job_description_fields, resume_fields  # noqa: E402
+from utils.embedding_backends import load_model  # noqa: E402
+from utils.utils import EMBEDDING_MODEL_NAME, EMBEDDING_MODEL_VERSION, analyze_match  # noqa: E402
+
+JOB_DESCRIPTIONS = [
+    "Senior Python developer to design and maintain Django services on AWS. 5+ years of experience, "
+    "bachelor's degree in computer science. You will collaborate with product and write tests.",
+    "Frontend engineer building React and TypeScript applications. Responsible for shipping features, "
+    "debugging performance issues and maintaining our design system. 3 years experience.",
+    "DevOps engineer to manage Kubernetes clusters, Docker images and Linux hosts in the cloud. "
+    "Coordinate releases and optimize CI pipelines. Certification in AWS preferred.",
+    "Data analyst working with SQL and MongoDB to develop dashboards. Master's degree and 2 years of "
+    "experience required. Lead weekly reporting and collaborate with stakeholders.",
+]
+RESUMES = [
+    "Backend developer with 6 years of experience in Python, Django, Flask and FastAPI. Designed REST APIs, "
+    "maintained PostgreSQL and MongoDB databases, deployed on AWS with Docker. Bachelor of Science.",
+    "Frontend developer, 4 years experience with React, Vue, JavaScript, HTML and CSS. Led the migration "
+    "to TypeScript, wrote unit tests and debugged rendering issues.",
+    "Site reliability engineer. Managed Kubernetes and Linux fleets, wrote Terraform for cloud "
+    "infrastructure, optimized build pipelines with Git and Docker. AWS certification.",
+    "Analyst with a master's degree, 2 years of experience building SQL reports, coordinating with "
+    "business teams and developing internal dashboards.",
+    "Java engineer, 8 years of experience developing distributed systems, responsible for designing "
+    "services and managing a small team.",
+]
+
+
+def corpus():
+    jobs = [job_description_fields(text) for text in JOB_DESCRIPTIONS]
+    resumes = [resume_fields(text) for text in RESUMES]
+    return jobs, resumes
+
+
+def model_bytes(model):
+    """
+    Size of a torch model's weights, quantized weights included; None for non-torch backends.
+    """
+    try:
+        values = list(model.state_dict().values())
+    except AttributeError:
+        return None
+    total = 0
+    while values:
+        value = values.pop()
+        if isinstance(value, (tuple, list)):
+            # Dynamically quantized Linear layers store (weight, bias) as packed params
+            values.extend(value)
+        elif hasattr(value, "element_size"):
+            total += value.numel() * value.element_size()
+    return total
+
+
+def embed(model, text, responsibilities):
+    sentences = [text or ""] + ([responsibilities] if responsibilities else [])
+    vectors = model.encode(sentences)
+    return {
+        "model_version": EMBEDDING_MODEL_VERSION,
+        "text": vectors[0],
+        "responsibilities": vectors[1] if responsibilities else None,
+    }
+
+
+def scores(model, jobs, resumes):
+    job_embeddings = [embed(model, job["description"], job["responsibilities"]) for job in jobs]
+    resume_embeddings = [embed(model, resume["experience"], resume["responsibilities"]) for resume in resumes]
+    return [
+        analyze_match(
+            job["description"], resume["experience"],
+            job["required_skills"], resume["skills"],
+            job["responsibilities"], resume["responsibilities"],
+            job_embeddings=job_vectors, resume_embeddings=resume_vectors,
+        )
+        for job, job_vectors in zip(jobs, job_embeddings)
+        for resume, resume_vectors in zip(resumes, resume_embeddings)
+    ]
+
+
+def latency(model, texts, batch_size, repeat):
+    single, batched = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            model.encode([text])
+        single.append((time.perf_counter() - started) / len(texts))
+
+        started = time.perf_counter()
+        model.encode(texts, batch_size=batch_size)
+        batched.append((time.perf_counter() - started) / len(texts))
+    return statistics.median(single) * 1000, statistics.median(batched) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "torch-int8", "onnx"])
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME, help="Model name or local path")
+    parser.add_argument("--onnx-file", default="", help="Exported ONNX graph for the onnx backend")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-score-error", type=float, default=2.0,
+                        help="Largest accepted score difference from torch, in match score points")
+    args = parser.parse_args()
+
+    jobs, resumes = corpus()
+    texts = JOB_DESCRIPTIONS + RESUMES
+    backends = ["torch"] + [backend for backend in args.backends if backend != "torch"]
+
+    reference = None
+    failed = False
+    print(f"{'backend':>12} {'load s':>8} {'ms/text':>9} {'ms/text batched':>16} {'model MB':>9} {'max diff':>9} {'mean diff':>10}")
+    for backend in backends:
+        started = time.perf_counter()
+        try:
+            model = load_model(backend, args.model, onnx_file=args.onnx_file)
+        except (ImproperlyConfigured, ImportError) as e:
+            print(f"{backend:>12} skipped: {e}")
+            continue
+        load_seconds = time.perf_counter() - started
+
+        model.encode(texts)  # warm up
+        single_ms, batched_ms = latency(model, texts, args.batch_size, args.repeat)
+        backend_scores = scores(model, jobs, resumes)
+        if reference is None:
+            reference = backend_scores
+        differences = [abs(a - b) for a, b in zip(backend_scores, reference)]
+        size = model_bytes(model)
+
+        size_column = "-" if size is None else f"{size / 2 ** 20:.1f}"
+        print(
+            f"{backend:>12} {load_seconds:>8.2f} {single_ms:>9.2f} {batched_ms:>16.2f} {size_column:>9} "
+            f"{max(differences):>9.3f} {statistics.mean(differences):>10.3f}"
+        )
+        if max(differences) > args.max_score_error:
+            failed = True
+            print(f"{backend:>12} scores differ from torch by more than {args.max_score_error} points")
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark skill extraction against taxonomies of growing size.
+
+Compares the single-pass PhraseMatcher with the previous approach of one regex search per
+keyword. Matcher time should stay flat as the taxonomy grows, the per-keyword scan grows linearly.
+
+Run from the jobmatcher directory:
+    python -m benchmarks.skills
+"""
+import argparse
+import random
+import re
+import string
+import time
+
+from utils.taxonomy import PhraseMatcher, tokenize
+
+BASE_SKILLS = [
+    "python", "django", "aws", "javascript", "html", "css", "sql", "mongodb", "docker", "git",
+    "linux", "flask", "fastapi", "java", "typescript", "node.js", "react", "vue", "kubernetes", "cloud"
+]
+FILLER_WORDS = [
+    "built", "services", "team", "with", "and", "the", "for", "years", "of", "experience", "in",
+    "production", "systems", "designed", "apis", "worked", "on", "data", "pipelines", "using"
+]
+
+
+def synthetic_taxonomy(size, rng):
+    """
+    The real base skills plus random one- and two-word skills, each with one synonym.
+    """
+    entries = [(skill, []) for skill in BASE_SKILLS]
+    while len(entries) < size:
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(rng.randint(1, 2))]
+        entries.append((" ".join(words), ["".join(words) + "x"]))
+    return entries[:size]
+
+
+def synthetic_document(words, taxonomy, rng):
+    vocabulary = FILLER_WORDS * 4 + [canonical_id for canonical_id, _ in taxonomy[:200]]
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+def per_keyword_regex(text, taxonomy):
+    found = []
+    for canonical_id, synonyms in taxonomy:
+        for phrase in [canonical_id, *synonyms]:
+            if re.search(r"\b" + re.escape(phrase) + r"\b", text, re.IGNORECASE):
+                found.append(canonical_id)
+                break
+    return found
+
+
+def best_of(repeat, function, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run(sizes, words, repeat, regex_limit):
+    rng = random.Random(0)
+    results = []
+    for size in sizes:
+        taxonomy = synthetic_taxonomy(size, rng)
+        text = synthetic_document(words, taxonomy, rng)
+
+        started = time.perf_counter()
+        matcher = PhraseMatcher(taxonomy)
+        build_seconds = time.perf_counter() - started
+
+        result = {
+            "taxonomy_size": size,
+            "document_words": words,
+            "build_ms": build_seconds * 1000,
+            "matcher_ms": best_of(repeat, matcher.find_ids, text) * 1000,
+            "tokenize_ms": best_of(repeat, tokenize, text) * 1000,
+            "per_keyword_regex_ms": None,
+        }
+        if size <= regex_limit:
+            result["per_keyword_regex_ms"] = best_of(max(1, repeat // 5), per_keyword_regex, text, taxonomy) * 1000
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 1000, 10000, 50000])
+    parser.add_argument("--words", type=int, default=2000, help="Words per synthetic document")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--regex-limit", type=int, default=1000, help="Largest taxonomy timed with per-keyword regexes")
+    args = parser.parse_args()
+
+    print(f"{'taxonomy':>10} {'build ms':>10} {'matcher ms':>11} {'tokenize ms':>12} {'regex ms':>10}")
+    for result in run(args.sizes, args.words, args.repeat, args.regex_limit):
+        regex_ms = result["per_keyword_regex_ms"]
+        regex_column = "-" if regex_ms is None else f"{regex_ms:.3f}"
+        print(
+            f"{result['taxonomy_size']:>10} {result['build_ms']:>10.2f} {result['matcher_ms']:>11.3f} "
+            f"{result['tokenize_ms']:>12.3f} {regex_column:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
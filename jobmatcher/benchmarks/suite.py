@@ -0,0 +1,315 @@
+"""
+Reproducible benchmark of the extraction, embedding and match paths.
+
+A seeded generator builds resumes and job descriptions of controlled length and skill
+density, and PDFs of them with PyMuPDF. The suite times extract_text_from_file, every
+extract_* function, analyze_match, and full ResumeView and MatchView requests through the
+Django test client against an in-process mongomock database, so no MongoDB is needed
+(`pip install mongomock`). The embedding model is the configured one (EMBEDDING_BACKEND).
+
+Results are written as JSON, to compare runs across commits:
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --output after.json --sections extract analyze
+
+Run from the jobmatcher directory.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+SECTIONS = ["pdf", "extract", "analyze", "views"]
+
+FILLER_WORDS = [
+    "built", "services", "team", "with", "and", "the", "for", "of", "in", "production", "systems",
+    "apis", "worked", "on", "data", "pipelines", "using", "customers", "features", "platform",
+]
+RESPONSIBILITY_PHRASES = [
+    "responsible for", "design", "develop", "maintain", "manage", "collaborate", "lead",
+    "coordinate", "optimize", "ship", "write", "test", "debug",
+]
+TITLES = ["Python Developer", "Backend Engineer", "Data Analyst", "Frontend Developer", "Cloud Architect"]
+DEGREES = ["Bachelor of Science", "Master's degree", "PhD", "AWS certification"]
+
+
+def setup_django():
+    """
+    Configure Django with the Mongo database replaced by mongomock, before any app module
+    binds `settings.MONGO_DB`.
+    """
+    try:
+        import mongomock
+    except ImportError:
+        raise SystemExit("The benchmark suite needs mongomock: pip install mongomock")
+    import django
+    from django.conf import settings
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "jobmatcher.settings")
+    settings.MONGO_DB = mongomock.MongoClient().benchmark
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+    django.setup()
+
+
+def skill_vocabulary():
+    from django.conf import settings
+
+    with open(settings.SKILLS_TAXONOMY_PATH, encoding="utf-8") as taxonomy:
+        skills = json.load(taxonomy)["skills"]
+    return [phrase for skill in skills for phrase in [skill["id"], *skill["synonyms"]]]
+
+
+def synthetic_text(rng, words, skill_density, skills, heading=None):
+    """
+    A document of about `words` words where a `skill_density` fraction of the words are skill
+    phrases, with an education line, a years-of-experience line and responsibility phrases.
+    """
+    body = []
+    for _ in range(words):
+        roll = rng.random()
+        if roll < skill_density:
+            body.append(rng.choice(skills))
+        elif roll < skill_density + 0.05:
+            body.append(rng.choice(RESPONSIBILITY_PHRASES))
+        else:
+            body.append(rng.choice(FILLER_WORDS))
+    lines = [heading] if heading else []
+    lines.append(f"{rng.randint(1, 12)} years of experience")
+    lines.append(f"Education: {rng.choice(DEGREES)}")
+    # Wrap the body into lines of 12 words, like text extracted from a PDF
+    lines.extend(" ".join(body[i:i + 12]) for i in range(0, len(body), 12))
+    return "\n".join(lines)
+
+
+def synthetic_corpus(rng, count, words, skill_density, skills):
+    jobs = [
+        synthetic_text(rng, words, skill_density, skills, heading=rng.choice(TITLES))
+        for _ in range(count)
+    ]
+    resumes = [synthetic_text(rng, words, skill_density, skills) for _ in range(count)]
+    return jobs, resumes
+
+
+def synthetic_pdf(text, lines_per_page=45):
+    import fitz  # PyMuPDF
+
+    document = fitz.open()
+    lines = text.splitlines()
+    for start in range(0, len(lines), lines_per_page):
+        page = document.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), "\n".join(lines[start:start + lines_per_page]), fontsize=9)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def measure(function, runs, warmup=1):
+    """
+    Call `function(i)` for i in range(warmup + runs) and summarize the timed runs in milliseconds.
+    """
+    for i in range(warmup):
+        function(i)
+    timings = []
+    for i in range(warmup, warmup + runs):
+        started = time.perf_counter()
+        function(i)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "runs": runs,
+        "min_ms": timings[0],
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.mean(timings),
+        "p95_ms": timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))],
+        "max_ms": timings[-1],
+    }
+
+
+def bench_pdf(results, corpus, runs):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from utils.utils import extract_text_from_file
+
+    pdfs = [synthetic_pdf(text) for text in corpus["resumes"]]
+    results["extract_text_from_file"] = measure(
+        lambda i: extract_text_from_file(SimpleUploadedFile("resume.pdf", pdfs[i % len(pdfs)])), runs
+    )
+
+
+def bench_extract(results, corpus, runs):
+    from utils.analysis import DocumentAnalysis
+    from utils.taxonomy import tokenize
+    from utils.utils import (
+        extract_education,
+        extract_experience,
+        extract_responsibilities,
+        extract_skills,
+        extract_title,
+    )
+
+    texts = corpus["jobs"] + corpus["resumes"]
+    text = lambda i: texts[i % len(texts)]  # noqa: E731
+    results["tokenize"] = measure(lambda i: tokenize(text(i)), runs)
+    results["extract_title"] = measure(lambda i: extract_title(text(i)), runs)
+    results["extract_skills"] = measure(lambda i: extract_skills(text(i)), runs)
+    results["extract_education"] = measure(lambda i: extract_education(text(i)), runs)
+    results["extract_responsibilities"] = measure(lambda i: extract_responsibilities(text(i)), runs)
+    results["extract_experience"] = measure(lambda i: extract_experience(text(i)), runs)
+    results["document_analysis"] = measure(lambda i: DocumentAnalysis(text(i)), runs)
+
+
+def bench_analyze(results, corpus, runs):
+    from match.documents import job_description_fields, resume_fields
+    from utils.utils import analyze_match, build_embeddings, embedding_cache, get_model
+
+    get_model()  # Model loading is not part of any timing
+    jobs = [job_description_fields(text) for text in corpus["jobs"]]
+    resumes = [resume_fields(text) for text in corpus["resumes"]]
+    pairs = [(job, resume) for job in jobs for resume in resumes]
+
+    def match(i, stored):
+        job, resume = pairs[i % len(pairs)]
+        analyze_match(
+            job["description"], resume["experience"],
+            job["required_skills"], resume["skills"],
+            job["responsibilities"], resume["responsibilities"],
+            job_embeddings=job.get("embeddings") if stored else None,
+            resume_embeddings=resume.get("embeddings") if stored else None,
+        )
+
+    def encode_and_match(i):
+        embedding_cache.clear()  # Every pair pays for encoding, as without stored embeddings
+        match(i, stored=False)
+
+    results["analyze_match.encoding"] = measure(encode_and_match, runs)
+    for job in jobs:
+        job["embeddings"] = build_embeddings(job["description"], job["responsibilities"])
+    for resume in resumes:
+        resume["embeddings"] = build_embeddings(resume["experience"], resume["responsibilities"])
+    results["analyze_match.stored_embeddings"] = measure(lambda i: match(i, stored=True), runs)
+
+
+def bench_views(results, corpus, runs):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from rest_framework.test import APIClient
+    from utils.utils import get_model
+
+    get_model()
+    client = APIClient()
+
+    def post(path, data, format="multipart"):
+        response = client.post(path, data, format=format)
+        if response.status_code >= 400:
+            raise RuntimeError(f"POST {path} returned {response.status_code}: {response.content[:200]!r}")
+        return response.data
+
+    # Every timed upload is new content, otherwise it would be answered by deduplication
+    count = runs + 1
+    rng = random.Random(corpus["seed"] + 1)
+    skills = skill_vocabulary()
+    texts = [synthetic_text(rng, corpus["words"], corpus["skill_density"], skills) for _ in range(2 * count)]
+    pdfs = [synthetic_pdf(text) for text in texts[count:]]
+
+    resume_ids = []
+    results["view.resume.text"] = measure(
+        lambda i: resume_ids.append(post("/api/match/resume/", {"resume_text": texts[i]})["_id"]), runs
+    )
+    results["view.resume.pdf"] = measure(
+        lambda i: post("/api/match/resume/", {"file": SimpleUploadedFile(f"resume-{i}.pdf", pdfs[i])}), runs
+    )
+    results["view.resume.dedupe_hit"] = measure(lambda i: post("/api/match/resume/", {"resume_text": texts[0]}), runs)
+
+    job_id = post("/api/match/job-description/", {"text": corpus["jobs"][0]}, format="json")["_id"]
+    match_path = "/api/match/match/"
+    results["view.match.computed"] = measure(
+        lambda i: post(f"{match_path}?refresh=true", {"job_desc_id": job_id, "resume_id": resume_ids[i]}, format="json"),
+        runs,
+    )
+    results["view.match.stored"] = measure(
+        lambda i: post(match_path, {"job_desc_id": job_id, "resume_id": resume_ids[i]}, format="json"), runs
+    )
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(args):
+    import numpy
+    from django.conf import settings
+    from utils.utils import EMBEDDING_MODEL_VERSION
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "embedding_model": EMBEDDING_MODEL_VERSION,
+        "embedding_microbatch": settings.EMBEDDING_MICROBATCH_ENABLED,
+        "embedding_server": bool(settings.EMBEDDING_SERVER_SOCKET),
+        "pdf_parser_workers": settings.PDF_PARSER_WORKERS,
+        "corpus": {
+            "seed": args.seed,
+            "documents": args.documents,
+            "words": args.words,
+            "skill_density": args.skill_density,
+        },
+        "runs": args.runs,
+    }
+
+
+BENCHMARKS = {
+    "pdf": bench_pdf,
+    "extract": bench_extract,
+    "analyze": bench_analyze,
+    "views": bench_views,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", nargs="+", choices=SECTIONS, default=SECTIONS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--documents", type=int, default=20, help="Job descriptions and resumes generated of each")
+    parser.add_argument("--words", type=int, default=400, help="Words per synthetic document")
+    parser.add_argument("--skill-density", type=float, default=0.05, help="Fraction of words that are skills")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per benchmark")
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    setup_django()
+    rng = random.Random(args.seed)
+    jobs, resumes = synthetic_corpus(rng, args.documents, args.words, args.skill_density, skill_vocabulary())
+    corpus = {
+        "jobs": jobs,
+        "resumes": resumes,
+        "seed": args.seed,
+        "words": args.words,
+        "skill_density": args.skill_density,
+    }
+
+    results = {}
+    for section in args.sections:
+        started = time.perf_counter()
+        BENCHMARKS[section](results, corpus, args.runs)
+        print(f"{section}: {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    report = json.dumps({"environment": environment(args), "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
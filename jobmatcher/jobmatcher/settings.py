@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 from pymongo import MongoClient
 from datetime import timedelta
@@ -54,6 +55,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "utils.timing.ServerTimingMiddleware",  # First, so its total covers the other middleware too
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -93,8 +95,39 @@ WSGI_APPLICATION = "jobmatcher.wsgi.application"
 # Get MongoDB connection string from .env
 MONGO_CONNECTION_STRING = os.getenv("MONGO_CONNECTION_STRING")
 
+# Connection pool, timeouts, read preference and write concern. Options left unset keep the
+# driver defaults (pool of 100, 20s connect timeout, 30s server selection, primary, w=1).
+MONGO_CLIENT_OPTIONS = {
+    option: cast(os.getenv(variable))
+    for variable, option, cast in (
+        ("MONGO_MAX_POOL_SIZE", "maxPoolSize", int),
+        ("MONGO_MIN_POOL_SIZE", "minPoolSize", int),
+        ("MONGO_MAX_IDLE_TIME_MS", "maxIdleTimeMS", int),
+        ("MONGO_WAIT_QUEUE_TIMEOUT_MS", "waitQueueTimeoutMS", int),
+        ("MONGO_CONNECT_TIMEOUT_MS", "connectTimeoutMS", int),
+        ("MONGO_SERVER_SELECTION_TIMEOUT_MS", "serverSelectionTimeoutMS", int),
+        ("MONGO_SOCKET_TIMEOUT_MS", "socketTimeoutMS", int),
+        # primary, primaryPreferred, secondary, secondaryPreferred or nearest
+        ("MONGO_READ_PREFERENCE", "readPreference", str),
+        # Write concern: a number of nodes or "majority"
+        ("MONGO_WRITE_CONCERN", "w", lambda value: int(value) if value.isdigit() else value),
+        ("MONGO_WRITE_CONCERN_JOURNAL", "journal", lambda value: value.lower() == "true"),
+        ("MONGO_WRITE_CONCERN_TIMEOUT_MS", "wTimeoutMS", int),
+    )
+    if os.getenv(variable)
+}
+
+# Per-stage timing: Server-Timing response headers and histograms served by /metrics (see utils/timing.py)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+if METRICS_ENABLED:
+    from utils.timing import MongoTimingListener
+    MONGO_CLIENT_OPTIONS["event_listeners"] = [MongoTimingListener()]
+
+# Scrapers send it as `Authorization: Bearer <token>`; without a token /metrics only answers local requests
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 # Connect to MongoDB
-mongo_client = MongoClient(MONGO_CONNECTION_STRING)
+mongo_client = MongoClient(MONGO_CONNECTION_STRING, **MONGO_CLIENT_OPTIONS)
 
 # Extract the database name explicitly
 mongo_db_name = "cluster0"  # Make sure this matches your database name
@@ -103,6 +136,96 @@ mongo_db = mongo_client[mongo_db_name]
 # Attach database to Django settings
 MONGO_DB = mongo_db
 
+# `manage.py test` never touches the configured database: tests run against the
+# `jobmatcher_test` database at MONGO_TEST_CONNECTION_STRING, or else an in-process
+# mongomock database (pip install mongomock)
+if sys.argv[1:2] == ["test"]:
+    if os.getenv("MONGO_TEST_CONNECTION_STRING"):
+        MONGO_DB = MongoClient(os.getenv("MONGO_TEST_CONNECTION_STRING"), **MONGO_CLIENT_OPTIONS)["jobmatcher_test"]
+    else:
+        import mongomock
+        MONGO_DB = mongomock.MongoClient()["jobmatcher_test"]
+
+# Create the indexes declared in utils/indexes.py in the background when the app starts
+MONGO_ENSURE_INDEXES_ON_STARTUP = os.getenv("MONGO_ENSURE_INDEXES_ON_STARTUP", "false").lower() == "true"
+
+
+# Embeddings
+# Inference backend for the sentence embedding model: "torch" (default), "torch-int8"
+# (dynamically quantized) or "onnx" (needs `pip install 'optimum[onnxruntime]'`)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Exported ONNX graph to load, e.g. "onnx/model_qint8_avx512_vnni.onnx"; the default graph if empty
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "")
+# Load the model and run a warm-up batch in the background when the app starts
+EMBEDDING_WARMUP_ON_STARTUP = os.getenv("EMBEDDING_WARMUP_ON_STARTUP", "false").lower() == "true"
+# Number of texts per forward pass when many documents are encoded together
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+# Process-wide LRU cache of encoded texts, bounded by entry count and by bytes
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "20000"))
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# How vectors are stored on documents: "float16" or "int8" binary data, or "array" (BSON doubles).
+# Stored vectors of any format are read; `manage.py migrate_embeddings` converts existing ones
+EMBEDDING_STORAGE_DTYPE = os.getenv("EMBEDDING_STORAGE_DTYPE", "float16")
+# Gather concurrent encode calls from all request threads into batched forward passes
+EMBEDDING_MICROBATCH_ENABLED = os.getenv("EMBEDDING_MICROBATCH_ENABLED", "true").lower() == "true"
+EMBEDDING_MICROBATCH_MAX_SIZE = int(os.getenv("EMBEDDING_MICROBATCH_MAX_SIZE", "32"))
+EMBEDDING_MICROBATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MICROBATCH_MAX_WAIT_MS", "5"))
+EMBEDDING_MICROBATCH_QUEUE_DEPTH = int(os.getenv("EMBEDDING_MICROBATCH_QUEUE_DEPTH", "1024"))
+# Unix socket of the shared model server (`manage.py run_model_server`). When set, web workers
+# send encode requests there instead of loading torch and the model themselves.
+EMBEDDING_SERVER_SOCKET = os.getenv("EMBEDDING_SERVER_SOCKET", "")
+EMBEDDING_SERVER_TIMEOUT = float(os.getenv("EMBEDDING_SERVER_TIMEOUT", "30"))
+
+# Upper bound on the number of resumes scored by one batch match request
+BATCH_MATCH_MAX_RESUMES = int(os.getenv("BATCH_MATCH_MAX_RESUMES", "5000"))
+
+# In-memory vector indexes of resumes (top-K matches) and job descriptions (recommendations)
+# Load them when the app starts instead of on the first request that needs them
+VECTOR_INDEX_LOAD_ON_STARTUP = os.getenv("VECTOR_INDEX_LOAD_ON_STARTUP", "false").lower() == "true"
+# Partition the index with k-means (IVF) once it holds this many resumes
+VECTOR_INDEX_IVF_THRESHOLD = int(os.getenv("VECTOR_INDEX_IVF_THRESHOLD", "1000000"))
+VECTOR_INDEX_IVF_LISTS = int(os.getenv("VECTOR_INDEX_IVF_LISTS", "1024"))
+VECTOR_INDEX_IVF_PROBES = int(os.getenv("VECTOR_INDEX_IVF_PROBES", "16"))
+# Rebuild the partitions in the background once this many rows were added since the last k-means run
+VECTOR_INDEX_IVF_REPARTITION_ROWS = int(os.getenv("VECTOR_INDEX_IVF_REPARTITION_ROWS", "100000"))
+# Check at most this often whether other processes wrote documents the index does not have yet; 0 never checks
+VECTOR_INDEX_STALENESS_SECONDS = float(os.getenv("VECTOR_INDEX_STALENESS_SECONDS", "30"))
+TOP_K_MAX = int(os.getenv("TOP_K_MAX", "100"))
+
+# Paginated list endpoints and NDJSON exports of job descriptions, resumes and matches
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "50"))
+LIST_PAGE_SIZE_MAX = int(os.getenv("LIST_PAGE_SIZE_MAX", "500"))
+# Documents fetched per cursor round trip while streaming an export
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+
+# Limits for text extraction from uploaded PDFs
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(10 * 1024 * 1024)))
+PDF_MAX_SECONDS = float(os.getenv("PDF_MAX_SECONDS", "10"))
+# Stop reading pages once this much text was collected; extractors and the embedding window need far less
+PDF_MAX_TEXT_CHARS = int(os.getenv("PDF_MAX_TEXT_CHARS", "100000"))
+
+# Process pool that parses PDFs off the request thread (0 workers parses on the request thread)
+PDF_PARSER_WORKERS = int(os.getenv("PDF_PARSER_WORKERS", "2"))
+# A job that runs longer than this once a worker has picked it up is answered with a 422,
+# and only that worker is killed and replaced
+PDF_PARSER_TIMEOUT = float(os.getenv("PDF_PARSER_TIMEOUT", "15"))
+# A job that waits longer than this for a free worker is refused with a 503
+PDF_PARSER_QUEUE_TIMEOUT = float(os.getenv("PDF_PARSER_QUEUE_TIMEOUT", "5"))
+# Recycle each worker after this many jobs to cap memory creep
+PDF_PARSER_MAX_TASKS_PER_CHILD = int(os.getenv("PDF_PARSER_MAX_TASKS_PER_CHILD", "100"))
+
+# Asynchronous ingestion (?async=true on the upload endpoints)
+# Worker threads started in each web process; 0 leaves the queue to `manage.py run_ingest_worker`
+INGEST_WORKER_THREADS = int(os.getenv("INGEST_WORKER_THREADS", "2"))
+INGEST_POLL_SECONDS = float(os.getenv("INGEST_POLL_SECONDS", "1"))
+# A task whose worker has not finished within the lease is handed to another worker
+INGEST_LEASE_SECONDS = int(os.getenv("INGEST_LEASE_SECONDS", "300"))
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+
+# Skills taxonomy (canonical skill ids and their synonyms) used by extract_skills
+SKILLS_TAXONOMY_PATH = os.getenv("SKILLS_TAXONOMY_PATH", str(BASE_DIR / "utils" / "data" / "skills.json"))
 
 
 # Password validation
@@ -150,10 +273,24 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'auth_app.authentication.MongoJWTAuthentication',
     ),
 }
 
+# Signing key of the HS256 access tokens issued by LoginView
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key")  # Change this in production
+# Authenticated user profiles are cached per process for this long
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "30"))
+AUTH_USER_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "10000"))
+
+# bcrypt work factor of new password hashes; older hashes are upgraded on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Password hashing runs on this many threads per process, with at most PASSWORD_HASH_MAX_PENDING
+# jobs running or queued; registrations and logins beyond that get a 429
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
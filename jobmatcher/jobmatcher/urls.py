@@ -16,10 +16,16 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
+from match.views import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/match/', include('match.urls')),
     path('api/auth/', include('auth_app.urls')),
 ]
+
+# Nothing is recorded while the timings are disabled, so the endpoint only exists when they are on
+if settings.METRICS_ENABLED:
+    urlpatterns.append(path('metrics', metrics, name='metrics'))
@@ -1,6 +1,57 @@
+import os
+import sys
+
 from django.apps import AppConfig
 
 
+def ensure_indexes_on_startup():
+    from django.conf import settings
+    from utils.indexes import ensure_indexes
+
+    try:
+        ensure_indexes(settings.MONGO_DB)
+    except Exception as e:
+        # Serving requests without the indexes is slow but works; `manage.py ensure_indexes` reports the cause
+        print(f"ERROR: Could not create MongoDB indexes: {str(e)}")
+
+
+def serves_requests():
+    """
+    Whether this process handles HTTP requests: any server, but of the management commands only runserver.
+    """
+    if os.path.basename(sys.argv[0]) != "manage.py":
+        return True
+    return sys.argv[1:2] == ["runserver"]
+
+
 class MatchConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "match"
+
+    def ready(self):
+        from django.conf import settings
+
+        # Only processes that serve requests warm up; other management commands would load torch
+        # for nothing. The model server warms its own model before listening; through the client
+        # it would only reach its own socket
+        if settings.EMBEDDING_WARMUP_ON_STARTUP and serves_requests() and "run_model_server" not in sys.argv:
+            import threading
+            from utils.utils import warm_up_model
+            # Warm up in the background; the readiness endpoint reports when it is done
+            threading.Thread(target=warm_up_model, name="embedding-warmup", daemon=True).start()
+
+        if settings.MONGO_ENSURE_INDEXES_ON_STARTUP:
+            import threading
+            threading.Thread(target=ensure_indexes_on_startup, name="mongo-indexes", daemon=True).start()
+
+        # Only processes that search need the matrices; startup does not wait for them
+        if settings.VECTOR_INDEX_LOAD_ON_STARTUP and serves_requests():
+            from utils.vector_index import load_job_index_in_background, load_resume_index_in_background
+            load_resume_index_in_background()
+            load_job_index_in_background()
+
+        # Drain the tasks queued before a restart (or whose lease expired) without waiting for
+        # the next upload to start the worker
+        if settings.INGEST_WORKER_THREADS and serves_requests():
+            from match.ingest import get_ingest_worker
+            get_ingest_worker()
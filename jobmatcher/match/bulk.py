@@ -0,0 +1,209 @@
+"""
+Bulk ingestion of historical resumes and job descriptions (`manage.py bulk_ingest`).
+
+Worker processes parse the PDFs and run the extractors, the parent process encodes the
+extracted texts in large batches and writes each batch with one unordered insert_many.
+Parsing of the next batch overlaps with encoding and writing of the current one.
+
+A document that takes longer than PDF_PARSER_TIMEOUT to parse, crashes its parser or is a
+malformed JSONL line is reported as failed and the run goes on. Only stored documents (and
+duplicates of stored ones) are checkpointed, so running again retries the failures.
+"""
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from pymongo.errors import BulkWriteError
+
+from utils.indexes import ensure_indexes
+from utils.parsing_pool import ParsingPool
+from utils.pdf import DocumentError
+from .documents import COLLECTIONS
+
+# Access MongoDB
+db = settings.MONGO_DB
+
+
+class InvalidSource(namedtuple("InvalidSource", ["key", "error"])):
+    """
+    A source that could not be read, reported as a failure under its key.
+    """
+    __slots__ = ()
+
+
+def iter_sources(path, text_field="text"):
+    """
+    Yield (key, pdf_path, text, file_name) for every document under `path`: the PDFs of a
+    directory (recursively) or the lines of a JSONL file, and an InvalidSource for every line
+    that is not a JSON object. Keys identify the documents in the checkpoint file, so they
+    must stay stable between runs.
+    """
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(".pdf"):
+                    pdf_path = os.path.join(root, name)
+                    yield os.path.relpath(pdf_path, path), pdf_path, None, name
+        return
+
+    with open(path, encoding="utf-8") as lines:
+        for line_number, line in enumerate(lines, start=1):
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                    if not isinstance(record, dict):
+                        raise ValueError("expected a JSON object")
+                except ValueError as e:
+                    yield InvalidSource(str(line_number), f"Malformed JSONL line: {e}")
+                    continue
+                yield str(line_number), None, record.get(text_field) or "", record.get("file")
+
+
+def parse_source(kind, source):
+    """
+    Worker process: turn one source into the extracted document fields.
+    Returns (key, fields, None) or (key, None, error).
+    Spawned workers do not run django.setup() (no app startup hooks, no model); the settings
+    are configured lazily from DJANGO_SETTINGS_MODULE.
+    """
+    from utils.pdf import DocumentError, extract_pdf_text
+    from utils.utils import pdf_limits
+    from .documents import content_hash, document_fields
+
+    key, pdf_path, text, file_name = source
+    try:
+        if pdf_path is not None:
+            with open(pdf_path, "rb") as pdf:
+                upload_content_hash = content_hash(payload=pdf.read())
+            text = extract_pdf_text(pdf_path, pdf_limits())
+        else:
+            upload_content_hash = content_hash(text=text)
+        if not text.strip():
+            return key, None, "No text found"
+        fields = document_fields(kind, text, file_name)
+        # Documents already stored through the upload endpoints are reported as duplicates
+        fields["content_hash"] = upload_content_hash
+        return key, fields, None
+    except DocumentError as e:
+        return key, None, str(e)
+
+
+class Checkpoint:
+    """
+    Append-only file of the keys of documents already stored (or found stored already), so
+    an interrupted run can be started again and skips them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as keys:
+                self.done = {key.rstrip("\n") for key in keys}
+
+    def record(self, keys):
+        with open(self.path, "a", encoding="utf-8") as checkpoint:
+            checkpoint.writelines(f"{key}\n" for key in keys)
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        self.done.update(keys)
+
+
+class BulkIngest:
+    """
+    Load every source of one kind into its collection. `report` is called with the running
+    counters after every batch.
+    """
+
+    def __init__(self, kind, workers, batch_size, checkpoint, report=None):
+        self.kind = kind
+        self.workers = workers
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self.report = report or (lambda stats: None)
+        self.stats = {"inserted": 0, "failed": 0, "skipped": 0, "duplicates": 0, "seconds": 0.0, "errors": []}
+
+    def run(self, sources):
+        # Duplicates are only rejected by the unique content hash index
+        ensure_indexes(db, [COLLECTIONS[self.kind]])
+        started = time.perf_counter()
+        # One thread per parser process waits on it, so a job that overruns only costs its own worker
+        pool = ParsingPool(self.workers, settings.PDF_PARSER_TIMEOUT, settings.PDF_PARSER_MAX_TASKS_PER_CHILD)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bulk-parse") as executor:
+                in_flight = None
+                for batch in self._batches(sources):
+                    # Queue the next batch before storing the current one, so the workers keep parsing
+                    futures = [executor.submit(self._parse, pool, source) for source in batch]
+                    if in_flight is not None:
+                        self._store([future.result() for future in in_flight], started)
+                    in_flight = futures
+                if in_flight is not None:
+                    self._store([future.result() for future in in_flight], started)
+        finally:
+            pool.shutdown()
+        return self.stats
+
+    def _parse(self, pool, source):
+        """
+        Parse one source in a worker process. Returns (key, fields, None) or (key, None, error).
+        """
+        if isinstance(source, InvalidSource):
+            return source.key, None, source.error
+        try:
+            return pool.run(parse_source, self.kind, source)
+        except DocumentError as e:
+            # Timed out or crashed its parser; that worker has been replaced
+            return source[0], None, str(e)
+
+    def _batches(self, sources):
+        batch = []
+        for source in sources:
+            if source[0] in self.checkpoint.done:
+                self.stats["skipped"] += 1
+                continue
+            batch.append(source)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _store(self, results, started):
+        from utils.utils import build_embeddings_batch
+
+        parsed = [(key, fields) for key, fields, error in results if error is None]
+        documents = [fields for _, fields in parsed]
+        stored = [key for key, _ in parsed]
+        for key, _, error in results:
+            if error is not None:
+                self.stats["failed"] += 1
+                self.stats["errors"].append((key, error))
+
+        if documents:
+            # Job descriptions are encoded from their description, resumes from their experience
+            text_field = "description" if self.kind == "job_description" else "experience"
+            embeddings = build_embeddings_batch(
+                [(document[text_field], document["responsibilities"]) for document in documents],
+                batch_size=settings.EMBEDDING_BATCH_SIZE,
+            )
+            for document, document_embeddings in zip(documents, embeddings):
+                document["embeddings"] = document_embeddings
+            try:
+                inserted = len(db[COLLECTIONS[self.kind]].insert_many(documents, ordered=False).inserted_ids)
+            except BulkWriteError as e:
+                # ordered=False writes everything else; duplicates of already stored documents are expected on reruns
+                inserted = e.details["nInserted"]
+                self.stats["duplicates"] += sum(1 for error in e.details["writeErrors"] if error["code"] == 11000)
+                if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                    raise
+            self.stats["inserted"] += inserted
+
+        # Failures are left out, so the next run tries them again
+        self.checkpoint.record(stored)
+        self.stats["seconds"] = time.perf_counter() - started
+        self.report(self.stats)
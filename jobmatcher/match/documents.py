@@ -0,0 +1,109 @@
+import hashlib
+import json
+
+from utils.analysis import DocumentAnalysis
+from utils.utils import build_embeddings
+
+# Document kinds that can be ingested, mapped to their Mongo collection
+COLLECTIONS = {
+    "job_description": "job_descriptions",
+    "resume": "resumes",
+}
+
+
+def job_description_fields(text):
+    """
+    Structured fields of a job description, extracted from its text in one pass.
+    """
+    analysis = DocumentAnalysis(text)
+    return {
+        "title": analysis.title,
+        "description": text,
+        "required_skills": analysis.skills,
+        "education": analysis.education,
+        "responsibilities": analysis.responsibilities,
+        "years_of_experience": analysis.experience,
+    }
+
+
+def resume_fields(text, file_name=None):
+    """
+    Structured fields of a resume, extracted from its text in one pass.
+    The text itself is only stored when it was not uploaded as a file.
+    """
+    analysis = DocumentAnalysis(text)
+    return {
+        "skills": analysis.skills,
+        "education": analysis.education,
+        "responsibilities": analysis.responsibilities,
+        "experience": analysis.experience,
+        "file": file_name,  # Store filename if file was uploaded
+        "text": text if not file_name else None,  # Store text if no file was uploaded
+    }
+
+
+def document_embeddings(kind, data):
+    """
+    Embeddings stored with a document so matches reuse them instead of re-encoding.
+    MatchView compares the job description against the resume's experience field.
+    """
+    if kind == "job_description":
+        return build_embeddings(data["description"], data["responsibilities"])
+    return build_embeddings(data["experience"], data["responsibilities"])
+
+
+# Fields of each kind of document that feed the match score
+SCORED_FIELDS = {
+    "job_description": ("description", "required_skills", "education", "responsibilities"),
+    "resume": ("experience", "skills", "education", "responsibilities"),
+}
+
+
+def document_revision(kind, data):
+    """
+    Fingerprint of the fields that feed the match score. Stored match results record the
+    revisions they were computed from and are recomputed once either document changes.
+    """
+    scored = {field: data.get(field) for field in SCORED_FIELDS[kind]}
+    return hashlib.sha256(json.dumps(scored, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+
+
+def content_hash(payload=None, text=None):
+    """
+    Identity of an upload for deduplication: the sha256 of the raw file bytes, or of the text
+    with its whitespace normalized when the document was pasted as text.
+    """
+    if payload is not None:
+        return "file:" + hashlib.sha256(payload).hexdigest()
+    return "text:" + hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def upload_hash(uploaded_file):
+    """
+    content_hash of an uploaded file, read in chunks. The file is rewound for the parser.
+    """
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return "file:" + digest.hexdigest()
+
+
+def document_fields(kind, text, file_name=None):
+    if kind == "job_description":
+        data = job_description_fields(text)
+        if file_name:
+            data["file"] = file_name  # Save file name if uploaded
+    else:
+        data = resume_fields(text, file_name)
+    data["revision"] = document_revision(kind, data)
+    return data
+
+
+def build_document(kind, text, file_name=None):
+    """
+    The full Mongo document of a job description or resume: extracted fields plus embeddings.
+    """
+    data = document_fields(kind, text, file_name)
+    data["embeddings"] = document_embeddings(kind, data)
+    return data
@@ -0,0 +1,185 @@
+import datetime
+import threading
+
+from bson import Binary
+from django.conf import settings
+from pymongo import ReturnDocument
+
+from utils.pdf import DocumentError
+from utils.utils import extract_text_from_pdf
+from utils.vector_index import peek_job_index, peek_resume_index
+from .documents import COLLECTIONS, document_embeddings, document_fields
+
+# Access MongoDB
+db = settings.MONGO_DB
+
+# Mongo-backed queue of documents waiting to be parsed, extracted and embedded
+tasks = db["ingest_tasks"]
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def submit(kind, file_name=None, payload=None, text=None, content_hash=None):
+    """
+    Store a `pending` document and queue it for ingestion. Either `payload` (the raw bytes of
+    an uploaded PDF) or `text` must be given. Returns the id of the new document.
+    Raises DuplicateKeyError when a document with the same `content_hash` already exists.
+    """
+    created_at = _now()
+    document = {"status": "pending", "file": file_name, "created_at": created_at}
+    if content_hash:
+        document["content_hash"] = content_hash
+    document_id = db[COLLECTIONS[kind]].insert_one(document).inserted_id
+    tasks.insert_one({
+        "kind": kind,
+        "document_id": document_id,
+        "stage": "parse",
+        "status": "pending",
+        "payload": Binary(payload) if payload is not None else None,
+        "file_name": file_name,
+        "text": text,
+        "attempts": 0,
+        "created_at": created_at,
+        "locked_until": None,
+    })
+    worker = get_ingest_worker()
+    if worker is not None:
+        worker.notify()
+    return document_id
+
+
+def claim_task():
+    """
+    Atomically take the oldest pending task, or one whose previous worker let its lease expire.
+    """
+    now = _now()
+    return tasks.find_one_and_update(
+        {"$or": [{"status": "pending"}, {"status": "running", "locked_until": {"$lt": now}}]},
+        {
+            "$set": {"status": "running", "locked_until": now + datetime.timedelta(seconds=settings.INGEST_LEASE_SECONDS)},
+            "$inc": {"attempts": 1},
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def process_task(task):
+    """
+    Run the remaining stages of a task: parse -> extract -> embed. Each stage records its
+    result on the task, so a retried task resumes where the previous attempt stopped.
+    """
+    kind = task["kind"]
+    collection = db[COLLECTIONS[kind]]
+    document_filter = {"_id": task["document_id"]}
+
+    try:
+        if task["stage"] == "parse":
+            collection.update_one(document_filter, {"$set": {"status": "parsing"}})
+            text = task["text"] if task.get("payload") is None else extract_text_from_pdf(bytes(task["payload"]))
+            tasks.update_one({"_id": task["_id"]}, {"$set": {"stage": "extract", "text": text}, "$unset": {"payload": ""}})
+            task.update(stage="extract", text=text)
+
+        if task["stage"] == "extract":
+            collection.update_one(document_filter, {"$set": {"status": "extracting"}})
+            fields = document_fields(kind, task["text"], task.get("file_name"))
+            collection.update_one(document_filter, {"$set": fields})
+            tasks.update_one({"_id": task["_id"]}, {"$set": {"stage": "embed"}})
+            task["stage"] = "embed"
+
+        if task["stage"] == "embed":
+            collection.update_one(document_filter, {"$set": {"status": "embedding"}})
+            document = collection.find_one(document_filter)
+            embeddings = document_embeddings(kind, document)
+            collection.update_one(document_filter, {"$set": {"embeddings": embeddings, "status": "ready"}})
+            # Only indexes this process already loaded are updated; a worker process never searches
+            index = peek_resume_index() if kind == "resume" else peek_job_index()
+            if index is not None:
+                skills = document.get("skills") if kind == "resume" else document.get("required_skills")
+                index.add(str(task["document_id"]), embeddings, skills)
+
+        tasks.delete_one({"_id": task["_id"]})
+    except DocumentError as e:
+        # The upload itself is bad, retrying will not help
+        _fail(task, str(e))
+    except Exception as e:
+        print(f"ERROR: Ingest task {task['_id']} failed at stage {task['stage']}: {str(e)}")
+        if task["attempts"] >= settings.INGEST_MAX_ATTEMPTS:
+            _fail(task, str(e))
+        else:
+            tasks.update_one({"_id": task["_id"]}, {"$set": {"status": "pending", "locked_until": None}})
+
+
+def _fail(task, error):
+    # Drop the content hash so that uploading the same document again is retried, not deduplicated
+    db[COLLECTIONS[task["kind"]]].update_one(
+        {"_id": task["document_id"]}, {"$set": {"status": "failed", "error": error}, "$unset": {"content_hash": ""}}
+    )
+    tasks.delete_one({"_id": task["_id"]})
+
+
+class IngestWorker:
+    """
+    Local pool of threads that drain the ingest queue. New submissions wake the threads up
+    immediately; otherwise they poll, which also picks up tasks queued by other processes.
+    """
+
+    def __init__(self, threads, poll_seconds):
+        self.threads = threads
+        self.poll_seconds = poll_seconds
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.threads):
+            thread = threading.Thread(target=self._run, name=f"ingest-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def notify(self):
+        self._wakeup.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                task = claim_task()
+            except Exception as e:
+                print(f"ERROR: Could not claim an ingest task: {str(e)}")
+                task = None
+            if task is not None:
+                process_task(task)
+                continue
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+
+
+_ingest_worker = None
+_ingest_worker_lock = threading.Lock()
+
+
+def get_ingest_worker():
+    """
+    Return the in-process ingest worker, starting it on first use (web processes start it
+    when the app is ready, see MatchConfig).
+    Returns None when INGEST_WORKER_THREADS is 0, i.e. tasks are left to `manage.py run_ingest_worker`.
+    """
+    global _ingest_worker
+    if _ingest_worker is None and settings.INGEST_WORKER_THREADS:
+        with _ingest_worker_lock:
+            if _ingest_worker is None:
+                _ingest_worker = IngestWorker(settings.INGEST_WORKER_THREADS, settings.INGEST_POLL_SECONDS).start()
+    return _ingest_worker
@@ -0,0 +1,54 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from match.bulk import BulkIngest, Checkpoint, iter_sources
+from match.documents import COLLECTIONS
+
+
+class Command(BaseCommand):
+    help = (
+        "Load resumes or job descriptions in bulk from a directory of PDFs or a JSONL file "
+        "(one {\"text\": ...} object per line). Interrupted runs resume from the checkpoint file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(COLLECTIONS))
+        parser.add_argument("source", help="Directory of PDFs or JSONL file.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Parser processes (default: number of CPUs).")
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Documents encoded and inserted together (default: 500).")
+        parser.add_argument("--checkpoint", help="Checkpoint file (default: <source>.checkpoint).")
+        parser.add_argument("--text-field", default="text", help="JSONL key holding the document text.")
+
+    def handle(self, *args, **options):
+        source = options["source"].rstrip(os.sep)
+        if not os.path.exists(source):
+            raise CommandError(f"{source} does not exist")
+        if options["workers"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--workers and --batch-size must be at least 1")
+
+        checkpoint = Checkpoint(options["checkpoint"] or f"{source}.checkpoint")
+        if checkpoint.done:
+            self.stdout.write(f"Resuming, {len(checkpoint.done)} documents already handled")
+
+        ingest = BulkIngest(options["kind"], options["workers"], options["batch_size"], checkpoint, report=self.report)
+        stats = ingest.run(iter_sources(source, options["text_field"]))
+
+        for key, error in stats["errors"]:
+            self.stderr.write(f"{key}: {error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Inserted {stats['inserted']} documents in {stats['seconds']:.1f}s "
+            f"({self.rate(stats):.1f} docs/s); {stats['failed']} failed, {stats['duplicates']} duplicates, "
+            f"{stats['skipped']} skipped from the checkpoint"
+        ))
+
+    def rate(self, stats):
+        return stats["inserted"] / stats["seconds"] if stats["seconds"] else 0.0
+
+    def report(self, stats):
+        self.stdout.write(
+            f"{stats['inserted'] + stats['failed'] + stats['duplicates']} processed, {stats['inserted']} inserted, "
+            f"{stats['failed']} failed, {self.rate(stats):.1f} docs/s"
+        )
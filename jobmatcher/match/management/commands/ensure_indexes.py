@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from utils.indexes import INDEXES, ensure_indexes
+
+
+class Command(BaseCommand):
+    help = "Create the MongoDB indexes the application relies on and drop obsolete ones (existing indexes are left as they are)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--collection", action="append", choices=sorted(INDEXES),
+                            help="Only this collection (repeatable); all of them by default.")
+        parser.add_argument("--dry-run", action="store_true", help="List the declared indexes without creating them.")
+
+    def handle(self, *args, **options):
+        collections = options["collection"]
+        if options["dry_run"]:
+            for name, indexes in INDEXES.items():
+                if collections is None or name in collections:
+                    for index in indexes:
+                        self.stdout.write(f"{name}: {index.document['name']} {dict(index.document['key'])}")
+            return
+
+        for name, index_names in ensure_indexes(settings.MONGO_DB, collections).items():
+            self.stdout.write(self.style.SUCCESS(f"{name}: {', '.join(index_names)}"))
@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from pymongo import ASCENDING, UpdateOne
+
+from utils.embedding_codec import DTYPES, decode_vector, encode_vector, storage_dtype, stored_dtype
+
+# Collections whose documents carry stored embeddings
+COLLECTIONS = ("job_descriptions", "resumes", "users")
+VECTOR_KEYS = ("text", "responsibilities")
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite the stored embeddings of existing documents in one storage format "
+        "(EMBEDDING_STORAGE_DTYPE by default). Documents already in that format are left as they are."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--collection", action="append", choices=COLLECTIONS,
+                            help="Only this collection (repeatable); all of them by default.")
+        parser.add_argument("--dtype", choices=["array", *DTYPES], help="Target format; the configured one by default.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Documents updated per bulk write.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the documents that would be rewritten.")
+
+    def handle(self, *args, **options):
+        dtype = options["dtype"] or storage_dtype()
+        for name in options["collection"] or COLLECTIONS:
+            converted, unchanged, skipped = self.migrate(
+                settings.MONGO_DB[name], dtype, options["batch_size"], options["dry_run"]
+            )
+            verb = "to convert" if options["dry_run"] else "converted"
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {converted} {verb}, {unchanged} already {dtype}, {len(skipped)} unreadable"
+            ))
+            for document_id, error in skipped:
+                self.stderr.write(f"{name} {document_id}: {error}")
+
+    def migrate(self, collection, dtype, batch_size, dry_run):
+        """
+        Returns the number of documents converted and unchanged, and the (id, error) of the
+        documents whose stored vectors could not be read, which are left as they are.
+        """
+        converted = unchanged = 0
+        skipped = []
+        updates = []
+        cursor = collection.find({"embeddings.text": {"$exists": True}}, {"embeddings": 1})
+        for document in cursor.sort("_id", ASCENDING).batch_size(batch_size):
+            embeddings = document["embeddings"]
+            vectors = {key: embeddings[key] for key in VECTOR_KEYS if embeddings.get(key) is not None}
+            try:
+                if all(stored_dtype(value) == dtype for value in vectors.values()):
+                    unchanged += 1
+                    continue
+                rewritten = {f"embeddings.{key}": encode_vector(decode_vector(value), dtype) for key, value in vectors.items()}
+            except ValueError as e:
+                # Corrupt or from an unknown format; one bad document must not stop the migration
+                skipped.append((document["_id"], str(e)))
+                continue
+            converted += 1
+            if dry_run:
+                continue
+            # Leave documents alone if they were re-encoded since they were read
+            updates.append(UpdateOne(
+                {"_id": document["_id"], "embeddings.model_version": embeddings.get("model_version")},
+                {"$set": rewritten},
+            ))
+            if len(updates) >= batch_size:
+                collection.bulk_write(updates, ordered=False)
+                updates = []
+        if updates:
+            collection.bulk_write(updates, ordered=False)
+        return converted, unchanged, skipped
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from match.ingest import IngestWorker
+
+
+class Command(BaseCommand):
+    help = "Process queued asynchronous uploads (parse, extract, embed) until interrupted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=max(settings.INGEST_WORKER_THREADS, 1))
+
+    def handle(self, *args, **options):
+        worker = IngestWorker(options["threads"], settings.INGEST_POLL_SECONDS).start()
+        self.stdout.write(f"Ingest worker running with {options['threads']} threads, press Ctrl+C to stop")
+        try:
+            worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping, waiting for running tasks to finish")
+            worker.stop()
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.model_server import ModelServer
+from utils.utils import EMBEDDING_MODEL_NAME, EMBEDDING_MODEL_VERSION, encode_locally, is_model_loaded, warm_up_model
+
+
+class Command(BaseCommand):
+    help = "Run the shared model server that encodes texts for the web workers over a Unix socket."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", default=settings.EMBEDDING_SERVER_SOCKET,
+                            help="Path of the Unix socket (defaults to EMBEDDING_SERVER_SOCKET)")
+
+    def handle(self, *args, **options):
+        socket_path = options["socket"]
+        if not socket_path:
+            raise CommandError("Pass --socket or set EMBEDDING_SERVER_SOCKET")
+
+        # Load and warm up the model of this process before accepting connections; the
+        # client would only reach this socket, which is not listening yet
+        warm_up_model(local=True)
+
+        server = ModelServer(
+            socket_path, encode_locally, is_model_loaded, lambda: warm_up_model(local=True), EMBEDDING_MODEL_VERSION
+        )
+        self.stdout.write(self.style.SUCCESS(f"Serving {EMBEDDING_MODEL_NAME} on {socket_path}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
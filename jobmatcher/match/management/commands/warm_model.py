@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.model_server import ModelServerError
+from utils.utils import EMBEDDING_MODEL_NAME, get_model, get_model_server_client, warm_up_model
+
+
+class Command(BaseCommand):
+    help = (
+        "With EMBEDDING_SERVER_SOCKET set, make the model server load its model and run a warm-up batch. "
+        "Otherwise load the model in this short-lived process only: this downloads it into the local "
+        "cache and checks that it loads, but does not warm the web workers, which load their own copy "
+        "(see EMBEDDING_WARMUP_ON_STARTUP)."
+    )
+
+    def handle(self, *args, **options):
+        client = get_model_server_client()
+        if client is not None:
+            try:
+                seconds = client.warm_up()
+            except ModelServerError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f"Model server at {client.socket_path} warmed up {EMBEDDING_MODEL_NAME} in {seconds:.2f}s"
+            ))
+            return
+
+        started = time.perf_counter()
+        get_model()
+        loaded = time.perf_counter()
+        warm_up_model()
+        warmed = time.perf_counter()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {EMBEDDING_MODEL_NAME} in {loaded - started:.2f}s, warm-up batch took {warmed - loaded:.2f}s "
+            "(download and cache check only, web workers load their own copy)"
+        ))
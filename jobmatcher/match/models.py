@@ -1,11 +1,50 @@
+from bson import ObjectId
 from django.conf import settings
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 import uuid
 
+from utils.indexes import ensure_indexes
+
 # Access MongoDB instance
 db = settings.MONGO_DB
 
+
+def list_projection(fields=None, exclude=()):
+    """
+    Projection for list and export queries: only `fields` (plus _id) when given, otherwise
+    everything but the `exclude`d fields.
+    """
+    if fields:
+        return {field: 1 for field in fields}
+    return {field: 0 for field in exclude} or None
+
+
+def find_page(collection, after=None, limit=50, projection=None):
+    """
+    One page of a collection in _id order, starting after the `after` id (keyset pagination).
+    Returns (documents, id to pass as `after` for the next page or None on the last page).
+    """
+    query = {"_id": {"$gt": ObjectId(after)}} if after else {}
+    # Read one extra document to know whether there is a next page
+    documents = list(collection.find(query, projection).sort("_id", ASCENDING).limit(limit + 1))
+    if len(documents) > limit:
+        documents = documents[:limit]
+        return documents, documents[-1]["_id"]
+    return documents, None
+
+
+def iter_documents(collection, projection=None, batch_size=1000):
+    """
+    Iterate over a whole collection in _id order, holding one cursor batch in memory at a time.
+    """
+    return collection.find({}, projection).sort("_id", ASCENDING).batch_size(batch_size)
+
+
 class JobDescription:
     collection = db["job_descriptions"]
+    # Left out of list and export responses unless asked for
+    LIST_EXCLUDE = ("embeddings",)
 
     @staticmethod
     def create(data):
@@ -15,9 +54,19 @@ class JobDescription:
     def get_all():
         return list(JobDescription.collection.find({}, {"_id": 0}))
 
+    @staticmethod
+    def get_page(after=None, limit=50, fields=None):
+        return find_page(JobDescription.collection, after, limit, list_projection(fields, JobDescription.LIST_EXCLUDE))
+
+    @staticmethod
+    def iter_all(fields=None, batch_size=1000):
+        return iter_documents(JobDescription.collection, list_projection(fields, JobDescription.LIST_EXCLUDE), batch_size)
+
 
 class Resume:
     collection = db["resumes"]
+    # Left out of list and export responses unless asked for
+    LIST_EXCLUDE = ("embeddings",)
 
     @staticmethod
     def create(data):
@@ -27,14 +76,95 @@ class Resume:
     def get_all():
         return list(Resume.collection.find({}, {"_id": 0}))
 
+    @staticmethod
+    def get_page(after=None, limit=50, fields=None):
+        return find_page(Resume.collection, after, limit, list_projection(fields, Resume.LIST_EXCLUDE))
+
+    @staticmethod
+    def iter_all(fields=None, batch_size=1000):
+        return iter_documents(Resume.collection, list_projection(fields, Resume.LIST_EXCLUDE), batch_size)
+
 
 class Match:
     collection = db["matches"]
+    # Match records are small, list and export them whole
+    LIST_EXCLUDE = ()
+    # A stored match result is identified by the scored pair and the scoring version
+    KEY_FIELDS = ("job_desc_id", "resume_id", "scoring_version")
+    _indexes_created = False
+
+    @staticmethod
+    def ensure_indexes():
+        # The unique key index must exist before the first upsert, so do not rely on the startup hook
+        ensure_indexes(db, ["matches"])
+        Match._indexes_created = True
 
     @staticmethod
     def create(data):
         return Match.collection.insert_one(data)
 
+    @staticmethod
+    def get(job_desc_id, resume_id, scoring_version):
+        return Match.collection.find_one(
+            {"job_desc_id": job_desc_id, "resume_id": resume_id, "scoring_version": scoring_version}
+        )
+
+    @staticmethod
+    def key_filter(data):
+        return {field: data[field] for field in Match.KEY_FIELDS}
+
+    @staticmethod
+    def upsert(data):
+        """
+        Insert the match result or replace the stored one for the same key. Returns its _id.
+        """
+        if not Match._indexes_created:
+            Match.ensure_indexes()
+        for attempt in range(2):
+            try:
+                stored = Match.collection.find_one_and_update(
+                    Match.key_filter(data), {"$set": data}, upsert=True, return_document=ReturnDocument.AFTER,
+                    projection={"_id": 1}
+                )
+                return stored["_id"]
+            except DuplicateKeyError:
+                # A concurrent request inserted the same key first; the retry updates its record
+                if attempt:
+                    raise
+
+    @staticmethod
+    def upsert_many(records):
+        """
+        Upsert many match results in one bulk write. Returns their _ids, in order.
+        """
+        if not records:
+            return []
+        if not Match._indexes_created:
+            Match.ensure_indexes()
+        Match.collection.bulk_write(
+            [UpdateOne(Match.key_filter(data), {"$set": data}, upsert=True) for data in records], ordered=False
+        )
+        # Existing records are not reported by the bulk write, so read all ids back at once
+        first = records[0]
+        stored = Match.collection.find(
+            {
+                "job_desc_id": first["job_desc_id"],
+                "scoring_version": first["scoring_version"],
+                "resume_id": {"$in": [data["resume_id"] for data in records]},
+            },
+            {"resume_id": 1},
+        )
+        ids = {match["resume_id"]: match["_id"] for match in stored}
+        return [ids.get(data["resume_id"]) for data in records]
+
     @staticmethod
     def get_all():
         return list(Match.collection.find({}, {"_id": 0}))
+
+    @staticmethod
+    def get_page(after=None, limit=50, fields=None):
+        return find_page(Match.collection, after, limit, list_projection(fields, Match.LIST_EXCLUDE))
+
+    @staticmethod
+    def iter_all(fields=None, batch_size=1000):
+        return iter_documents(Match.collection, list_projection(fields, Match.LIST_EXCLUDE), batch_size)
@@ -1,3 +1,748 @@
-from django.test import TestCase
+import datetime
+import hashlib
+import json
+import operator
+import os
+import threading
+import time
+import uuid
+from unittest import mock
 
-# Create your tests here.
+import jwt
+
+import numpy as np
+from bson import ObjectId
+from django.conf import settings
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.test import APIClient
+
+from utils import vector_index
+from utils.embedding_codec import decode_vector, encode_vector, stored_dtype
+from utils.model_server import ModelServerClient
+from utils.skill_matrix import SkillMatrix
+from utils.parsing_pool import ParsingPool
+from utils.pdf import DocumentError
+from utils.taxonomy import PhraseMatcher
+from utils.utils import (
+    EMBEDDING_MODEL_VERSION, analyze_match, analyze_match_batch, calculate_skill_match, extract_skills,
+    skill_match_batch,
+)
+from utils.vector_index import EmbeddingIndex
+from . import ingest
+from .models import Match
+from .views import INTERNAL_FIELDS, metrics
+
+SKILLS = ["python", "django", "mongodb", "docker", "aws", "sql", "java", "react"]
+
+
+def fake_encode(texts, batch_size=None):
+    """
+    Stand-in for `_encode_uncached`: a deterministic vector per text, so tests do not load the model.
+    """
+    vectors = [
+        np.random.default_rng(int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little"))
+        .standard_normal(384)
+        for text in texts
+    ]
+    return np.array(vectors, dtype=np.float32).reshape(len(texts), 384), EMBEDDING_MODEL_VERSION
+
+
+def random_embeddings(rng, responsibilities=True):
+    return {
+        "model_version": EMBEDDING_MODEL_VERSION,
+        "text": encode_vector(rng.standard_normal(384)),
+        "responsibilities": encode_vector(rng.standard_normal(384)) if responsibilities else None,
+    }
+
+
+def random_skills(rng, low=0, high=6):
+    # Duplicates included, calculate_skill_match counts every listed job skill
+    return [str(skill) for skill in rng.choice(SKILLS, rng.integers(low, high))]
+
+
+class MongoTestCase(SimpleTestCase):
+    """
+    Tests against the test database configured in settings for `manage.py test`, dropped
+    before every test.
+    """
+
+    def setUp(self):
+        if settings.MONGO_DB.name != "jobmatcher_test":
+            self.skipTest("Run with `manage.py test`, which uses a throwaway database")
+        for name in settings.MONGO_DB.list_collection_names():
+            settings.MONGO_DB.drop_collection(name)
+        patchers = [
+            # Every test starts as a fresh process would: no loaded vector index, no index created yet
+            mock.patch.multiple(vector_index, _resume_index=None, _job_index=None),
+            mock.patch("match.views._dedupe_indexes_created", set()),
+            mock.patch.object(Match, "_indexes_created", False),
+        ]
+        if type(settings.MONGO_DB).__module__.startswith("mongomock"):
+            patchers.append(mock.patch("mongomock.collection.Collection.bulk_write", mongomock_bulk_write))
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+def mongomock_bulk_write(collection, requests, ordered=True, **kwargs):
+    """
+    Stand-in for `bulk_write` on mongomock collections, which cannot run the pymongo 4 bulk API.
+    Only the UpdateOne requests the app sends are supported.
+    """
+    for request in requests:
+        collection.update_one(request._filter, request._doc, upsert=request._upsert)
+
+
+def authenticated_client():
+    """
+    An APIClient holding a token for a new user.
+    """
+    user_id = str(uuid.uuid4())
+    settings.MONGO_DB["users"].insert_one({"_id": user_id, "email": f"{user_id}@example.com"})
+    token = jwt.encode(
+        {"user_id": user_id, "exp": datetime.datetime.utcnow() + datetime.timedelta(minutes=5)},
+        settings.JWT_SECRET_KEY, algorithm="HS256",
+    )
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+def cosine(a, b):
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+class EmbeddingCodecTests(SimpleTestCase):
+    # Largest cosine error allowed against float32, for vectors of the model's dimension
+    MAX_COSINE_ERROR = {"float16": 5e-4, "int8": 1e-2}
+
+    def pairs(self, count=500, dimension=384):
+        """
+        Seeded vector pairs with cosine similarities spread over [-1, 1].
+        """
+        rng = np.random.default_rng(0)
+        for _ in range(count):
+            a = rng.standard_normal(dimension).astype(np.float32)
+            b = a * rng.uniform(-1, 1) + rng.standard_normal(dimension).astype(np.float32) * rng.uniform(0.1, 2)
+            yield a, b.astype(np.float32)
+
+    def test_cosine_error_is_bounded(self):
+        for dtype, bound in self.MAX_COSINE_ERROR.items():
+            with self.subTest(dtype=dtype):
+                worst = max(
+                    abs(cosine(a, b) - cosine(
+                        decode_vector(encode_vector(a, dtype)).astype(np.float32),
+                        decode_vector(encode_vector(b, dtype)).astype(np.float32),
+                    ))
+                    for a, b in self.pairs()
+                )
+                self.assertLess(worst, bound)
+
+    def test_stored_size(self):
+        vector = np.ones(384, dtype=np.float32)
+        self.assertEqual(len(encode_vector(vector, "float16")), 4 + 384 * 2)
+        self.assertEqual(len(encode_vector(vector, "int8")), 8 + 384)
+
+    def test_float16_decodes_without_copy(self):
+        stored = encode_vector(np.arange(8, dtype=np.float32), "float16")
+        decoded = decode_vector(stored)
+        self.assertEqual(decoded.dtype, np.dtype("<f2"))
+        self.assertIs(decoded.base, stored)
+        np.testing.assert_array_equal(decoded, np.arange(8))
+
+    def test_formats_are_recognized(self):
+        vector = [0.5, -0.25, 0.0]
+        for dtype in ("array", "float16", "int8"):
+            with self.subTest(dtype=dtype):
+                stored = encode_vector(vector, dtype)
+                self.assertEqual(stored_dtype(stored), dtype)
+                np.testing.assert_allclose(decode_vector(stored), vector, atol=1e-2)
+
+    def test_zero_vector(self):
+        np.testing.assert_array_equal(decode_vector(encode_vector(np.zeros(4), "int8")), np.zeros(4))
+
+    def test_unknown_header_is_rejected(self):
+        with self.assertRaises(ValueError):
+            decode_vector(b"XX\x01\x01" + bytes(8))
+
+
+class SkillMatrixTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.resumes = [random_skills(rng) for _ in range(200)]
+        self.jobs = [random_skills(rng) for _ in range(20)] + [[], ["cobol"], ["python", "python"]]
+
+    def test_match_job_equals_calculate_skill_match(self):
+        matrix = SkillMatrix.from_skills(self.resumes)
+        for job_skills in self.jobs:
+            result = matrix.match_job(job_skills, masks=True)
+            for i, resume_skills in enumerate(self.resumes):
+                self.assertAlmostEqual(result.percentages[i], calculate_skill_match(job_skills, resume_skills))
+                self.assertEqual(set(result.matched_skills(i)), set(job_skills) & set(resume_skills))
+                self.assertEqual(set(result.missing_skills(i)), set(job_skills) - set(resume_skills))
+
+    def test_match_resume_equals_calculate_skill_match(self):
+        matrix = SkillMatrix.from_skills(self.jobs)
+        for resume_skills in self.resumes[:20]:
+            percentages = matrix.match_resume(resume_skills)
+            for i, job_skills in enumerate(self.jobs):
+                self.assertAlmostEqual(percentages[i], calculate_skill_match(job_skills, resume_skills))
+
+    def test_appended_and_replaced_rows(self):
+        matrix = SkillMatrix()
+        for skills in self.resumes[:50]:
+            matrix.append(skills)
+        matrix.replace(3, ["cobol", "python"])
+        resumes = self.resumes[:50]
+        resumes[3] = ["cobol", "python"]
+        rows = [3, 0, 49]
+        result = matrix.match_job(["python", "cobol", "sql"], rows=rows)
+        for percentage, row in zip(result.percentages, rows):
+            self.assertAlmostEqual(percentage, calculate_skill_match(["python", "cobol", "sql"], resumes[row]))
+
+
+class PhraseMatcherTests(SimpleTestCase):
+    def test_synonyms_are_reported_under_their_skill(self):
+        skills = extract_skills("Deployed services on K8s with Java and NodeJS")
+        self.assertIn("kubernetes", skills)
+        self.assertIn("java", skills)
+        self.assertIn("node.js", skills)
+        self.assertNotIn("k8s", skills)
+
+    def test_whole_words_only(self):
+        skills = extract_skills("Frontend work in JavaScript")
+        self.assertIn("javascript", skills)
+        self.assertNotIn("java", skills)
+
+    def test_multi_word_phrases_and_spans(self):
+        matcher = PhraseMatcher([("machine learning", ["ml"]), ("html", [])])
+        text = "Machine  learning and ML, plus HTML"
+        hits = matcher.find(text)
+        self.assertEqual([hit.id for hit in hits], ["machine learning", "machine learning", "html"])
+        self.assertEqual(text[hits[0].start:hits[0].end], "Machine  learning")
+        self.assertEqual(matcher.find_ids("html only"), ["html"])
+
+
+class BatchScoringTests(MongoTestCase):
+    """
+    The vectorized scoring paths give the same scores as `analyze_match` pair by pair.
+    """
+
+    def setUp(self):
+        super().setUp()
+        rng = np.random.default_rng(1)
+        self.job = {
+            "embeddings": random_embeddings(rng),
+            "required_skills": ["python", "django", "aws", "python"],
+            "responsibilities": "design",
+        }
+        self.resumes = []
+        for i in range(40):
+            with_responsibilities = i % 4 != 0
+            self.resumes.append({
+                "embeddings": random_embeddings(rng, with_responsibilities),
+                "skills": random_skills(rng),
+                "responsibilities": "build" if with_responsibilities else "",
+            })
+
+    def expected(self, job, resume):
+        return analyze_match(
+            "", "", job["required_skills"], resume["skills"], job["responsibilities"], resume["responsibilities"],
+            job_embeddings=job["embeddings"], resume_embeddings=resume["embeddings"],
+        )
+
+    def test_analyze_match_batch(self):
+        for skill_match in (None, skill_match_batch(self.job["required_skills"], [r["skills"] for r in self.resumes])):
+            scores = analyze_match_batch(
+                self.job["embeddings"], self.job["required_skills"], self.job["responsibilities"],
+                [r["embeddings"] for r in self.resumes], [r["skills"] for r in self.resumes],
+                [r["responsibilities"] for r in self.resumes], skill_match=skill_match,
+            )
+            for score, resume in zip(scores, self.resumes):
+                self.assertAlmostEqual(float(score), self.expected(self.job, resume), places=3)
+
+    def test_resume_index_search(self):
+        collection = settings.MONGO_DB["resumes"]
+        ids = [str(i) for i in collection.insert_many([dict(r) for r in self.resumes]).inserted_ids]
+        index = EmbeddingIndex(collection, skills_field="skills", staleness_seconds=0).load()
+        results = index.search(self.job["embeddings"], k=len(ids), skills=self.job["required_skills"])
+        self.assertEqual(len(results), len(ids))
+        scores = [score for _, score in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        for doc_id, score in results:
+            self.assertAlmostEqual(score, self.expected(self.job, self.resumes[ids.index(doc_id)]), places=3)
+
+    def test_job_index_search(self):
+        rng = np.random.default_rng(2)
+        jobs = [
+            {"embeddings": random_embeddings(rng), "required_skills": random_skills(rng, 1), "responsibilities": "design"}
+            for _ in range(30)
+        ]
+        collection = settings.MONGO_DB["job_descriptions"]
+        ids = [str(i) for i in collection.insert_many([dict(job) for job in jobs]).inserted_ids]
+        index = EmbeddingIndex(collection, skills_field="required_skills", skills_required=True, staleness_seconds=0).load()
+        resume = self.resumes[1]
+        for doc_id, score in index.search(resume["embeddings"], k=10, skills=resume["skills"]):
+            self.assertAlmostEqual(score, self.expected(jobs[ids.index(doc_id)], resume), places=3)
+
+
+@mock.patch("utils.utils._encode_uncached", fake_encode)
+class UploadDedupeTests(MongoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def assertNoInternalFields(self, document):
+        for field in INTERNAL_FIELDS:
+            self.assertNotIn(field, document)
+
+    def test_job_description_text(self):
+        text = "Python developer. Responsibilities: develop APIs. 3 years experience with Django"
+        first = self.client.post("/api/match/job-description/", {"text": text}, format="json")
+        self.assertEqual(first.status_code, 201)
+        self.assertFalse(first.data["deduplicated"])
+        # Whitespace does not make it another document
+        second = self.client.post("/api/match/job-description/", {"text": f"  {text}\n"}, format="json")
+        self.assertEqual(second.status_code, 200)
+        self.assertTrue(second.data["deduplicated"])
+        self.assertEqual(second.data["_id"], first.data["_id"])
+        self.assertNoInternalFields(first.data)
+        self.assertNoInternalFields(second.data)
+        self.assertEqual(settings.MONGO_DB["job_descriptions"].count_documents({}), 1)
+
+    def test_resume_text(self):
+        text = "Experience: 4 years with Python and Django. Responsible for building APIs"
+        first = self.client.post("/api/match/resume/", {"resume_text": text}, format="multipart")
+        self.assertEqual(first.status_code, 201)
+        second = self.client.post("/api/match/resume/", {"resume_text": text}, format="multipart")
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data["_id"], first.data["_id"])
+        self.assertNoInternalFields(first.data)
+        self.assertNoInternalFields(second.data)
+        self.assertEqual(settings.MONGO_DB["resumes"].count_documents({}), 1)
+
+
+JOB_TEXT = (
+    "Backend engineer with Python, Django and AWS. Responsibilities: design APIs, review code. "
+    "Education: Bachelor in Computer Science"
+)
+RESUME_TEXTS = [
+    "Experience: 5 years with Python, Django and AWS. Responsible for building APIs",
+    "Experience: 3 years with Java and SQL. Responsible for reporting",
+    "Experience: 2 years with Python and Docker. Responsible for deployments",
+    "Experience: 6 years with React and AWS. Responsible for frontends",
+]
+
+
+class MatchingViewTests(MongoTestCase):
+    """
+    MatchView, BatchMatchView and TopMatchesView on documents uploaded through the API.
+    """
+
+    def setUp(self):
+        super().setUp()
+        # Started here rather than as a class decorator, which would not cover the uploads below
+        patcher = mock.patch("utils.utils._encode_uncached", fake_encode)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        response = self.client.post("/api/match/job-description/", {"text": JOB_TEXT}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.job_id = response.data["_id"]
+        self.resume_ids = []
+        for text in RESUME_TEXTS:
+            response = self.client.post("/api/match/resume/", {"resume_text": text}, format="multipart")
+            self.assertEqual(response.status_code, 201)
+            self.resume_ids.append(response.data["_id"])
+
+    def match(self, resume_id, refresh=False):
+        url = "/api/match/match/?refresh=true" if refresh else "/api/match/match/"
+        response = self.client.post(url, {"job_desc_id": self.job_id, "resume_id": resume_id}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def batch(self, **data):
+        return self.client.post("/api/match/match/batch/", {"job_desc_id": self.job_id, **data}, format="json")
+
+    def test_match_is_stored_and_reused(self):
+        resume_id = self.resume_ids[0]
+        first = self.match(resume_id)
+        self.assertFalse(first["cached"])
+        self.assertEqual(set(first["matched_skills"]), {"python", "django", "aws"})
+
+        second = self.match(resume_id)
+        self.assertTrue(second["cached"])
+        self.assertEqual(second["_id"], first["_id"])
+        self.assertEqual(second["match_score"], first["match_score"])
+
+        refreshed = self.match(resume_id, refresh=True)
+        self.assertFalse(refreshed["cached"])
+        # Recomputed into the same record
+        self.assertEqual(refreshed["_id"], first["_id"])
+        self.assertAlmostEqual(refreshed["match_score"], first["match_score"], places=5)
+        self.assertEqual(Match.collection.count_documents({}), 1)
+
+    def test_changed_document_is_rescored(self):
+        first = self.match(self.resume_ids[0])
+        settings.MONGO_DB["resumes"].update_one({"_id": ObjectId(self.resume_ids[0])}, {"$set": {"revision": "edited"}})
+        second = self.match(self.resume_ids[0])
+        self.assertFalse(second["cached"])
+        self.assertEqual(second["resume_revision"], "edited")
+        self.assertEqual(second["_id"], first["_id"])
+
+    def test_match_errors(self):
+        response = self.client.post("/api/match/match/", {"job_desc_id": "nope", "resume_id": self.resume_ids[0]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/api/match/match/", {"job_desc_id": self.job_id, "resume_id": str(ObjectId())}, format="json")
+        self.assertEqual(response.status_code, 404)
+        settings.MONGO_DB["resumes"].update_one({"_id": ObjectId(self.resume_ids[0])}, {"$set": {"status": "parsing"}})
+        response = self.client.post("/api/match/match/", {"job_desc_id": self.job_id, "resume_id": self.resume_ids[0]}, format="json")
+        self.assertEqual(response.status_code, 409)
+
+    def test_batch_matches_single_matches(self):
+        response = self.batch(resume_ids=self.resume_ids)
+        self.assertEqual(response.status_code, 200, response.data)
+        results = response.data["results"]
+        self.assertEqual(sorted(match["resume_id"] for match in results), sorted(self.resume_ids))
+        scores = [match["match_score"] for match in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+        job_skills = {"python", "django", "aws"}
+        for match in results:
+            single = self.match(match["resume_id"], refresh=True)
+            self.assertAlmostEqual(match["match_score"], single["match_score"], places=3)
+            self.assertEqual(set(match["matched_skills"]), set(single["matched_skills"]))
+            self.assertEqual(set(match["missing_skills"]) | set(match["matched_skills"]), job_skills)
+            # The single match replaced the record stored by the batch
+            self.assertEqual(single["_id"], match["_id"])
+        self.assertEqual(Match.collection.count_documents({}), len(self.resume_ids))
+
+        # Matching again updates the stored records
+        again = self.batch(resume_ids=self.resume_ids).data["results"]
+        self.assertEqual({m["resume_id"]: m["_id"] for m in again}, {m["resume_id"]: m["_id"] for m in results})
+        self.assertEqual(Match.collection.count_documents({}), len(self.resume_ids))
+
+    def test_batch_filter(self):
+        response = self.batch(filter={"skills": ["aws"]})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            sorted(match["resume_id"] for match in response.data["results"]), sorted([self.resume_ids[0], self.resume_ids[3]])
+        )
+        self.assertEqual(self.batch(filter={"skills": ["cobol"]}).status_code, 404)
+
+    def test_batch_errors(self):
+        self.assertEqual(self.batch().status_code, 400)
+        self.assertEqual(self.batch(filter={"salary": "100"}).status_code, 400)
+        self.assertEqual(self.batch(filter={"skills": {"$ne": None}}).status_code, 400)
+        self.assertEqual(self.batch(resume_ids="all").status_code, 400)
+        with override_settings(BATCH_MATCH_MAX_RESUMES=2):
+            self.assertEqual(self.batch(resume_ids=self.resume_ids).status_code, 400)
+        response = self.client.post(
+            "/api/match/match/batch/", {"job_desc_id": str(ObjectId()), "resume_ids": self.resume_ids}, format="json"
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def top(self, **params):
+        return self.client.get("/api/match/match/top/", {"job_desc_id": self.job_id, **params})
+
+    def test_top_matches(self):
+        # The index is loaded in the background and the request is asked to come back
+        response = self.top(k=2)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "5")
+        deadline = time.monotonic() + 5
+        while vector_index.peek_resume_index() is None:
+            self.assertLess(time.monotonic(), deadline, "The resume index was not loaded")
+            time.sleep(0.01)
+
+        response = self.top(k=2)
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"]
+        ranked = self.batch(resume_ids=self.resume_ids).data["results"]
+        self.assertEqual([match["resume_id"] for match in results], [match["resume_id"] for match in ranked[:2]])
+        for match, expected in zip(results, ranked):
+            self.assertAlmostEqual(match["score"], expected["match_score"], places=3)
+
+        # A resume uploaded after the index was loaded is searched too
+        response = self.client.post("/api/match/resume/", {"resume_text": JOB_TEXT}, format="multipart")
+        self.assertEqual(self.top(k=1).data["results"][0]["resume_id"], response.data["_id"])
+
+    def test_top_matches_errors(self):
+        self.assertEqual(self.top(k="many").status_code, 400)
+        self.assertEqual(self.top(k=0).status_code, 400)
+        self.assertEqual(self.client.get("/api/match/match/top/", {"job_desc_id": str(ObjectId())}).status_code, 404)
+        settings.MONGO_DB["job_descriptions"].update_one({"_id": ObjectId(self.job_id)}, {"$set": {"status": "embedding"}})
+        self.assertEqual(self.top().status_code, 409)
+
+
+@mock.patch("utils.utils._encode_uncached", fake_encode)
+class AsyncIngestTests(MongoTestCase):
+    """
+    Uploads with ?async=true are queued and processed by `claim_task` / `process_task`,
+    driven by hand here instead of by the worker threads.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        patcher = mock.patch("match.ingest.get_ingest_worker", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self, text=RESUME_TEXTS[0]):
+        return self.client.post("/api/match/resume/?async=true", {"resume_text": text}, format="multipart")
+
+    def status(self, response):
+        return self.client.get(response.data["status_url"])
+
+    def test_upload_is_queued_then_ready(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], "pending")
+        self.assertEqual(self.status(response).data["status"], "pending")
+        # Uploading it again while it is queued points at the same document
+        again = self.upload()
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.data["_id"], response.data["_id"])
+        self.assertNotIn("content_hash", again.data)
+
+        task = ingest.claim_task()
+        self.assertEqual(task["attempts"], 1)
+        self.assertIsNone(ingest.claim_task())
+        ingest.process_task(task)
+        self.assertEqual(ingest.tasks.count_documents({}), 0)
+
+        document = self.status(response).data
+        self.assertEqual(document["status"], "ready")
+        self.assertEqual(document["skills"], ["python", "django", "aws"])
+        for field in INTERNAL_FIELDS:
+            self.assertNotIn(field, document)
+        stored = settings.MONGO_DB["resumes"].find_one({"_id": ObjectId(response.data["_id"])})
+        self.assertEqual(stored["embeddings"]["model_version"], EMBEDDING_MODEL_VERSION)
+
+    def test_expired_lease_is_claimed_again(self):
+        self.upload()
+        task = ingest.claim_task()
+        ingest.tasks.update_one(
+            {"_id": task["_id"]}, {"$set": {"locked_until": ingest._now() - datetime.timedelta(seconds=1)}}
+        )
+        retried = ingest.claim_task()
+        self.assertEqual(retried["_id"], task["_id"])
+        self.assertEqual(retried["attempts"], 2)
+
+    def test_failed_stage_is_retried_from_where_it_stopped(self):
+        response = self.upload()
+        with mock.patch("match.ingest.document_embeddings", side_effect=RuntimeError("model unavailable")):
+            ingest.process_task(ingest.claim_task())
+        task = ingest.tasks.find_one({})
+        self.assertEqual((task["status"], task["stage"]), ("pending", "embed"))
+        self.assertEqual(self.status(response).data["status"], "embedding")
+
+        with mock.patch("match.ingest.document_fields") as document_fields:
+            ingest.process_task(ingest.claim_task())
+        document_fields.assert_not_called()
+        self.assertEqual(self.status(response).data["status"], "ready")
+
+    def test_bad_upload_fails(self):
+        response = self.upload()
+        with mock.patch("match.ingest.document_fields", side_effect=DocumentError("No text found")):
+            ingest.process_task(ingest.claim_task())
+        document = self.status(response).data
+        self.assertEqual((document["status"], document["error"]), ("failed", "No text found"))
+        self.assertEqual(ingest.tasks.count_documents({}), 0)
+        # The same content can be uploaded again
+        self.assertEqual(self.upload().status_code, 202)
+
+    def test_status_errors(self):
+        self.assertEqual(self.client.get("/api/match/resume/nope/status/").status_code, 400)
+        self.assertEqual(self.client.get(f"/api/match/resume/{ObjectId()}/status/").status_code, 404)
+
+
+class DocumentPaginationTests(MongoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = authenticated_client()
+        rng = np.random.default_rng(3)
+        self.ids = [
+            str(settings.MONGO_DB["resumes"].insert_one({"skills": random_skills(rng), "embeddings": random_embeddings(rng)}).inserted_id)
+            for _ in range(5)
+        ]
+
+    def test_pages(self):
+        ids, after, pages = [], None, 0
+        while True:
+            params = {"limit": 2, **({"after": after} if after else {})}
+            response = self.client.get("/api/match/resumes/", params)
+            self.assertEqual(response.status_code, 200)
+            pages += 1
+            for document in response.data["results"]:
+                self.assertNotIn("embeddings", document)
+                ids.append(document["_id"])
+            after = response.data["next"]
+            if after is None:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(ids, self.ids)
+
+    def test_fields(self):
+        results = self.client.get("/api/match/resumes/", {"fields": "embeddings"}).data["results"]
+        self.assertEqual(set(results[0]), {"_id", "embeddings"})
+        self.assertEqual(len(results[0]["embeddings"]["text"]), 384)
+
+    def test_invalid_options(self):
+        for params in ({"limit": 0}, {"limit": "all"}, {"after": "nope"}, {"fields": "skills,$where"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get("/api/match/resumes/", params).status_code, 400)
+        with override_settings(LIST_PAGE_SIZE_MAX=3):
+            self.assertEqual(self.client.get("/api/match/resumes/", {"limit": 4}).status_code, 400)
+
+    def test_export(self):
+        response = self.client.get("/api/match/resumes/export/", {"fields": "skills,embeddings"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn('filename="resumes.ndjson"', response["Content-Disposition"])
+        documents = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([document["_id"] for document in documents], self.ids)
+        stored = settings.MONGO_DB["resumes"].find_one({"_id": ObjectId(self.ids[0])})
+        np.testing.assert_allclose(documents[0]["embeddings"]["text"], decode_vector(stored["embeddings"]["text"]))
+        self.assertEqual(documents[0]["skills"], stored["skills"])
+        self.assertEqual(self.client.get("/api/match/resumes/export/", {"fields": "a b"}).status_code, 400)
+
+
+class MatchUpsertTests(MongoTestCase):
+    def records(self, scoring_version, score):
+        return [
+            {"job_desc_id": "job", "resume_id": f"resume-{i}", "scoring_version": scoring_version, "match_score": score}
+            for i in range(5)
+        ]
+
+    def test_upsert_many_is_idempotent_per_scoring_version(self):
+        ids = Match.upsert_many(self.records("1", 10.0))
+        self.assertEqual(Match.upsert_many(self.records("1", 20.0)), ids)
+        self.assertEqual(Match.collection.count_documents({}), 5)
+        self.assertEqual(Match.get("job", "resume-0", "1")["match_score"], 20.0)
+
+        other = Match.upsert_many(self.records("2", 30.0))
+        self.assertTrue(set(other).isdisjoint(ids))
+        self.assertEqual(Match.collection.count_documents({}), 10)
+        self.assertEqual(Match.upsert(self.records("2", 40.0)[0]), other[0])
+
+    def test_obsolete_index_is_dropped(self):
+        Match.collection.create_index("job_desc_id", name="job_desc_id")
+        Match.ensure_indexes()
+        indexes = Match.collection.index_information()
+        self.assertIn("match_key", indexes)
+        self.assertNotIn("job_desc_id", indexes)
+
+
+class DocumentListAccessTests(MongoTestCase):
+    URLS = [
+        "/api/match/job-descriptions/", "/api/match/job-descriptions/export/",
+        "/api/match/resumes/", "/api/match/resumes/export/",
+        "/api/match/matches/", "/api/match/matches/export/",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        settings.MONGO_DB["resumes"].insert_one({"experience": "Python", "skills": ["python"]})
+
+    def test_requires_authentication(self):
+        for url in self.URLS:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_authenticated(self):
+        client = authenticated_client()
+        self.assertEqual(len(client.get("/api/match/resumes/").data["results"]), 1)
+        export = b"".join(client.get("/api/match/resumes/export/").streaming_content)
+        self.assertEqual(json.loads(export.splitlines()[0])["skills"], ["python"])
+
+
+class ParsingPoolTests(SimpleTestCase):
+    """
+    The pool runs any importable function; the standard library ones below stand in for a
+    parse that succeeds, fails, hangs or crashes its worker.
+    """
+
+    def pool(self, **options):
+        pool = ParsingPool(**{"workers": 1, "timeout": 5, "max_tasks_per_child": 0, **options})
+        self.addCleanup(pool.shutdown)
+        return pool
+
+    def test_result_and_error(self):
+        pool = self.pool()
+        self.assertEqual(pool.run(operator.add, 2, 3), 5)
+        with self.assertRaises(ZeroDivisionError):
+            pool.run(operator.truediv, 1, 0)
+        # The worker survives a job that raised
+        self.assertEqual(pool.run(operator.add, 1, 1), 2)
+
+    def test_timeout(self):
+        pool = self.pool(timeout=0.5)
+        with self.assertRaises(DocumentError) as raised:
+            pool.run(time.sleep, 30)
+        self.assertEqual(raised.exception.status_code, 422)
+        # The stuck worker was replaced
+        self.assertEqual(pool.run(operator.add, 2, 3), 5)
+
+    def test_crash(self):
+        pool = self.pool()
+        with self.assertRaises(DocumentError) as raised:
+            pool.run(os._exit, 1)
+        self.assertEqual(raised.exception.status_code, 422)
+        self.assertIn("crashed", str(raised.exception))
+        self.assertEqual(pool.run(operator.add, 2, 3), 5)
+
+    def test_busy_pool_sheds_load(self):
+        pool = self.pool(queue_timeout=0.1)
+        pool.run(operator.add, 0, 0)  # Start the worker outside the timed part
+        thread = threading.Thread(target=pool.run, args=(time.sleep, 1))
+        thread.start()
+        self.addCleanup(thread.join)
+        deadline = time.monotonic() + 5
+        while not pool._idle.empty():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        with self.assertRaises(DocumentError) as raised:
+            pool.run(operator.add, 2, 3)
+        self.assertEqual(raised.exception.status_code, 503)
+
+    def test_workers_are_recycled(self):
+        pool = self.pool(max_tasks_per_child=2)
+        pids = [pool.run(os.getpid) for _ in range(3)]
+        self.assertEqual(pids[0], pids[1])
+        self.assertNotEqual(pids[1], pids[2])
+
+
+class MetricsAccessTests(SimpleTestCase):
+    def get(self, **headers):
+        return metrics(RequestFactory().get("/metrics", **headers))
+
+    def test_not_routed_when_disabled(self):
+        self.assertFalse(settings.METRICS_ENABLED)
+        self.assertEqual(APIClient().get("/metrics").status_code, 404)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_local_requests_only_without_a_token(self):
+        self.assertEqual(self.get(REMOTE_ADDR="127.0.0.1").status_code, 200)
+        self.assertEqual(self.get(REMOTE_ADDR="10.0.0.8").status_code, 403)
+
+    @override_settings(METRICS_TOKEN="scrape-me")
+    def test_token(self):
+        self.assertEqual(self.get(HTTP_AUTHORIZATION="Bearer scrape-me", REMOTE_ADDR="10.0.0.8").status_code, 200)
+        self.assertEqual(self.get(HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+        self.assertEqual(self.get(HTTP_AUTHORIZATION="Bearer scrap\u00e9").status_code, 403)
+        # The token is required from this host too
+        self.assertEqual(self.get(REMOTE_ADDR="127.0.0.1").status_code, 403)
+
+
+class ModelServerClientTests(SimpleTestCase):
+    def test_failed_connect_closes_the_socket(self):
+        client = ModelServerClient("/nonexistent/model.sock", timeout=1)
+        with mock.patch("utils.model_server.socket.socket") as socket_class:
+            sock = socket_class.return_value
+            sock.connect.side_effect = FileNotFoundError
+            with self.assertRaises(FileNotFoundError):
+                client._connection()
+        sock.close.assert_called_once_with()
+        self.assertIsNone(getattr(client._local, "sock", None))
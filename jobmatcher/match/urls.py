@@ -1,8 +1,20 @@
 from django.urls import path
-from .views import JobDescriptionView, ResumeView, MatchView
+from .models import JobDescription, Match, Resume
+from .views import DocumentExportView, DocumentListView, ReadinessView, JobDescriptionView, ResumeView, IngestStatusView, MatchView, BatchMatchView, TopMatchesView
 
 urlpatterns = [
+    path('ready/', ReadinessView.as_view(), name='ready'),
     path('job-description/', JobDescriptionView.as_view(), name='job-description'),
+    path('job-description/<str:document_id>/status/', IngestStatusView.as_view(kind='job_description'), name='job-description-status'),
     path('resume/', ResumeView.as_view(), name='resume'),
+    path('resume/<str:document_id>/status/', IngestStatusView.as_view(kind='resume'), name='resume-status'),
     path('match/', MatchView.as_view(), name='match'),
+    path('match/batch/', BatchMatchView.as_view(), name='match-batch'),
+    path('match/top/', TopMatchesView.as_view(), name='match-top'),
+    path('job-descriptions/', DocumentListView.as_view(model=JobDescription), name='job-description-list'),
+    path('job-descriptions/export/', DocumentExportView.as_view(model=JobDescription, name='job_descriptions'), name='job-description-export'),
+    path('resumes/', DocumentListView.as_view(model=Resume), name='resume-list'),
+    path('resumes/export/', DocumentExportView.as_view(model=Resume, name='resumes'), name='resume-export'),
+    path('matches/', DocumentListView.as_view(model=Match), name='match-list'),
+    path('matches/export/', DocumentExportView.as_view(model=Match, name='matches'), name='match-export'),
 ]
@@ -1,29 +1,252 @@
 import fitz  # PyMuPDF for PDF file processing
+import hmac
+import json
+import re
 import textract
 from django.core.files.storage import FileSystemStorage
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser,JSONParser
+from rest_framework.permissions import IsAuthenticated
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
 from django.conf import settings
+from django.urls import reverse
+from utils.indexes import ensure_indexes
+from utils.timing import render_metrics
+from utils.vector_index import load_resume_index_in_background, peek_job_index, peek_resume_index
 from .serializers import JobDescriptionSerializer, ResumeSerializer, MatchSerializer
-from utils.utils import analyze_match, extract_skills, extract_education, extract_experience, extract_title, extract_text_from_file, extract_responsibilities
+from . import ingest
+from .documents import COLLECTIONS, build_document, content_hash, document_revision, upload_hash
+from .models import JobDescription, Match, Resume
+from utils.utils import SCORING_VERSION, embedding_cache, inference_stats, is_model_ready, analyze_match, analyze_match_batch, ensure_embeddings, ensure_embeddings_batch, extract_text_from_file, skill_match_batch
+from utils.pdf import DocumentError
+from utils.embedding_codec import decode_vector
 
 # Access MongoDB
 db = settings.MONGO_DB
 
 
+def build_match_data(job_desc_id, resume_id, job_desc, resume, match_score, matched_skills=None, missing_skills=None):
+    """
+    Build the match record stored in `matches` and returned to the client for one
+    (job description, resume) pair. Batch callers pass the skills comparison they already
+    computed with `skill_match_batch`.
+    """
+    # Skills comparison
+    if matched_skills is None:
+        job_skills = job_desc.get("required_skills", [])
+        resume_skills = resume.get("skills", [])
+        matched_skills = list(set(job_skills) & set(resume_skills))
+        missing_skills = list(set(job_skills) - set(resume_skills))
+
+    # Responsibilities comparison.
+    # Assuming responsibilities are stored as a comma-separated string.
+    job_resp_str = job_desc.get("responsibilities", "Not specified")
+    resume_resp_str = resume.get("responsibilities", "Not specified")
+    if job_resp_str != "Not specified":
+        job_resp_list = [x.strip().lower() for x in job_resp_str.split(",") if x.strip()]
+    else:
+        job_resp_list = []
+    if resume_resp_str != "Not specified":
+        resume_resp_list = [x.strip().lower() for x in resume_resp_str.split(",") if x.strip()]
+    else:
+        resume_resp_list = []
+    matched_responsibilities = list(set(job_resp_list) & set(resume_resp_list))
+    missing_responsibilities = list(set(job_resp_list) - set(resume_resp_list))
+
+    # Education comparison
+    job_education = job_desc.get("education", "Not specified")
+    resume_education = resume.get("education", "Not specified")
+    # Simple comparison: True if they match (ignoring case), otherwise False.
+    education_match = (job_education.lower() == resume_education.lower())
+
+    return {
+        "job_desc_id": job_desc_id,
+        "resume_id": resume_id,
+        "match_score": match_score,
+        "matched_skills": matched_skills,
+        "missing_skills": missing_skills,
+        "matched_responsibilities": matched_responsibilities,
+        "missing_responsibilities": missing_responsibilities,
+        "job_education": job_education,
+        "resume_education": resume_education,
+        "education_match": education_match,
+        "feedback": "Feedback will be generated based on missing skills, responsibilities, and education"
+    }
+
+
+class ReadinessView(APIView):
+    """
+    Report whether the embedding model is loaded (in this process or in the model server),
+    so load balancers only route traffic to workers that will not pay the model loading cost
+    on their first match.
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        model_loaded = is_model_ready()
+        return Response(
+            {
+                "ready": model_loaded,
+                "model_loaded": model_loaded,
+                "embedding_cache": embedding_cache.stats(),
+                "inference": inference_stats(),
+            },
+            status=status.HTTP_200_OK if model_loaded else status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
+def metrics(request):
+    """
+    Stage and request timing histograms in the Prometheus text format (METRICS_ENABLED).
+    Only for scrapers: with METRICS_TOKEN set the request must carry it as a bearer token,
+    otherwise it must come from this host.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}".encode("utf-8")
+        allowed = hmac.compare_digest(request.headers.get("Authorization", "").encode("utf-8"), expected)
+    else:
+        allowed = request.META.get("REMOTE_ADDR") in ("127.0.0.1", "::1")
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def async_requested(request):
+    """
+    Whether the client asked for asynchronous ingestion with ?async=true.
+    """
+    return request.query_params.get("async", "").lower() in ("1", "true")
+
+
+def read_upload(uploaded_file):
+    """
+    Check an uploaded file against the PDF limits and return its raw bytes for the ingest queue.
+    """
+    if not uploaded_file.name.endswith('.pdf'):
+        raise DocumentError("Unsupported file type")
+    if uploaded_file.size > settings.PDF_MAX_BYTES:
+        raise DocumentError(f"File is too large, the limit is {settings.PDF_MAX_BYTES} bytes", status_code=413)
+    return b"".join(uploaded_file.chunks())
+
+
+def accepted(request, kind, document_id):
+    """
+    202 response for a queued upload, pointing at its status endpoint.
+    """
+    document_id = str(document_id)
+    status_url = request.build_absolute_uri(reverse(f"{kind.replace('_', '-')}-status", args=[document_id]))
+    return Response({"_id": document_id, "status": "pending", "status_url": status_url}, status=status.HTTP_202_ACCEPTED)
+
+
+# Stored with every upload but only used internally (scoring, dedupe, stored match validity),
+# so upload and status responses leave them out
+INTERNAL_FIELDS = ("embeddings", "content_hash", "revision")
+INTERNAL_FIELDS_PROJECTION = {field: 0 for field in INTERNAL_FIELDS}
+
+
+def without_internal_fields(document):
+    for field in INTERNAL_FIELDS:
+        document.pop(field, None)
+    return document
+
+
+_dedupe_indexes_created = set()
+
+
+def find_duplicate(kind, upload_content_hash):
+    """
+    The stored document (without its internal fields) uploaded with the same content, if any.
+    """
+    collection = COLLECTIONS[kind]
+    if collection not in _dedupe_indexes_created:
+        # The unique index keeps two concurrent uploads of the same content from both being stored
+        ensure_indexes(db, [collection])
+        _dedupe_indexes_created.add(collection)
+    return db[collection].find_one({"content_hash": upload_content_hash}, INTERNAL_FIELDS_PROJECTION)
+
+
+def duplicate(request, kind, document):
+    """
+    200 response for an upload whose content is already stored: the existing document,
+    flagged as a dedupe hit. Documents still being ingested point at their status endpoint.
+    """
+    document_id = str(document["_id"])
+    document["_id"] = document_id
+    document["deduplicated"] = True
+    if document.get("status", "ready") != "ready":
+        document["status_url"] = request.build_absolute_uri(reverse(f"{kind.replace('_', '-')}-status", args=[document_id]))
+    return Response(document, status=status.HTTP_200_OK)
+
+
+def store_document(request, kind, document):
+    """
+    Insert a processed upload. Returns its id, or a dedupe response when the same content
+    was stored concurrently.
+    """
+    try:
+        return db[COLLECTIONS[kind]].insert_one(document).inserted_id, None
+    except DuplicateKeyError:
+        return None, duplicate(request, kind, find_duplicate(kind, document["content_hash"]))
+
+
+def submit_upload(request, kind, **upload):
+    """
+    Queue an upload for asynchronous ingestion, or return the dedupe response when the same
+    content is already stored or queued.
+    """
+    upload_content_hash = content_hash(upload.get("payload"), upload.get("text"))
+    existing = find_duplicate(kind, upload_content_hash)
+    if existing:
+        return duplicate(request, kind, existing)
+    try:
+        document_id = ingest.submit(kind, content_hash=upload_content_hash, **upload)
+    except DuplicateKeyError:
+        return duplicate(request, kind, find_duplicate(kind, upload_content_hash))
+    return accepted(request, kind, document_id)
+
+
 class JobDescriptionView(APIView):
     parser_classes = (MultiPartParser, FormParser, JSONParser)  # Add JSONParser to support JSON requests
 
     def post(self, request):
         job_desc_text = None
-        
-        if "file" in request.FILES:
+        job_desc_file = request.FILES.get("file")
+
+        if async_requested(request):
+            # Store the raw upload and let the ingest workers parse, extract and embed it
+            if job_desc_file:
+                try:
+                    payload = read_upload(job_desc_file)
+                except DocumentError as e:
+                    return Response({"error": str(e)}, status=e.status_code)
+                return submit_upload(request, "job_description", file_name=job_desc_file.name, payload=payload)
+            elif request.data.get("text"):
+                return submit_upload(request, "job_description", text=request.data["text"])
+            return Response({"error": "No job description provided (file or text)"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The same file or text was uploaded before: return it instead of processing it again
+        if job_desc_file:
+            upload_content_hash = upload_hash(job_desc_file)
+        elif request.data.get("text"):
+            upload_content_hash = content_hash(text=request.data["text"])
+        else:
+            upload_content_hash = None
+        existing = find_duplicate("job_description", upload_content_hash) if upload_content_hash else None
+        if existing:
+            return duplicate(request, "job_description", existing)
+
+        if job_desc_file:
             # If a file is uploaded, extract text from it
-            job_desc_file = request.FILES["file"]
-            job_desc_text = extract_text_from_file(job_desc_file)
+            try:
+                job_desc_text = extract_text_from_file(job_desc_file)
+            except DocumentError as e:
+                return Response({"error": str(e)}, status=e.status_code)
         elif "text" in request.data:
             # If text is provided in JSON, use it directly
             job_desc_text = request.data["text"]
@@ -31,28 +254,22 @@ class JobDescriptionView(APIView):
         if not job_desc_text:
             return Response({"error": "No job description provided (file or text)"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Extract structured data from the text
-        title = extract_title(job_desc_text)
-        required_skills = extract_skills(job_desc_text)
-        education = extract_education(job_desc_text)
-        responsibilities = extract_responsibilities(job_desc_text)
-        years_of_experience = extract_experience(job_desc_text)
+        # Extract structured data from the text in one pass and encode it once, so matches
+        # against this job reuse the stored vectors
+        job_data = build_document("job_description", job_desc_text, job_desc_file.name if job_desc_file else None)
+        job_data["content_hash"] = upload_content_hash
 
         # Save to MongoDB
-        job_data = {
-            "title": title,
-            "description": job_desc_text,
-            "required_skills": required_skills,
-            "education": education,
-            "responsibilities": responsibilities,
-            "years_of_experience": years_of_experience
-        }
-
-        if "file" in request.FILES:
-            job_data["file"] = job_desc_file.name  # Save file name if uploaded
-
-        job_id = db.job_descriptions.insert_one(job_data).inserted_id
+        job_id, response = store_document(request, "job_description", job_data)
+        if response:
+            return response
         job_data["_id"] = str(job_id)  # Convert ObjectId to string
+        # Keep the index of this process current if it is loaded; loading it is left to the searches
+        job_index = peek_job_index()
+        if job_index is not None:
+            job_index.add(job_data["_id"], job_data["embeddings"], job_data["required_skills"])
+        without_internal_fields(job_data)
+        job_data["deduplicated"] = False
 
         return Response(job_data, status=status.HTTP_201_CREATED)
     
@@ -63,103 +280,410 @@ class ResumeView(APIView):
         resume_file = request.FILES.get('file', None)
         resume_text = request.data.get('resume_text', '').strip()  # Get text from request body
 
+        if async_requested(request):
+            # Store the raw upload and let the ingest workers parse, extract and embed it
+            if resume_file:
+                try:
+                    payload = read_upload(resume_file)
+                except DocumentError as e:
+                    return Response({"error": str(e)}, status=e.status_code)
+                return submit_upload(request, "resume", file_name=resume_file.name, payload=payload)
+            elif resume_text:
+                return submit_upload(request, "resume", text=resume_text)
+            return Response({"error": "No file uploaded or text provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The same file or text was uploaded before: return it instead of processing it again
+        if resume_file or resume_text:
+            upload_content_hash = upload_hash(resume_file) if resume_file else content_hash(text=resume_text)
+            existing = find_duplicate("resume", upload_content_hash)
+            if existing:
+                return duplicate(request, "resume", existing)
+
         if resume_file:
             # Extract text from the uploaded file
-            resume_text = extract_text_from_file(resume_file)
+            try:
+                resume_text = extract_text_from_file(resume_file)
+            except DocumentError as e:
+                return Response({"error": str(e)}, status=e.status_code)
         elif not resume_text:
             return Response({"error": "No file uploaded or text provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Automatically extract information from the text
-        skills = extract_skills(resume_text)
-        education = extract_education(resume_text)
-        responsibilities = extract_responsibilities(resume_text)
-        experience = extract_experience(resume_text)
-
-        # Build the resume data dictionary
-        resume_data = {
-            "skills": skills,
-            "education": education,
-            "responsibilities": responsibilities,
-            "experience": experience,
-            "file": resume_file.name if resume_file else None,  # Store filename if file was uploaded
-            "text": resume_text if not resume_file else None  # Store text if no file was uploaded
-        }
+        # Automatically extract information from the text in one pass and encode it once
+        resume_data = build_document("resume", resume_text, resume_file.name if resume_file else None)
+        resume_data["content_hash"] = upload_content_hash
 
         # Save the resume data to MongoDB
-        resume_id = db.resumes.insert_one(resume_data).inserted_id
+        resume_id, response = store_document(request, "resume", resume_data)
+        if response:
+            return response
         resume_data["_id"] = str(resume_id)  # Convert ObjectId to string for response
+        # Keep the index of this process current if it is loaded; loading it is left to the searches
+        resume_index = peek_resume_index()
+        if resume_index is not None:
+            resume_index.add(resume_data["_id"], resume_data["embeddings"], resume_data["skills"])
+        without_internal_fields(resume_data)
+        resume_data["deduplicated"] = False
 
         return Response(resume_data, status=status.HTTP_201_CREATED)
 
 
+class IngestStatusView(APIView):
+    """
+    Status of a job description or resume uploaded with ?async=true:
+    pending -> parsing -> extracting -> embedding -> ready, or failed with an error.
+    Once ready, the response also holds the extracted fields.
+    """
+    kind = None
+
+    def get(self, request, document_id):
+        try:
+            document = db[COLLECTIONS[self.kind]].find_one({"_id": ObjectId(document_id)}, INTERNAL_FIELDS_PROJECTION)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not document:
+            return Response({"error": "Document not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        document["_id"] = str(document["_id"])
+        document.setdefault("status", "ready")  # Documents uploaded synchronously are ready right away
+        return Response(document, status=status.HTTP_200_OK)
+
+
+def revision_of(kind, document):
+    """
+    The stored revision of a document. Documents created before revisions existed get
+    theirs computed now and saved, so later matches can use the stored result.
+    """
+    revision = document.get("revision")
+    if revision is None:
+        revision = document_revision(kind, document)
+        db[COLLECTIONS[kind]].update_one({"_id": document["_id"]}, {"$set": {"revision": revision}})
+    return revision
+
+
+def with_match_key(match_data, job_desc, resume):
+    """
+    Add the fields that identify a stored match result: the scoring version and the
+    revisions of both documents it was computed from.
+    """
+    match_data["scoring_version"] = SCORING_VERSION
+    match_data["job_revision"] = revision_of("job_description", job_desc)
+    match_data["resume_revision"] = revision_of("resume", resume)
+    return match_data
+
+
 class MatchView(APIView):
+    """
+    Score a job description against a resume. The result is stored once per pair and scoring
+    version and returned as is while neither document changes; `?refresh=true` recomputes it.
+    """
+
     def post(self, request):
         job_desc_id = request.data.get('job_desc_id')
         resume_id = request.data.get('resume_id')
+        refresh = request.query_params.get("refresh", "false").lower() == "true"
 
         try:
-            job_desc = db.job_descriptions.find_one({"_id": ObjectId(job_desc_id)})
-            resume = db.resumes.find_one({"_id": ObjectId(resume_id)})
+            job_desc_id, resume_id = str(ObjectId(job_desc_id)), str(ObjectId(resume_id))
+            # Only what is needed to decide whether the stored result is still valid
+            job_desc = db.job_descriptions.find_one({"_id": ObjectId(job_desc_id)}, {"status": 1, "revision": 1})
+            resume = db.resumes.find_one({"_id": ObjectId(resume_id)}, {"status": 1, "revision": 1})
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         if not job_desc or not resume:
             return Response({"error": "Invalid job description or resume ID"}, status=status.HTTP_404_NOT_FOUND)
+        if job_desc.get("status", "ready") != "ready" or resume.get("status", "ready") != "ready":
+            return Response({"error": "Document is still being processed"}, status=status.HTTP_409_CONFLICT)
+
+        if not refresh and job_desc.get("revision") and resume.get("revision"):
+            match_data = Match.get(job_desc_id, resume_id, SCORING_VERSION)
+            if (
+                match_data
+                and match_data.get("job_revision") == job_desc["revision"]
+                and match_data.get("resume_revision") == resume["revision"]
+            ):
+                match_data["_id"] = str(match_data["_id"])
+                match_data["cached"] = True
+                return Response(match_data, status=status.HTTP_200_OK)
+
+        job_desc = db.job_descriptions.find_one({"_id": job_desc["_id"]})
+        resume = db.resumes.find_one({"_id": resume["_id"]})
+
+        # Use the embeddings stored at ingest; documents created before they existed
+        # (or with an older model version) are re-encoded once and updated in place.
+        job_embeddings, job_refreshed = ensure_embeddings(job_desc, "description")
+        if job_refreshed:
+            db.job_descriptions.update_one({"_id": job_desc["_id"]}, {"$set": {"embeddings": job_embeddings}})
+        resume_embeddings, resume_refreshed = ensure_embeddings(resume, "experience")
+        if resume_refreshed:
+            db.resumes.update_one({"_id": resume["_id"]}, {"$set": {"embeddings": resume_embeddings}})
 
         # Call analyze_match with responsibilities as additional parameters.
-        # The analyze_match function should be updated to accept 6 parameters.
         match_score = analyze_match(
             job_desc.get("description", ""),
             resume.get("experience", ""),
             job_desc.get("required_skills", []),
             resume.get("skills", []),
             job_desc.get("responsibilities", ""),
-            resume.get("responsibilities", "")
+            resume.get("responsibilities", ""),
+            job_embeddings=job_embeddings,
+            resume_embeddings=resume_embeddings
         )
         match_score = float(match_score)  # Ensure native float
 
-        # Skills comparison
-        job_skills = job_desc.get("required_skills", [])
-        resume_skills = resume.get("skills", [])
-        matched_skills = list(set(job_skills) & set(resume_skills))
-        missing_skills = list(set(job_skills) - set(resume_skills))
+        # Create match record including extra details.
+        match_data = build_match_data(job_desc_id, resume_id, job_desc, resume, match_score)
+        match_data = with_match_key(match_data, job_desc, resume)
+        match_data["_id"] = str(Match.upsert(match_data))
+        match_data["cached"] = False
 
-        # Responsibilities comparison.
-        # Assuming responsibilities are stored as a comma-separated string.
-        job_resp_str = job_desc.get("responsibilities", "Not specified")
-        resume_resp_str = resume.get("responsibilities", "Not specified")
-        if job_resp_str != "Not specified":
-            job_resp_list = [x.strip().lower() for x in job_resp_str.split(",") if x.strip()]
-        else:
-            job_resp_list = []
-        if resume_resp_str != "Not specified":
-            resume_resp_list = [x.strip().lower() for x in resume_resp_str.split(",") if x.strip()]
-        else:
-            resume_resp_list = []
-        matched_responsibilities = list(set(job_resp_list) & set(resume_resp_list))
-        missing_responsibilities = list(set(job_resp_list) - set(resume_resp_list))
+        return Response(match_data, status=status.HTTP_200_OK)
 
-        # Education comparison
-        job_education = job_desc.get("education", "Not specified")
-        resume_education = resume.get("education", "Not specified")
-        # Simple comparison: True if they match (ignoring case), otherwise False.
-        education_match = (job_education.lower() == resume_education.lower())
 
-        # Create match record including extra details.
-        match_data = {
-            "job_desc_id": job_desc_id,
-            "resume_id": resume_id,
-            "match_score": match_score,
-            "matched_skills": matched_skills,
-            "missing_skills": missing_skills,
-            "matched_responsibilities": matched_responsibilities,
-            "missing_responsibilities": missing_responsibilities,
-            "job_education": job_education,
-            "resume_education": resume_education,
-            "education_match": education_match,
-            "feedback": "Feedback will be generated based on missing skills, responsibilities, and education"
-        }
-        match_id = db.matches.insert_one(match_data).inserted_id
-        match_data["_id"] = str(match_id)
+class BatchMatchView(APIView):
+    """
+    Score one job description against many resumes in a single call.
+    Resumes are selected either by `resume_ids` or by a `filter` on their extracted fields,
+    and the response is the list of match records ranked by score.
+    """
+    # Fields of a resume that the `filter` option may select on
+    FILTER_FIELDS = ("skills", "education", "experience", "responsibilities")
 
-        return Response(match_data, status=status.HTTP_200_OK)
+    def post(self, request):
+        job_desc_id = request.data.get('job_desc_id')
+        resume_ids = request.data.get('resume_ids')
+        resume_filter = request.data.get('filter')
+
+        if resume_ids is None and resume_filter is None:
+            return Response({"error": "Provide resume_ids or a filter"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            job_desc = db.job_descriptions.find_one({"_id": ObjectId(job_desc_id)})
+            if resume_ids is not None:
+                if not isinstance(resume_ids, list):
+                    raise ValueError("resume_ids must be a list")
+                query = {"_id": {"$in": [ObjectId(resume_id) for resume_id in resume_ids]}}
+            else:
+                query = self.build_filter(resume_filter)
+            # Skip uploads that are still being processed
+            query["status"] = {"$in": [None, "ready"]}
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not job_desc:
+            return Response({"error": "Invalid job description ID"}, status=status.HTTP_404_NOT_FOUND)
+        if job_desc.get("status", "ready") != "ready":
+            return Response({"error": "Job description is still being processed"}, status=status.HTTP_409_CONFLICT)
+
+        # One round trip for all resumes
+        resumes = list(db.resumes.find(query).limit(settings.BATCH_MATCH_MAX_RESUMES + 1))
+        if len(resumes) > settings.BATCH_MATCH_MAX_RESUMES:
+            return Response(
+                {"error": f"Too many resumes, at most {settings.BATCH_MATCH_MAX_RESUMES} can be matched per call"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not resumes:
+            return Response({"error": "No resumes found"}, status=status.HTTP_404_NOT_FOUND)
+
+        # Encode whatever is missing or stale in batched calls and persist it
+        job_embeddings, job_refreshed = ensure_embeddings(job_desc, "description")
+        if job_refreshed:
+            db.job_descriptions.update_one({"_id": job_desc["_id"]}, {"$set": {"embeddings": job_embeddings}})
+        resume_embeddings, refreshed = ensure_embeddings_batch(resumes, "experience")
+        if refreshed:
+            db.resumes.bulk_write(
+                [UpdateOne({"_id": resumes[i]["_id"]}, {"$set": {"embeddings": resume_embeddings[i]}}) for i in refreshed],
+                ordered=False
+            )
+
+        # All scores in one pass, with the matched and missing skills from one sparse product
+        resume_skills = [resume.get("skills", []) for resume in resumes]
+        skill_match = skill_match_batch(job_desc.get("required_skills", []), resume_skills, masks=True)
+        scores = analyze_match_batch(
+            job_embeddings,
+            job_desc.get("required_skills", []),
+            job_desc.get("responsibilities", ""),
+            resume_embeddings,
+            resume_skills,
+            [resume.get("responsibilities", "") for resume in resumes],
+            skill_match=skill_match
+        )
+
+        job_desc_id = str(job_desc["_id"])
+        results = [
+            with_match_key(
+                build_match_data(
+                    job_desc_id, str(resume["_id"]), job_desc, resume, float(score),
+                    matched_skills=skill_match.matched_skills(i), missing_skills=skill_match.missing_skills(i)
+                ),
+                job_desc, resume
+            )
+            for i, (resume, score) in enumerate(zip(resumes, scores))
+        ]
+        results.sort(key=lambda match: match["match_score"], reverse=True)
+
+        # Replace the stored results of these pairs rather than adding new records on every call
+        match_ids = Match.upsert_many(results)
+        for match_data, match_id in zip(results, match_ids):
+            match_data["_id"] = str(match_id)
+
+        return Response({"job_desc_id": job_desc_id, "results": results}, status=status.HTTP_200_OK)
+
+    def build_filter(self, resume_filter):
+        """
+        Turn the client filter into a Mongo query. Only equality on the extracted resume fields
+        is allowed; a list value matches any of its items.
+        """
+        if not isinstance(resume_filter, dict):
+            raise ValueError("filter must be an object")
+        query = {}
+        for field, value in resume_filter.items():
+            if field not in self.FILTER_FIELDS:
+                raise ValueError(f"Cannot filter on '{field}'")
+            if isinstance(value, list) and all(isinstance(item, str) for item in value):
+                query[field] = {"$in": value}
+            elif isinstance(value, str):
+                query[field] = value
+            else:
+                raise ValueError(f"Invalid value for '{field}'")
+        return query
+
+
+class TopMatchesView(APIView):
+    """
+    Rank every indexed resume against a job description and return the best `k`.
+    Scores are the full match score, computed from the in-memory resume index with one
+    matrix-vector product for the embeddings and one sparse product for the skills.
+    """
+    def get(self, request):
+        job_desc_id = request.query_params.get('job_desc_id')
+
+        try:
+            k = int(request.query_params.get('k', 10))
+            job_desc = db.job_descriptions.find_one({"_id": ObjectId(job_desc_id)})
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not job_desc:
+            return Response({"error": "Invalid job description ID"}, status=status.HTTP_404_NOT_FOUND)
+        if job_desc.get("status", "ready") != "ready":
+            return Response({"error": "Job description is still being processed"}, status=status.HTTP_409_CONFLICT)
+        if not 1 <= k <= settings.TOP_K_MAX:
+            return Response({"error": f"k must be between 1 and {settings.TOP_K_MAX}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The resume matrix is never loaded inside a request: the first one starts loading it and
+        # is asked to retry (VECTOR_INDEX_LOAD_ON_STARTUP loads it before any request)
+        resume_index = peek_resume_index()
+        if resume_index is None:
+            load_resume_index_in_background()
+            response = Response(
+                {"error": "Resume matching is being prepared, please try again shortly"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            response["Retry-After"] = "5"
+            return response
+
+        job_embeddings, job_refreshed = ensure_embeddings(job_desc, "description")
+        if job_refreshed:
+            db.job_descriptions.update_one({"_id": job_desc["_id"]}, {"$set": {"embeddings": job_embeddings}})
+
+        results = [
+            {"resume_id": resume_id, "score": score}
+            for resume_id, score in resume_index.search(job_embeddings, k, skills=job_desc.get("required_skills", []))
+        ]
+        return Response({"job_desc_id": str(job_desc["_id"]), "results": results}, status=status.HTTP_200_OK)
+
+
+# Field names accepted by the `fields` option of the list and export endpoints
+FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*$")
+
+
+def requested_fields(request):
+    """
+    Parse `?fields=a,b` into a list of field names, or None when the option is absent.
+    """
+    fields = [field.strip() for field in request.query_params.get("fields", "").split(",") if field.strip()]
+    for field in fields:
+        if not FIELD_NAME.match(field):
+            raise ValueError(f"Invalid field name '{field}'")
+    return fields or None
+
+
+def readable_embeddings(document):
+    """
+    Replace the binary stored vectors of a document, when they were requested, by lists of floats.
+    """
+    embeddings = document.get("embeddings")
+    if isinstance(embeddings, dict):
+        for key in ("text", "responsibilities"):
+            if embeddings.get(key) is not None:
+                embeddings[key] = decode_vector(embeddings[key]).tolist()
+    return document
+
+
+def ndjson_chunks(documents, chunk_bytes=64 * 1024):
+    """
+    Serialize documents as newline-delimited JSON, yielding chunks of about `chunk_bytes`.
+    """
+    lines, size = [], 0
+    for document in documents:
+        document["_id"] = str(document["_id"])
+        readable_embeddings(document)
+        line = json.dumps(document, default=str) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield "".join(lines)
+            lines, size = [], 0
+    if lines:
+        yield "".join(lines)
+
+
+class DocumentListView(APIView):
+    """
+    Page through job descriptions, resumes or matches in _id order.
+    `?after=<next from the previous page>&limit=<n>&fields=a,b`; `next` is null on the last page.
+    """
+    # Whole stored documents, so only for authenticated users (MongoJWTAuthentication)
+    permission_classes = [IsAuthenticated]
+    model = None
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", settings.LIST_PAGE_SIZE))
+            fields = requested_fields(request)
+            if not 1 <= limit <= settings.LIST_PAGE_SIZE_MAX:
+                raise ValueError(f"limit must be between 1 and {settings.LIST_PAGE_SIZE_MAX}")
+            documents, next_after = self.model.get_page(request.query_params.get("after"), limit, fields)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        for document in documents:
+            document["_id"] = str(document["_id"])
+            readable_embeddings(document)
+        return Response(
+            {"results": documents, "next": str(next_after) if next_after else None},
+            status=status.HTTP_200_OK
+        )
+
+
+class DocumentExportView(APIView):
+    """
+    Stream a whole collection as NDJSON (one document per line) straight from the Mongo cursor,
+    so memory use does not grow with the collection. Accepts the same `fields` option as the list.
+    """
+    permission_classes = [IsAuthenticated]
+    model = None
+    name = None
+
+    def get(self, request):
+        try:
+            fields = requested_fields(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        documents = self.model.iter_all(fields, settings.EXPORT_BATCH_SIZE)
+        response = StreamingHttpResponse(ndjson_chunks(documents), content_type="application/x-ndjson")
+        response["Content-Disposition"] = f'attachment; filename="{self.name}.ndjson"'
+        return response
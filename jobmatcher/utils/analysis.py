@@ -0,0 +1,75 @@
+import re
+
+from utils.taxonomy import tokenize
+from utils.utils import (
+    extract_education,
+    extract_experience,
+    extract_responsibilities,
+    extract_skills,
+    extract_title,
+)
+
+# A line that only holds a section heading, e.g. "Work Experience" or "SKILLS:"
+SECTION_HEADING_PATTERN = re.compile(
+    r"^[ \t]*(?P<heading>(?:work |professional )?experience|employment history|education|"
+    r"(?:technical |core )?skills)[ \t]*:?[ \t]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+SECTION_NAMES = {
+    "experience": "experience",
+    "work experience": "experience",
+    "professional experience": "experience",
+    "employment history": "experience",
+    "education": "education",
+    "skills": "skills",
+    "technical skills": "skills",
+    "core skills": "skills",
+}
+
+
+class DocumentAnalysis:
+    """
+    Run every extractor over a resume or job description in one stage.
+
+    The text is lowercased and tokenized once and the results are shared by all extractors,
+    instead of each `extract_*` function re-scanning and re-lowercasing the whole document.
+    With `detect_sections=True`, the character spans of the Experience, Education and Skills
+    sections are also recorded in `sections`.
+    """
+
+    def __init__(self, text, detect_sections=False):
+        self.text = text or ""
+        self.lowered = self.text.lower()
+        self.tokens = tokenize(self.text)
+
+        self.title = extract_title(self.text, lowered=self.lowered)
+        self.skills = extract_skills(self.text, tokens=self.tokens)
+        self.education = extract_education(self.text, lowered=self.lowered)
+        self.responsibilities = extract_responsibilities(self.text, tokens=self.tokens)
+        self.experience = extract_experience(self.text, lowered=self.lowered)
+        self.sections = self.detect_sections() if detect_sections else {}
+
+    def detect_sections(self):
+        """
+        Return {section name: (start, end)} for the known section headings in the text.
+        A section runs from its heading to the next heading or the end of the text.
+        """
+        headings = [
+            (SECTION_NAMES[" ".join(match.group("heading").lower().split())], match.start())
+            for match in SECTION_HEADING_PATTERN.finditer(self.text)
+        ]
+        sections = {}
+        for i, (name, start) in enumerate(headings):
+            end = headings[i + 1][1] if i + 1 < len(headings) else len(self.text)
+            sections.setdefault(name, (start, end))
+        return sections
+
+    def section_text(self, name):
+        """
+        Text of a detected section, or an empty string if it was not found.
+        """
+        if name not in self.sections:
+            return ""
+        start, end = self.sections[name]
+        return self.text[start:end]
@@ -0,0 +1,70 @@
+import importlib.util
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def load_torch(model_name, options):
+    """
+    The reference backend: full-precision PyTorch.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name)
+
+
+def load_torch_int8(model_name, options):
+    """
+    PyTorch with the Linear layers dynamically quantized to int8 (CPU only).
+    Weights are about 4x smaller and the matrix multiplications use int8 kernels.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def load_onnx(model_name, options):
+    """
+    ONNX Runtime through sentence-transformers' onnx backend. `onnx_file` selects an exported
+    variant, e.g. "onnx/model_qint8_avx512_vnni.onnx" for the int8 quantized graph.
+    """
+    for module in ("optimum", "onnxruntime"):
+        if importlib.util.find_spec(module) is None:
+            raise ImproperlyConfigured(
+                "EMBEDDING_BACKEND='onnx' needs the optional ONNX dependencies: pip install 'optimum[onnxruntime]'"
+            )
+    from sentence_transformers import SentenceTransformer
+
+    model_kwargs = {"file_name": options["onnx_file"]} if options.get("onnx_file") else {}
+    return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+
+# EMBEDDING_BACKEND values and how to load them. Every loader returns an object with the
+# SentenceTransformer `encode(texts, batch_size=...)` interface.
+BACKENDS = {
+    "torch": load_torch,
+    "torch-int8": load_torch_int8,
+    "onnx": load_onnx,
+}
+
+
+def load_model(backend, model_name, **options):
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(
+            f"Unknown EMBEDDING_BACKEND '{backend}', expected one of: {', '.join(BACKENDS)}"
+        )
+    return BACKENDS[backend](model_name, options)
+
+
+def version_tag(backend, options):
+    """
+    Suffix for EMBEDDING_MODEL_VERSION. Backends produce slightly different vectors, so vectors
+    stored by one backend are re-encoded rather than mixed with those of another. The reference
+    torch backend has no suffix, keeping the vectors already stored valid.
+    """
+    if backend == "torch":
+        return ""
+    if backend == "onnx" and options.get("onnx_file"):
+        return f":onnx:{options['onnx_file']}"
+    return f":{backend}"
@@ -0,0 +1,91 @@
+"""
+Compact storage of embedding vectors as BSON binary data instead of arrays of doubles.
+
+A stored vector is a small header followed by the little-endian values:
+
+    b"EV" | format version (1 byte) | dtype code (1 byte) | [int8 only: scale, float32] | values
+
+"float16" halves the precision of MiniLM vectors at 2 bytes per value; "int8" stores
+round(v / scale) with scale = max(|v|) / 127 at 1 byte per value. Both decode with
+np.frombuffer, without building one Python float per value. Vectors stored as arrays
+before (or with EMBEDDING_STORAGE_DTYPE=array) are still read.
+"""
+import struct
+
+import numpy as np
+from bson.binary import Binary
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+MAGIC = b"EV"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<2sBB")
+SCALE = struct.Struct("<f")
+
+FLOAT16 = 1
+INT8 = 2
+DTYPES = {"float16": FLOAT16, "int8": INT8}
+
+
+def storage_dtype():
+    """
+    The configured storage format: "float16", "int8" or "array" (a plain list of floats).
+    """
+    dtype = settings.EMBEDDING_STORAGE_DTYPE
+    if dtype != "array" and dtype not in DTYPES:
+        raise ImproperlyConfigured(
+            f"Unknown EMBEDDING_STORAGE_DTYPE '{dtype}', expected one of: array, {', '.join(DTYPES)}"
+        )
+    return dtype
+
+
+def encode_vector(vector, dtype=None):
+    """
+    Turn a vector into its stored form, in `dtype` or the configured storage format.
+    """
+    dtype = dtype or storage_dtype()
+    vector = np.asarray(vector, dtype=np.float32)
+    if dtype == "array":
+        return vector.tolist()
+    if dtype == "float16":
+        return Binary(HEADER.pack(MAGIC, FORMAT_VERSION, FLOAT16) + vector.astype("<f2").tobytes())
+    if dtype == "int8":
+        peak = float(np.max(np.abs(vector))) if vector.size else 0.0
+        scale = peak / 127 if peak else 1.0
+        values = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+        return Binary(HEADER.pack(MAGIC, FORMAT_VERSION, INT8) + SCALE.pack(scale) + values.tobytes())
+    raise ImproperlyConfigured(f"Unknown embedding storage dtype '{dtype}'")
+
+
+def stored_dtype(value):
+    """
+    The storage format of a stored vector, as accepted by `encode_vector`.
+    """
+    if not isinstance(value, (bytes, bytearray, memoryview)):
+        return "array"
+    return {FLOAT16: "float16", INT8: "int8"}.get(_header(value))
+
+
+def _header(value):
+    if len(value) < HEADER.size:
+        raise ValueError("Stored embedding is too short")
+    magic, version, code = HEADER.unpack_from(value)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported stored embedding (format {magic!r} version {version})")
+    return code
+
+
+def decode_vector(value):
+    """
+    A stored vector as a NumPy array. float16 data is returned as a read-only view of the
+    stored bytes (no copy); int8 data is scaled back to float32.
+    """
+    if not isinstance(value, (bytes, bytearray, memoryview)):
+        return np.asarray(value, dtype=np.float32)
+    code = _header(value)
+    if code == FLOAT16:
+        return np.frombuffer(value, dtype="<f2", offset=HEADER.size)
+    if code == INT8:
+        (scale,) = SCALE.unpack_from(value, HEADER.size)
+        return np.frombuffer(value, dtype=np.int8, offset=HEADER.size + SCALE.size) * np.float32(scale)
+    raise ValueError(f"Unknown stored embedding dtype code {code}")
@@ -0,0 +1,64 @@
+from pymongo import ASCENDING, IndexModel
+
+# Every index the code relies on, per collection. `manage.py ensure_indexes` (or
+# MONGO_ENSURE_INDEXES_ON_STARTUP) creates them; creating an existing index is a no-op.
+INDEXES = {
+    "users": [
+        # Login and registration look users up by email
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "matches": [
+        # Stored match result of a pair; records written before results were keyed have no
+        # scoring_version and are left out
+        IndexModel(
+            [("job_desc_id", ASCENDING), ("resume_id", ASCENDING), ("scoring_version", ASCENDING)],
+            name="match_key",
+            unique=True,
+            partialFilterExpression={"scoring_version": {"$exists": True}},
+        ),
+        IndexModel([("resume_id", ASCENDING)], name="resume_id"),
+    ],
+    # Uploads are deduplicated on their content hash; documents stored before it existed have none
+    "job_descriptions": [
+        IndexModel(
+            [("content_hash", ASCENDING)],
+            name="content_hash_unique",
+            unique=True,
+            partialFilterExpression={"content_hash": {"$exists": True}},
+        ),
+    ],
+    "resumes": [
+        IndexModel(
+            [("content_hash", ASCENDING)],
+            name="content_hash_unique",
+            unique=True,
+            partialFilterExpression={"content_hash": {"$exists": True}},
+        ),
+    ],
+    "ingest_tasks": [
+        # claim_task takes the oldest pending (or expired running) task
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+    ],
+}
+
+# Indexes created by earlier versions that nothing relies on any more, dropped by ensure_indexes
+OBSOLETE_INDEXES = {
+    # Lookups by job description always include the scoring version and use the match_key prefix
+    "matches": ["job_desc_id"],
+}
+
+
+def ensure_indexes(db, collections=None):
+    """
+    Create the declared indexes of `collections` (all of them by default) and drop their
+    obsolete ones. Returns {collection: [index names]}.
+    """
+    created = {}
+    for name, indexes in INDEXES.items():
+        if collections is None or name in collections:
+            created[name] = db[name].create_indexes(indexes)
+            existing = db[name].index_information()
+            for index_name in OBSOLETE_INDEXES.get(name, []):
+                if index_name in existing:
+                    db[name].drop_index(index_name)
+    return created
@@ -0,0 +1,110 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class BatchingScheduler:
+    """
+    Dynamic micro-batching in front of a batch encode function.
+
+    Request threads enqueue their texts and wait on a future. A single scheduler thread takes
+    the oldest request, keeps collecting requests until `max_batch_size` texts are queued or
+    `max_wait` seconds have passed, runs one batched forward pass and resolves every future.
+    This keeps batch sizes up under concurrent load and stops request threads from competing
+    for torch's intra-op threads. Requests that already hold a full batch bypass the queue.
+    """
+
+    def __init__(self, encode, max_batch_size, max_wait, max_queue_depth):
+        self.encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        # Callers block when this many requests are waiting, which pushes back on the web workers
+        self._queue = queue.Queue(maxsize=max_queue_depth)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "texts": 0,
+            "batches": 0,
+            "queue_seconds_total": 0.0,
+            "queue_seconds_max": 0.0,
+            "compute_seconds_total": 0.0,
+        }
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts):
+        """
+        Queue texts for encoding and return a Future resolving to their (len(texts), dim) array.
+        """
+        future = Future()
+        if len(texts) >= self.max_batch_size:
+            try:
+                future.set_result(self._timed_encode(list(texts), queued_at=None, requests=1))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self._queue.put((list(texts), future, time.perf_counter()))
+        return future
+
+    def encode_texts(self, texts):
+        return self.submit(texts).result()
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            size = len(pending[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            texts = [text for item_texts, _, _ in pending for text in item_texts]
+            try:
+                vectors = self._timed_encode(texts, queued_at=[queued_at for _, _, queued_at in pending], requests=len(pending))
+            except Exception as e:
+                for _, future, _ in pending:
+                    future.set_exception(e)
+                continue
+
+            position = 0
+            for item_texts, future, _ in pending:
+                future.set_result(vectors[position:position + len(item_texts)])
+                position += len(item_texts)
+
+    def _timed_encode(self, texts, queued_at, requests):
+        started = time.perf_counter()
+        vectors = np.asarray(self.encode(texts, batch_size=self.max_batch_size), dtype=np.float32)
+        finished = time.perf_counter()
+
+        with self._stats_lock:
+            stats = self._stats
+            stats["requests"] += requests
+            stats["texts"] += len(texts)
+            stats["batches"] += 1
+            stats["compute_seconds_total"] += finished - started
+            for enqueued in queued_at or ():
+                waited = started - enqueued
+                stats["queue_seconds_total"] += waited
+                stats["queue_seconds_max"] = max(stats["queue_seconds_max"], waited)
+        return vectors
+
+    def stats(self):
+        """
+        Counters for monitoring: how long requests wait in the queue versus how long the
+        forward passes take, and how full the batches are.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["average_batch_size"] = stats["texts"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
@@ -0,0 +1,237 @@
+"""
+Local inference sidecar: one process owns the embedding model and serves encode requests
+to the web workers over a Unix domain socket, so N workers do not each hold torch and MiniLM.
+
+Wire format (all integers little-endian):
+
+    request   = magic "CKEM" | op: u8 | body length: u32 | body
+      op 1 ENCODE body = count: u32 | count x (length: u32 | utf-8 text)
+      op 2 PING   body = empty
+      op 3 WARM   body = empty (load the model if needed and run a warm-up batch)
+    response  = status: u8 (0 ok, 1 error) | body length: u32 | body
+      ENCODE ok body = version length: u32 | utf-8 model version | rows: u32 | dim: u32 | rows x dim float32
+      PING   ok body = model loaded: u8 | utf-8 model version
+      WARM   ok body = seconds taken: f64
+      error     body = utf-8 message
+
+Vectors travel as raw float32 buffers and are decoded with `np.frombuffer`, not as JSON.
+They come with the model version of the server, which is what they are stored with: the
+server may run another model (or backend) than the settings of the web workers name.
+"""
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+import numpy as np
+
+MAGIC = b"CKEM"
+OP_ENCODE = 1
+OP_PING = 2
+OP_WARM = 3
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+REQUEST_HEADER = struct.Struct("<4sBI")
+RESPONSE_HEADER = struct.Struct("<BI")
+COUNT = struct.Struct("<I")
+SHAPE = struct.Struct("<II")
+SECONDS = struct.Struct("<d")
+
+# Refuse frames larger than this, so a bad peer cannot make us allocate arbitrary memory
+MAX_BODY_BYTES = 256 * 1024 * 1024
+
+
+class ModelServerError(RuntimeError):
+    pass
+
+
+def _recv_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if not count:
+            raise ConnectionError("Connection closed by peer")
+        received += count
+    return buffer
+
+
+def encode_texts_body(texts):
+    parts = [COUNT.pack(len(texts))]
+    for text in texts:
+        data = text.encode("utf-8")
+        parts.append(COUNT.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def decode_texts_body(body):
+    view = memoryview(body)
+    (count,) = COUNT.unpack_from(view, 0)
+    offset = COUNT.size
+    texts = []
+    for _ in range(count):
+        (length,) = COUNT.unpack_from(view, offset)
+        offset += COUNT.size
+        texts.append(bytes(view[offset:offset + length]).decode("utf-8"))
+        offset += length
+    return texts
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # One connection serves many requests; it ends when the client disconnects
+        while True:
+            try:
+                magic, op, length = REQUEST_HEADER.unpack(_recv_exact(self.request, REQUEST_HEADER.size))
+            except ConnectionError:
+                return
+            if magic != MAGIC or length > MAX_BODY_BYTES:
+                self._send(STATUS_ERROR, b"Bad request header")
+                return
+            body = _recv_exact(self.request, length)
+            try:
+                if op == OP_ENCODE:
+                    vectors = np.ascontiguousarray(self.server.encode(decode_texts_body(body)), dtype="<f4")
+                    version = self.server.model_version.encode("utf-8")
+                    self._send(STATUS_OK, COUNT.pack(len(version)) + version + SHAPE.pack(*vectors.shape) + vectors.tobytes())
+                elif op == OP_PING:
+                    self._send(STATUS_OK, bytes([self.server.is_loaded()]) + self.server.model_version.encode("utf-8"))
+                elif op == OP_WARM:
+                    started = time.perf_counter()
+                    self.server.warm_up()
+                    self._send(STATUS_OK, SECONDS.pack(time.perf_counter() - started))
+                else:
+                    self._send(STATUS_ERROR, f"Unknown op {op}".encode("utf-8"))
+            except Exception as e:
+                self._send(STATUS_ERROR, str(e).encode("utf-8"))
+
+    def _send(self, status, body):
+        self.request.sendall(RESPONSE_HEADER.pack(status, len(body)) + body)
+
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serve `encode(texts) -> (len(texts), dim) array` on a Unix socket, one thread per connection.
+    `warm_up()` runs a warm-up batch on request (`manage.py warm_model`), and `model_version`
+    is sent with every batch of vectors.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path, encode, is_loaded, warm_up, model_version):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # Left over from a previous run
+        self.encode = encode
+        self.is_loaded = is_loaded
+        self.warm_up = warm_up
+        self.model_version = model_version
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o660)
+
+
+class ModelServerClient:
+    """
+    Client for the model server. Each thread keeps its own persistent connection and
+    reconnects once if the server went away between requests. A request the server does not
+    answer within `timeout` is not retried.
+
+    `model_version` is the version the server last reported, None until it has answered.
+    """
+
+    def __init__(self, socket_path, timeout):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.model_version = None
+        self._version_asked_at = None
+        self._local = threading.local()
+
+    def _connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _call(self, op, body=b""):
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                sock.sendall(REQUEST_HEADER.pack(MAGIC, op, len(body)) + body)
+                status, length = RESPONSE_HEADER.unpack(_recv_exact(sock, RESPONSE_HEADER.size))
+                response = _recv_exact(sock, length)
+                break
+            except (ConnectionError, FileNotFoundError) as e:
+                # Not listening, or restarted since the last request on this connection
+                self._close()
+                if attempt:
+                    raise ModelServerError(f"Model server at {self.socket_path} is unavailable: {e}")
+            except OSError as e:
+                # Timed out (socket.timeout is an OSError too): the server is up but busy, and
+                # sending the batch again would only add to its queue
+                self._close()
+                raise ModelServerError(f"Model server at {self.socket_path} did not answer: {e}")
+        if status != STATUS_OK:
+            raise ModelServerError(bytes(response).decode("utf-8", "replace"))
+        return response
+
+    def encode(self, texts):
+        return self.encode_with_version(texts)[0]
+
+    def encode_with_version(self, texts):
+        """
+        Encode on the server; returns the vectors and the version of the model that produced them.
+        """
+        response = self._call(OP_ENCODE, encode_texts_body(texts))
+        (length,) = COUNT.unpack_from(response, 0)
+        offset = COUNT.size + length
+        version = bytes(response[COUNT.size:offset]).decode("utf-8")
+        self.model_version = version
+        rows, dim = SHAPE.unpack_from(response, offset)
+        vectors = np.frombuffer(response, dtype="<f4", count=rows * dim, offset=offset + SHAPE.size).reshape(rows, dim)
+        return vectors, version
+
+    def warm_up(self):
+        """
+        Have the server run a warm-up batch; returns the seconds it took there.
+        """
+        return SECONDS.unpack_from(self._call(OP_WARM))[0]
+
+    def ping(self):
+        """
+        Whether the server is reachable and has its model loaded.
+        """
+        try:
+            response = self._call(OP_PING)
+        except ModelServerError:
+            return False
+        self.model_version = bytes(response[1:]).decode("utf-8")
+        return bool(response[0])
+
+    def get_model_version(self):
+        """
+        The server's model version, asking it if it has not answered yet; None if it is unreachable.
+        An unreachable server is asked again at most once a second, since this is called per
+        stored document.
+        """
+        if self.model_version is None:
+            now = time.monotonic()
+            if self._version_asked_at is None or now - self._version_asked_at >= 1:
+                self._version_asked_at = now
+                self.ping()
+        return self.model_version
@@ -0,0 +1,174 @@
+import multiprocessing
+import queue
+import threading
+
+from django.conf import settings
+
+from utils.pdf import DocumentError, extract_pdf_text
+
+
+def _serve(connection):
+    """
+    Worker process: run (function, args) jobs received on `connection` until it is closed.
+    """
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        function, args = job
+        try:
+            result = (True, function(*args))
+        except Exception as e:
+            result = (False, e)
+        try:
+            connection.send(result)
+        except Exception as e:
+            # The result or the error could not be pickled
+            connection.send((False, RuntimeError(str(e))))
+
+
+class _Worker:
+    """
+    One worker process with its own pipe, so it can be killed without touching the others.
+    """
+
+    def __init__(self, context):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child,), name="pdf-parser", daemon=True)
+        self.process.start()
+        child.close()
+        self.jobs = 0
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.connection.close()
+
+
+class ParsingPool:
+    """
+    Bounded pool of worker processes that run jobs (PDF text extraction by default) off the
+    request thread.
+
+    A job waits at most `queue_timeout` seconds (None: no bound) for a free worker and is
+    refused with a 503 past that, so a burst is shed instead of timing out inside the pool.
+    Once a worker picks it up, the job gets `timeout` seconds; a job that overruns is answered
+    with a 422 and only its own worker is killed and replaced, so a pathological file costs
+    one 422 instead of a stuck web worker or the other parses in flight. Workers are recycled
+    after `max_tasks_per_child` jobs to cap memory creep.
+    """
+
+    def __init__(self, workers, timeout, max_tasks_per_child, queue_timeout=None):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_tasks_per_child = max_tasks_per_child
+        self.queue_timeout = queue_timeout
+        # Spawned workers only import this module and utils.pdf, never torch or the Django app
+        self._context = multiprocessing.get_context("spawn")
+        # Free slots; None is a slot whose worker has not been started (or was killed)
+        self._idle = queue.Queue()
+        for _ in range(workers):
+            self._idle.put(None)
+        self._lock = threading.Lock()
+        self._started = set()
+
+    def run(self, function, *args):
+        """
+        Call `function(*args)` in a worker process and return its result. `function` must be
+        importable by the spawned workers (a module-level function).
+        """
+        for attempt in range(2):
+            try:
+                worker = self._idle.get(timeout=self.queue_timeout)
+            except queue.Empty:
+                raise DocumentError("Too many documents are being parsed, please retry shortly", status_code=503)
+            try:
+                if worker is None or not worker.process.is_alive():
+                    worker = self._start()
+                worker.connection.send((function, args))
+                # The deadline starts now that the worker has the job, not when it was queued
+                if not worker.connection.poll(self.timeout):
+                    self._discard(worker)
+                    worker = None
+                    raise DocumentError("Timed out while reading the PDF", status_code=422)
+                ok, result = worker.connection.recv()
+            except (EOFError, OSError):
+                # The worker crashed, e.g. in native parser code; retry once on a fresh one
+                self._discard(worker)
+                worker = None
+                continue
+            finally:
+                self._release(worker)
+
+            if ok:
+                return result
+            raise result
+        raise DocumentError("Could not read PDF: the parser crashed", status_code=422)
+
+    def extract(self, source, limits):
+        """
+        Extract the text of a PDF (a file path or the raw bytes) in a worker process.
+        """
+        return self.run(extract_pdf_text, source, limits)
+
+    def _start(self):
+        worker = _Worker(self._context)
+        with self._lock:
+            self._started.add(worker)
+        return worker
+
+    def _discard(self, worker):
+        if worker is not None:
+            with self._lock:
+                self._started.discard(worker)
+            worker.kill()
+
+    def _release(self, worker):
+        """
+        Give the slot back, recycling the worker after `max_tasks_per_child` jobs.
+        """
+        if worker is not None:
+            worker.jobs += 1
+            if self.max_tasks_per_child and worker.jobs >= self.max_tasks_per_child:
+                with self._lock:
+                    self._started.discard(worker)
+                worker.stop()
+                worker = None
+        self._idle.put(worker)
+
+    def shutdown(self):
+        with self._lock:
+            workers, self._started = self._started, set()
+        for worker in workers:
+            worker.kill()
+
+
+_parsing_pool = None
+_parsing_pool_lock = threading.Lock()
+
+
+def get_parsing_pool():
+    """
+    Return the process-wide parsing pool configured from the PDF_PARSER_* settings.
+    """
+    global _parsing_pool
+    if _parsing_pool is None:
+        with _parsing_pool_lock:
+            if _parsing_pool is None:
+                _parsing_pool = ParsingPool(
+                    workers=settings.PDF_PARSER_WORKERS,
+                    timeout=settings.PDF_PARSER_TIMEOUT,
+                    max_tasks_per_child=settings.PDF_PARSER_MAX_TASKS_PER_CHILD,
+                    queue_timeout=settings.PDF_PARSER_QUEUE_TIMEOUT,
+                )
+    return _parsing_pool
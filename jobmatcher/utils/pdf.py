@@ -0,0 +1,64 @@
+import os
+import time
+from collections import namedtuple
+
+import fitz  # PyMuPDF
+
+# Limits applied while extracting text from an uploaded PDF:
+#   max_pages   pages past this are not read
+#   max_bytes   larger files are rejected before parsing
+#   max_seconds parsing that takes longer is aborted
+#   max_chars   stop reading pages once this much text has been collected
+PdfLimits = namedtuple("PdfLimits", ["max_pages", "max_bytes", "max_seconds", "max_chars"])
+
+
+class DocumentError(ValueError):
+    """
+    An uploaded document that cannot be turned into text. `status_code` is the HTTP status
+    the views answer with.
+    """
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+    def __reduce__(self):
+        # Keep the status code when the error crosses a process boundary
+        return (self.__class__, (str(self), self.status_code))
+
+
+def iter_pdf_pages(source, limits):
+    """
+    Yield the text of a PDF page by page. `source` is a file path or the raw bytes of the file.
+    Only one page is held in memory at a time besides what the caller keeps.
+    """
+    size = os.path.getsize(source) if isinstance(source, str) else len(source)
+    if size > limits.max_bytes:
+        raise DocumentError(f"File is too large, the limit is {limits.max_bytes} bytes", status_code=413)
+
+    deadline = time.monotonic() + limits.max_seconds
+    try:
+        doc = fitz.open(source) if isinstance(source, str) else fitz.open(stream=source, filetype="pdf")
+    except Exception as e:
+        raise DocumentError(f"Could not read PDF: {e}", status_code=422)
+
+    with doc:
+        for page_number in range(min(doc.page_count, limits.max_pages)):
+            if time.monotonic() > deadline:
+                raise DocumentError("Timed out while reading the PDF", status_code=422)
+            yield doc.load_page(page_number).get_text()
+
+
+def extract_pdf_text(source, limits):
+    """
+    Collect the text of a PDF, stopping early once `limits.max_chars` characters were read,
+    and join the pages once at the end.
+    """
+    pages = []
+    collected = 0
+    for text in iter_pdf_pages(source, limits):
+        pages.append(text)
+        collected += len(text)
+        if collected >= limits.max_chars:
+            break
+    return "".join(pages)
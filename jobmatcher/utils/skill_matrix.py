@@ -0,0 +1,175 @@
+import itertools
+import threading
+from collections import namedtuple
+
+import numpy as np
+from scipy import sparse
+
+class SkillMatch(namedtuple("SkillMatch", ["percentages", "matched", "skills"])):
+    """
+    Skill comparison of one job description with many resumes: `percentages[i]` equals
+    calculate_skill_match(job_skills, resume_skills[i]), and `matched[i, j]` tells whether
+    resume i has `skills[j]`, the job's distinct skills in their original order.
+    """
+    __slots__ = ()
+
+    def matched_skills(self, i):
+        return [skill for skill, found in zip(self.skills, self.matched[i]) if found]
+
+    def missing_skills(self, i):
+        return [skill for skill, found in zip(self.skills, self.matched[i]) if not found]
+
+
+class SkillMatrix:
+    """
+    Sparse incidence matrix of the skills of many documents (one CSR row per document, one
+    column per distinct skill), so the skill part of the match score of one document against
+    all the others is a single sparse matrix-vector product instead of set operations per pair.
+
+    Columns are assigned to skills as they are first seen. Rows are appended in place with
+    capacity doubling, and can be replaced (which rebuilds the arrays, so it should be rare).
+    """
+
+    def __init__(self):
+        self._columns = {}
+        self._lock = threading.Lock()
+        self._indptr = np.zeros(1, dtype=np.int32)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._ones = np.zeros(0, dtype=np.int32)
+        # Number of listed skills of every row, duplicates included, as calculate_skill_match counts them
+        self._lengths = np.zeros(0, dtype=np.int64)
+        self._rows = 0
+        self._nnz = 0
+
+    def __len__(self):
+        return self._rows
+
+    @classmethod
+    def from_skills(cls, skill_lists):
+        """
+        Build the matrix of many documents at once; every step iterates in C, so this is much
+        cheaper than appending the rows one by one.
+        """
+        matrix = cls()
+        skill_lists = [skills or [] for skills in skill_lists]
+        flat = list(itertools.chain.from_iterable(skill_lists))
+        for skill in dict.fromkeys(flat):
+            matrix._columns.setdefault(skill, len(matrix._columns))
+        lengths = np.fromiter(map(len, skill_lists), dtype=np.int64, count=len(skill_lists))
+        columns = np.fromiter(map(matrix._columns.__getitem__, flat), dtype=np.int64, count=len(flat))
+
+        # Sorted distinct (row, column) pairs, so a skill listed twice is counted once
+        width = max(len(matrix._columns), 1)
+        pairs = np.sort(np.repeat(np.arange(len(skill_lists), dtype=np.int64), lengths) * width + columns)
+        pairs = pairs[np.concatenate([pairs[:1] == pairs[:1], pairs[1:] != pairs[:-1]])]
+        matrix._indices = (pairs % width).astype(np.int32)
+        matrix._indptr = np.zeros(len(skill_lists) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(pairs // width, minlength=len(skill_lists)), out=matrix._indptr[1:])
+        matrix._lengths = lengths
+        matrix._rows, matrix._nnz = len(skill_lists), len(pairs)
+        return matrix
+
+    def _row_columns(self, skills):
+        return sorted({self._columns.setdefault(skill, len(self._columns)) for skill in skills})
+
+    def append(self, skills):
+        """
+        Add a row for a document's skills and return its position.
+        """
+        skills = skills or []
+        with self._lock:
+            columns = self._row_columns(skills)
+            position, end = self._rows, self._nnz + len(columns)
+            if position + 2 > len(self._indptr):
+                self._indptr = np.resize(self._indptr, max(2 * len(self._indptr), position + 2))
+                self._lengths = np.resize(self._lengths, len(self._indptr) - 1)
+            if end > len(self._indices):
+                self._indices = np.resize(self._indices, max(2 * len(self._indices), end))
+            self._indices[self._nnz:end] = columns
+            self._indptr[position + 1] = end
+            self._lengths[position] = len(skills)
+            self._rows, self._nnz = position + 1, end
+        return position
+
+    def replace(self, position, skills):
+        skills = skills or []
+        with self._lock:
+            columns = self._row_columns(skills)
+            start, end = self._indptr[position], self._indptr[position + 1]
+            shift = len(columns) - (end - start)
+            # New arrays, so CSR matrices already handed out keep seeing the old rows
+            self._indptr = self._indptr.copy()
+            self._indices = np.concatenate(
+                [self._indices[:start], np.array(columns, dtype=np.int32), self._indices[end:self._nnz]]
+            )
+            self._indptr[position + 1:self._rows + 1] += shift
+            self._lengths[position] = len(skills)
+            self._nnz += shift
+
+    def matrix(self):
+        """
+        The incidence matrix as a scipy CSR matrix sharing the row arrays.
+        """
+        with self._lock:
+            rows, nnz = self._rows, self._nnz
+            if len(self._ones) < nnz:
+                self._ones = np.ones(len(self._indices), dtype=np.int32)
+            return sparse.csr_matrix(
+                (self._ones[:nnz], self._indices[:nnz], self._indptr[:rows + 1]),
+                shape=(rows, len(self._columns)),
+            )
+
+    def _column(self, skill, matrix):
+        """
+        Column of `skill` in `matrix`, or None for a skill no row of it has ever listed.
+        """
+        column = self._columns.get(skill)
+        return column if column is not None and column < matrix.shape[1] else None
+
+    def _overlap(self, skills, rows):
+        """
+        Number of distinct `skills` found in every row (or in the given row positions).
+        """
+        matrix = self.matrix()
+        if rows is not None:
+            matrix = matrix[np.asarray(rows, dtype=np.int64)]
+        query = np.zeros(matrix.shape[1], dtype=np.int32)
+        for skill in skills:
+            column = self._column(skill, matrix)
+            if column is not None:
+                query[column] = 1
+        return matrix @ query, matrix
+
+    def match_job(self, job_skills, rows=None, masks=False):
+        """
+        Rows are resumes: the skill match of `job_skills` against every row, or the given row
+        positions, as a SkillMatch. `matched` is only computed with `masks`.
+        """
+        job_skills = job_skills or []
+        distinct = list(dict.fromkeys(job_skills))
+        overlap, matrix = self._overlap(distinct, rows)
+        if job_skills:
+            percentages = overlap / len(job_skills) * 100
+        else:
+            percentages = np.zeros(matrix.shape[0])  # No skills listed in the job description, 0 match
+
+        matched = None
+        if masks:
+            matched = np.zeros((matrix.shape[0], len(distinct)), dtype=bool)
+            columns = [self._column(skill, matrix) for skill in distinct]
+            known = [j for j, column in enumerate(columns) if column is not None]
+            if known:
+                matched[:, known] = matrix[:, [columns[j] for j in known]].toarray() > 0
+        return SkillMatch(percentages, matched, distinct)
+
+    def match_resume(self, resume_skills, rows=None):
+        """
+        Rows are job descriptions: the skill match of every row (or the given row positions)
+        against `resume_skills`, as calculate_skill_match(row skills, resume_skills).
+        """
+        overlap, _ = self._overlap(resume_skills or [], rows)
+        lengths = self._lengths[:len(overlap)] if rows is None else self._lengths[np.asarray(rows, dtype=np.int64)]
+        percentages = np.zeros(len(lengths))
+        listed = lengths > 0
+        percentages[listed] = overlap[listed] / lengths[listed] * 100
+        return percentages
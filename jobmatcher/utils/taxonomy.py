@@ -0,0 +1,122 @@
+import json
+import re
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+
+# Words and single punctuation characters, so "node.js" is matched as node . js
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+PhraseHit = namedtuple("PhraseHit", ["id", "start", "end"])
+
+# Marks a node of the trie where one or more phrases end
+_TERMINAL = None
+
+
+def tokenize(text):
+    """
+    Split text into lowercase tokens for phrase matching.
+    Returns (token, start, end, joined) tuples, where `joined` is True when the token directly
+    follows the previous one without whitespace, e.g. the "." and "js" of "node.js".
+    """
+    tokens = []
+    previous_end = None
+    for match in TOKEN_PATTERN.finditer(text):
+        start, end = match.span()
+        tokens.append((match.group().lower(), start, end, start == previous_end))
+        previous_end = end
+    return tokens
+
+
+class PhraseMatcher:
+    """
+    Single-pass matcher for a large list of keywords and synonyms.
+
+    Phrases are compiled once into a trie over tokens, and the text is tokenized once and
+    walked from every token position, so matching cost depends on the length of the text
+    and of the longest phrase, not on the number of phrases. Matching follows whole-word
+    semantics like `\\bkeyword\\b`: "java" does not match inside "javascript".
+    """
+
+    def __init__(self, entries):
+        """
+        `entries` is an iterable of (canonical id, phrases) pairs; the canonical id itself is
+        always one of its phrases. Results are reported in the order of `entries`.
+        """
+        self.ids = []
+        self._order = {}
+        self._root = {}
+        for canonical_id, phrases in entries:
+            if canonical_id not in self._order:
+                self._order[canonical_id] = len(self.ids)
+                self.ids.append(canonical_id)
+            for phrase in [canonical_id, *phrases]:
+                self._add(phrase, canonical_id)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _add(self, phrase, canonical_id):
+        tokens = tokenize(phrase)
+        if not tokens:
+            return
+        node = self._root.setdefault(tokens[0][0], {})
+        for token, _, _, joined in tokens[1:]:
+            node = node.setdefault((token, joined), {})
+        node.setdefault(_TERMINAL, set()).add(canonical_id)
+
+    def find(self, text, tokens=None):
+        """
+        Return every phrase occurrence in the text as PhraseHit(id, start, end) character spans.
+        Pass `tokens` (from `tokenize`) to reuse a token stream that was already computed.
+        """
+        if tokens is None:
+            tokens = tokenize(text)
+        hits = []
+        root = self._root
+        count = len(tokens)
+        for i in range(count):
+            node = root.get(tokens[i][0])
+            j = i
+            while node is not None:
+                for canonical_id in node.get(_TERMINAL, ()):
+                    hits.append(PhraseHit(canonical_id, tokens[i][1], tokens[j][2]))
+                j += 1
+                if j == count:
+                    break
+                node = node.get((tokens[j][0], tokens[j][3]))
+        return hits
+
+    def find_ids(self, text, tokens=None):
+        """
+        Return the distinct canonical ids found in the text, in taxonomy order.
+        """
+        found = {hit.id for hit in self.find(text, tokens)}
+        return sorted(found, key=self._order.__getitem__)
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Build a matcher from a JSON taxonomy file:
+        {"skills": [{"id": "kubernetes", "synonyms": ["k8s"]}, ...]}
+        """
+        with open(path, encoding="utf-8") as taxonomy_file:
+            taxonomy = json.load(taxonomy_file)
+        return cls((entry["id"], entry.get("synonyms", [])) for entry in taxonomy["skills"])
+
+
+_skill_matcher = None
+_skill_matcher_lock = threading.Lock()
+
+
+def get_skill_matcher():
+    """
+    Return the skill matcher built from SKILLS_TAXONOMY_PATH, loading it on first use.
+    """
+    global _skill_matcher
+    if _skill_matcher is None:
+        with _skill_matcher_lock:
+            if _skill_matcher is None:
+                _skill_matcher = PhraseMatcher.from_file(settings.SKILLS_TAXONOMY_PATH)
+    return _skill_matcher
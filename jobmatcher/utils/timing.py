@@ -0,0 +1,173 @@
+"""
+Lightweight per-stage timing: in-process histograms served by /metrics in the Prometheus
+text format, and a `Server-Timing` header per request (see ServerTimingMiddleware).
+
+Everything is switched on by METRICS_ENABLED. When it is off, `timed` returns the function
+unchanged, the middleware removes itself and no Mongo listener is registered, so the hot
+paths run exactly as without instrumentation.
+"""
+import bisect
+import functools
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from pymongo import monitoring
+
+# Upper bounds of the histogram buckets, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last one is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+
+    def snapshot(self):
+        """
+        (cumulative bucket counts, sum, count), as Prometheus expects them.
+        """
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+
+
+class Registry:
+    """
+    Histograms of one metric, keyed by the value of its label.
+    """
+
+    def __init__(self, name, label, help_text):
+        self.name = name
+        self.label = label
+        self.help_text = help_text
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, seconds):
+        histogram = self._histograms.get(label_value)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(label_value, Histogram())
+        histogram.observe(seconds)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_value, histogram in sorted(self._histograms.items()):
+            cumulative, total, count = histogram.snapshot()
+            label = f'{self.label}="{label_value}"'
+            for bound, bucket_count in zip(histogram.buckets + ("+Inf",), cumulative):
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {bucket_count}')
+            lines.append(f"{self.name}_sum{{{label}}} {total}")
+            lines.append(f"{self.name}_count{{{label}}} {count}")
+        return lines
+
+
+stage_seconds = Registry("jobmatcher_stage_seconds", "stage", "Time spent in each instrumented stage.")
+request_seconds = Registry("jobmatcher_request_seconds", "route", "Time spent handling each route.")
+
+# Stage durations of the request being handled by the current thread
+_request = threading.local()
+
+
+def record(stage, seconds):
+    stage_seconds.observe(stage, seconds)
+    stages = getattr(_request, "stages", None)
+    if stages is not None:
+        stages.append((stage, seconds))
+
+
+def timed(stage):
+    """
+    Decorator recording the duration of every call under `stage`.
+    """
+    def decorator(function):
+        if not settings.METRICS_ENABLED:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(stage, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+class MongoTimingListener(monitoring.CommandListener):
+    """
+    Time every Mongo command as the stage "mongo.<command>", e.g. mongo.find or mongo.insert.
+    pymongo calls the listener on the thread that ran the command, so the time is attributed
+    to the request making the call.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        record(f"mongo.{event.command_name}", event.duration_micros / 1e6)
+
+    def failed(self, event):
+        record(f"mongo.{event.command_name}", event.duration_micros / 1e6)
+
+
+def server_timing(stages, total):
+    """
+    Server-Timing header value: the total time of each stage in milliseconds, in order of
+    first occurrence, with the number of calls when a stage ran more than once.
+    """
+    totals = {}
+    for stage, seconds in stages:
+        duration, calls = totals.get(stage, (0.0, 0))
+        totals[stage] = (duration + seconds, calls + 1)
+    metrics = [
+        f'{stage};dur={duration * 1000:.2f}' + (f';desc="{calls} calls"' if calls > 1 else "")
+        for stage, (duration, calls) in totals.items()
+    ]
+    metrics.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(metrics)
+
+
+class ServerTimingMiddleware:
+    """
+    Collect the stages timed while handling a request into its Server-Timing header and
+    record the request duration per route.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _request.stages = []
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            stages, _request.stages = _request.stages, None
+        total = time.perf_counter() - started
+
+        resolver_match = getattr(request, "resolver_match", None)
+        request_seconds.observe(resolver_match.route if resolver_match else "unmatched", total)
+        response["Server-Timing"] = server_timing(stages, total)
+        return response
+
+
+def render_metrics():
+    return "\n".join(stage_seconds.render() + request_seconds.render()) + "\n"
@@ -1,44 +1,404 @@
-import fitz
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import hashlib
+import numpy as np
 import re
+import threading
+from collections import OrderedDict
 import jwt
 from rest_framework.exceptions import AuthenticationFailed
 from django.conf import settings
+from utils.embedding_backends import load_model, version_tag
+from utils.embedding_codec import decode_vector, encode_vector
+from utils.inference import BatchingScheduler
+from utils.model_server import ModelServerClient
+from utils.parsing_pool import get_parsing_pool
+from utils.pdf import DocumentError, PdfLimits, extract_pdf_text
+from utils.skill_matrix import SkillMatrix
+from utils.taxonomy import PhraseMatcher, get_skill_matcher
+from utils.timing import timed
 
 
 def decode_jwt(token):
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=["HS256"])
         return payload
     except jwt.ExpiredSignatureError:
         raise AuthenticationFailed('Token has expired')
     except jwt.InvalidTokenError:
         raise AuthenticationFailed('Invalid token')
 
-# Load a pre-trained transformer model
-model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
+# Pre-trained transformer model, loaded on first use (see get_model)
+EMBEDDING_MODEL_NAME = 'paraphrase-MiniLM-L6-v2'
+_model = None
+_model_lock = threading.Lock()
 
-def analyze_match(job_description, resume_text, job_skills, resume_skills, job_responsibilities, resume_responsibilities):
+# Embeddings stored on job description and resume documents are tagged with this version
+# (with the model server's when one is configured, see current_model_version).
+# Bump it whenever the model or the way text is fed to it changes, so stale vectors get re-encoded.
+EMBEDDING_MODEL_VERSION = f"{EMBEDDING_MODEL_NAME}:1" + version_tag(
+    settings.EMBEDDING_BACKEND, {"onnx_file": settings.EMBEDDING_ONNX_FILE}
+)
+
+# Stored match results are keyed on this version. Bump the leading number whenever the
+# weights or the scoring in analyze_match change, so old results are recomputed.
+SCORING_VERSION = f"1:{EMBEDDING_MODEL_VERSION}"
+
+
+def get_model():
+    """
+    Return the sentence embedding model, loading it on first use with the EMBEDDING_BACKEND
+    (see utils.embedding_backends). Importing this module stays cheap: torch and the weights
+    are only loaded when something is encoded.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = load_model(
+                    settings.EMBEDDING_BACKEND, EMBEDDING_MODEL_NAME, onnx_file=settings.EMBEDDING_ONNX_FILE
+                )
+    return _model
+
+
+def is_model_loaded():
+    return _model is not None
+
+
+def warm_up_model(local=False):
+    """
+    Load the model and run a dummy batch through it so the first real request
+    does not pay for lazy initialisation and buffer allocation.
+    With a model server configured, only the connection to it is warmed up, unless `local`
+    (the model server itself warms its own model).
+    """
+    client = None if local else get_model_server_client()
+    if client is not None:
+        client.encode(["warm up"])
+        return
+    get_model().encode(["warm up"] * settings.EMBEDDING_BATCH_SIZE, batch_size=settings.EMBEDDING_BATCH_SIZE)
+
+
+_model_server_client = None
+
+
+def get_model_server_client():
+    """
+    Client for the shared model server (see utils.model_server) when EMBEDDING_SERVER_SOCKET
+    is set, otherwise None and the model is loaded in this process.
+    """
+    global _model_server_client
+    if not settings.EMBEDDING_SERVER_SOCKET:
+        return None
+    if _model_server_client is None:
+        _model_server_client = ModelServerClient(settings.EMBEDDING_SERVER_SOCKET, settings.EMBEDDING_SERVER_TIMEOUT)
+    return _model_server_client
+
+
+def current_model_version():
+    """
+    Version of the model that encodes the texts of this process, which stored embeddings are
+    tagged and checked with: the model server's when one is configured (it may run another
+    model or backend than these settings name), else EMBEDDING_MODEL_VERSION.
+    """
+    client = get_model_server_client()
+    if client is not None:
+        version = client.get_model_version()
+        if version is not None:
+            return version
+    return EMBEDDING_MODEL_VERSION
+
+
+def is_model_ready():
+    """
+    Whether encode calls can be served without loading the model first: the model server
+    is up with its model loaded, or the model is loaded in this process.
+    """
+    client = get_model_server_client()
+    if client is not None:
+        return client.ping()
+    return is_model_loaded()
+
+
+_batching_scheduler = None
+_batching_scheduler_lock = threading.Lock()
+
+
+def get_batching_scheduler():
+    """
+    Return the process-wide micro-batching scheduler (see utils.inference), starting it on first use.
+    """
+    global _batching_scheduler
+    if _batching_scheduler is None:
+        with _batching_scheduler_lock:
+            if _batching_scheduler is None:
+                _batching_scheduler = BatchingScheduler(
+                    lambda texts, batch_size: get_model().encode(texts, batch_size=batch_size),
+                    max_batch_size=settings.EMBEDDING_MICROBATCH_MAX_SIZE,
+                    max_wait=settings.EMBEDDING_MICROBATCH_MAX_WAIT_MS / 1000,
+                    max_queue_depth=settings.EMBEDDING_MICROBATCH_QUEUE_DEPTH,
+                )
+    return _batching_scheduler
+
+
+def inference_stats():
+    """
+    Queue and compute time counters of the micro-batching scheduler, if it is running.
+    """
+    return _batching_scheduler.stats() if _batching_scheduler is not None else None
+
+
+def encode_locally(texts, batch_size=None):
+    """
+    Run the model in this process, through the micro-batching scheduler when enabled.
+    Requests at least as large as a micro-batch (bulk ingest, batch matching) gain nothing
+    from being gathered with others and go straight to the model in batches of `batch_size`.
+    """
+    if settings.EMBEDDING_MICROBATCH_ENABLED and len(texts) < settings.EMBEDDING_MICROBATCH_MAX_SIZE:
+        return get_batching_scheduler().encode_texts(texts)
+    return get_model().encode(texts, batch_size=batch_size or settings.EMBEDDING_BATCH_SIZE)
+
+
+@timed("model_encode")
+def _encode_uncached(texts, batch_size=None):
+    """
+    Encode texts that are not cached, on the model server when one is configured.
+    Returns the vectors and the version of the model that produced them.
+    """
+    client = get_model_server_client()
+    if client is not None:
+        return client.encode_with_version(texts)
+    return encode_locally(texts, batch_size), EMBEDDING_MODEL_VERSION
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of sentence embeddings keyed by a hash of (model version, normalized text).
+    Entries are evicted least-recently-used first once either the entry or the byte limit is hit.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(text, model_version):
+        # Collapsing whitespace does not change the tokens the model sees
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{model_version}\0{normalized}".encode("utf-8")).digest()
+
+    def get(self, key):
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key, vector):
+        vector = np.array(vector, dtype=np.float32)
+        vector.setflags(write=False)  # Shared between callers, so never mutated in place
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = vector
+            self._bytes += vector.nbytes
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+embedding_cache = EmbeddingCache(settings.EMBEDDING_CACHE_MAX_ENTRIES, settings.EMBEDDING_CACHE_MAX_BYTES)
+
+
+def encode_texts(texts, batch_size=None):
+    """
+    Encode a list of texts through the embedding cache. Only the distinct texts that are not
+    cached go to `model.encode`, in a single batched call. Returns a (len(texts), dim) float32 array.
+    """
+    return encode_texts_with_version(texts, batch_size)[0]
+
+
+@timed("encode")
+def encode_texts_with_version(texts, batch_size=None):
+    """
+    `encode_texts`, also returning the version of the model that produced the vectors.
+    """
+    version = current_model_version()
+    keys = [embedding_cache.key(text, version) for text in texts]
+    vectors = [embedding_cache.get(key) for key in keys]
+
+    missing = {}
+    for i, vector in enumerate(vectors):
+        if vector is None:
+            missing.setdefault(keys[i], texts[i])
+    if missing:
+        encoded, encoded_version = _encode_uncached(list(missing.values()), batch_size=batch_size)
+        if encoded_version != version:
+            # The model server was replaced by one with another model since the version was
+            # read; the cached vectors are from the old one, so encode everything there
+            encoded, version = _encode_uncached(texts, batch_size=batch_size)
+            return np.asarray(encoded, dtype=np.float32), version
+        fresh = dict(zip(missing.keys(), encoded))
+        for key, vector in fresh.items():
+            embedding_cache.put(key, vector)
+        vectors = [vector if vector is not None else fresh[key] for key, vector in zip(keys, vectors)]
+
+    return np.asarray(vectors, dtype=np.float32), version
+
+
+def build_embeddings(text, responsibilities):
+    """
+    Encode the text and responsibilities of a document in one batch so the vectors
+    can be stored with it at ingest time and reused by every match against it.
+    """
+    return build_embeddings_batch([(text, responsibilities)])[0]
+
+
+def build_embeddings_batch(items, batch_size=None):
+    """
+    Encode many (text, responsibilities) pairs together; cache misses go to the model in one batch.
+    Returns one embeddings dict per pair, in the same order, with the vectors in their stored
+    form (see utils.embedding_codec).
+    """
+    sentences = []
+    for text, responsibilities in items:
+        sentences.append(text or "")
+        if responsibilities:
+            sentences.append(responsibilities)
+    vectors, version = encode_texts_with_version(sentences, batch_size=batch_size) if sentences else ([], None)
+
+    results = []
+    position = 0
+    for text, responsibilities in items:
+        text_vector = vectors[position]
+        position += 1
+        responsibilities_vector = None
+        if responsibilities:
+            responsibilities_vector = vectors[position]
+            position += 1
+        results.append({
+            "model_version": version,
+            "text": encode_vector(text_vector),
+            "responsibilities": encode_vector(responsibilities_vector) if responsibilities_vector is not None else None,
+        })
+    return results
+
+
+def embeddings_are_current(embeddings):
+    """
+    Check whether stored embeddings exist and were produced by the current model version.
+    """
+    return (
+        isinstance(embeddings, dict)
+        and embeddings.get("model_version") == current_model_version()
+        and embeddings.get("text") is not None
+    )
+
+
+def _needs_encoding(document):
+    embeddings = document.get("embeddings")
+    if not embeddings_are_current(embeddings):
+        return True
+    return embeddings.get("responsibilities") is None and bool(document.get("responsibilities", ""))
+
+
+def ensure_embeddings(document, text_field):
+    """
+    Return the stored embeddings of a document, re-encoding them if they are missing or stale.
+    The second value tells the caller whether the document should be updated with the new vectors.
+    """
+    embeddings, refreshed = ensure_embeddings_batch([document], text_field)
+    return embeddings[0], bool(refreshed)
+
+
+def ensure_embeddings_batch(documents, text_field, batch_size=None):
+    """
+    Batched version of `ensure_embeddings`: every document whose embeddings are missing or stale
+    is encoded in one `encode_texts` call. Returns the embeddings of all documents, in order,
+    and the indexes of the documents that were re-encoded.
+    """
+    embeddings = [document.get("embeddings") for document in documents]
+    stale = [i for i, document in enumerate(documents) if _needs_encoding(document)]
+    if stale:
+        fresh = build_embeddings_batch(
+            [(documents[i].get(text_field, ""), documents[i].get("responsibilities", "")) for i in stale],
+            batch_size=batch_size,
+        )
+        for i, value in zip(stale, fresh):
+            embeddings[i] = value
+    return embeddings, stale
+
+
+def _stored_or_encoded(embeddings, key, text):
+    """
+    Use the stored vector for `key` when it is current, otherwise encode `text`.
+    """
+    if embeddings_are_current(embeddings) and embeddings.get(key) is not None:
+        return decode_vector(embeddings[key]).astype(np.float32)
+    return encode_texts([text])[0]
+
+
+@timed("cosine_similarity")
+def _cosine(a, b):
+    """
+    Cosine similarity of two vectors (0 when either of them is all zeros).
+    """
+    denominator = np.linalg.norm(a) * np.linalg.norm(b)
+    if not denominator:
+        return 0.0
+    return float(np.dot(a, b) / denominator)
+
+
+def analyze_match(job_description, resume_text, job_skills, resume_skills, job_responsibilities, resume_responsibilities,
+                  job_embeddings=None, resume_embeddings=None):
     """
     Analyze the match between a job description and a resume based on:
       1. Text similarity (between job description and resume text)
       2. Skill match percentage
       3. Responsibilities similarity (between job responsibilities and resume responsibilities)
+
+    `job_embeddings` and `resume_embeddings` are the vectors stored on the documents at ingest
+    (see `build_embeddings`); the texts are only re-encoded when those are missing or stale.
     """
     # Compute text similarity between job description and resume text
-    job_embedding = model.encode([job_description])
-    resume_embedding = model.encode([resume_text])
-    text_similarity = cosine_similarity(job_embedding, resume_embedding)[0][0] * 100
+    job_embedding = _stored_or_encoded(job_embeddings, "text", job_description)
+    resume_embedding = _stored_or_encoded(resume_embeddings, "text", resume_text)
+    text_similarity = _cosine(job_embedding, resume_embedding) * 100
 
     # Compute skill match percentage
     skill_match_percentage = calculate_skill_match(job_skills, resume_skills)
 
     # Compute responsibilities similarity if both values are provided
     if job_responsibilities and resume_responsibilities:
-        job_resp_embedding = model.encode([job_responsibilities])
-        resume_resp_embedding = model.encode([resume_responsibilities])
-        responsibilities_similarity = cosine_similarity(job_resp_embedding, resume_resp_embedding)[0][0] * 100
+        job_resp_embedding = _stored_or_encoded(job_embeddings, "responsibilities", job_responsibilities)
+        resume_resp_embedding = _stored_or_encoded(resume_embeddings, "responsibilities", resume_responsibilities)
+        responsibilities_similarity = _cosine(job_resp_embedding, resume_resp_embedding) * 100
     else:
         responsibilities_similarity = 0
 
@@ -49,6 +409,48 @@ def analyze_match(job_description, resume_text, job_skills, resume_skills, job_r
     return final_match_score
 
 
+def _unit_rows(vectors):
+    """
+    Stack stored vectors into a float32 matrix with L2-normalised rows (all-zero rows stay zero).
+    """
+    matrix = np.array([decode_vector(vector) for vector in vectors], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+@timed("cosine_similarity_batch")
+def analyze_match_batch(job_embeddings, job_skills, job_responsibilities,
+                        resume_embeddings, resume_skills, resume_responsibilities, skill_match=None):
+    """
+    Score one job description against many resumes with the same weighting as `analyze_match`.
+    The embedding similarities are computed as one matrix-vector product per field, so all
+    embeddings passed in must be current (see `ensure_embeddings_batch`). A `skill_match`
+    already computed with `skill_match_batch` is reused instead of comparing the skills again.
+    Returns a NumPy array with one final match score per resume.
+    """
+    count = len(resume_embeddings)
+    if not count:
+        return np.zeros(0, dtype=np.float32)
+
+    job_text = _unit_rows([job_embeddings["text"]])[0]
+    text_similarity = _unit_rows([e["text"] for e in resume_embeddings]) @ job_text * 100
+
+    if skill_match is None:
+        skill_match = skill_match_batch(job_skills, resume_skills)
+    skill_match_percentage = skill_match.percentages.astype(np.float32)
+
+    responsibilities_similarity = np.zeros(count, dtype=np.float32)
+    if job_responsibilities:
+        rows = [i for i in range(count) if resume_responsibilities[i]]
+        if rows:
+            job_resp = _unit_rows([job_embeddings["responsibilities"]])[0]
+            resume_resp = _unit_rows([resume_embeddings[i]["responsibilities"] for i in rows])
+            responsibilities_similarity[rows] = resume_resp @ job_resp * 100
+
+    return (text_similarity * 0.5) + (skill_match_percentage * 0.3) + (responsibilities_similarity * 0.2)
+
+
 def calculate_skill_match(job_skills, resume_skills):
     """
     Calculate the percentage of skills matched between job description and resume.
@@ -60,96 +462,143 @@ def calculate_skill_match(job_skills, resume_skills):
     skill_match_percentage = (len(matched_skills) / len(job_skills)) * 100
     return skill_match_percentage
 
-def extract_skills(text):
+
+@timed("skill_match_batch")
+def skill_match_batch(job_skills, resume_skills, masks=False):
     """
-    Extract skills from the text based on predefined keywords.
-    A more advanced technique could use a large skill set or NLP methods for better results.
+    `calculate_skill_match` of one job description against many resumes, computed with one
+    sparse product over their skill incidence matrix. Returns a SkillMatch; with `masks`
+    it also tells which of the job's skills every resume has or misses.
     """
-    skills_keywords = [
-        "python", "django", "aws", "javascript", "html", "css", "sql", "mongodb", "docker", "git", 
-        "linux", "flask", "fastapi", "java", "typescript", "node.js", "react", "vue", "kubernetes", "cloud"
-    ]
-    skills = []
-    
-    # Find skills using regular expressions
-    for skill in skills_keywords:
-        if re.search(r"\b" + re.escape(skill) + r"\b", text, re.IGNORECASE):
-            skills.append(skill)
-    
-    # Optionally add more advanced parsing logic here
-    return skills
+    return SkillMatrix.from_skills(resume_skills).match_job(job_skills, masks=masks)
+
 
-def extract_education(text):
+EDUCATION_KEYWORDS = ["bachelor", "master", "phd", "degree", "graduation", "certification"]
+
+# You can enhance this with more sophisticated NLP methods if needed
+JOB_TITLE_KEYWORDS = ["developer", "engineer", "designer", "manager", "lead", "specialist", "architect", "analyst"]
+
+EXPERIENCE_KEYWORDS = [
+    "years of experience", "experience", "worked as", "worked in", "responsible for",
+    "developed", "managed", "led", "engineer", "developer"
+]
+YEARS_OF_EXPERIENCE_PATTERN = re.compile(r"(\d+[\+\d]*)\s*(?:year|yrs|experience)", re.IGNORECASE)
+
+# Define keywords/phrases that indicate responsibilities
+RESPONSIBILITY_KEYWORDS = [
+    "responsible for", "design", "designing", "develop", "developing", "maintain", "maintaining", "manage", "managing",
+    "collaborate", "collaborating", "lead", "coordinate", "coordinating", "optimize", "ship", "write", "test", "debug"
+]
+responsibility_matcher = PhraseMatcher((keyword, []) for keyword in RESPONSIBILITY_KEYWORDS)
+
+
+@timed("extract_skills")
+def extract_skills(text, tokens=None):
+    """
+    Extract skills from the text based on the skills taxonomy (see SKILLS_TAXONOMY_PATH).
+    Synonyms are reported under their canonical skill id, e.g. "k8s" -> "kubernetes".
+    """
+    return get_skill_matcher().find_ids(text, tokens)
+
+
+def extract_skill_hits(text, tokens=None):
+    """
+    Like `extract_skills`, but returns every occurrence as PhraseHit(id, start, end).
+    """
+    return get_skill_matcher().find(text, tokens)
+
+
+@timed("extract_education")
+def extract_education(text, lowered=None):
     """
     Extract education level from the text.
     Checks for degrees or specific education-related terms.
     """
-    education_keywords = ["bachelor", "master", "phd", "degree", "graduation", "certification"]
-    
+    if lowered is None:
+        lowered = text.lower()
+
     # Try to find a degree level from the text
-    for keyword in education_keywords:
-        if keyword in text.lower():
-            if "bachelor" in text.lower():
-                return "Bachelor's Degree"
-            elif "master" in text.lower():
-                return "Master's Degree"
-            elif "phd" in text.lower():
-                return "Ph.D."
-            else:
-                return "Degree/Certification"
-    
-    return "Not specified"
+    if not any(keyword in lowered for keyword in EDUCATION_KEYWORDS):
+        return "Not specified"
+    if "bachelor" in lowered:
+        return "Bachelor's Degree"
+    elif "master" in lowered:
+        return "Master's Degree"
+    elif "phd" in lowered:
+        return "Ph.D."
+    return "Degree/Certification"
+
 
-def extract_title(text):
+@timed("extract_title")
+def extract_title(text, lowered=None):
     """
     Extract the job title from the job description text.
     This will look for common job title patterns in the text.
     """
-    # You can enhance this with more sophisticated NLP methods if needed
-    job_title_keywords = ["developer", "engineer", "designer", "manager", "lead", "specialist", "architect", "analyst"]
+    if lowered is None:
+        lowered = text.lower()
 
     # For simplicity, we'll look for a few key keywords that could indicate a job title
-    for keyword in job_title_keywords:
-        if keyword in text.lower():
+    for keyword in JOB_TITLE_KEYWORDS:
+        if keyword in lowered:
             return keyword.title()  # Capitalize the first letter
 
     # If no common title found, return a default value
     return "Job Title Not Specified"
 
+def pdf_limits():
+    """
+    PDF extraction limits from the settings.
+    """
+    return PdfLimits(
+        max_pages=settings.PDF_MAX_PAGES,
+        max_bytes=settings.PDF_MAX_BYTES,
+        max_seconds=settings.PDF_MAX_SECONDS,
+        max_chars=settings.PDF_MAX_TEXT_CHARS,
+    )
+
+
+@timed("extract_text_from_file")
 def extract_text_from_file(file):
     """
     Extract text from an uploaded file. It supports PDF files for now.
+    Large uploads are read from Django's temporary file instead of being loaded into memory,
+    and the page, size, time and text limits from the settings are enforced (see utils.pdf).
+    With PDF_PARSER_WORKERS set, parsing runs in the worker process pool (see utils.parsing_pool).
     """
     # Get the file name from the uploaded file object
     file_name = file.name  # This is the filename string
-    
-    if file_name.endswith('.pdf'):
-        doc = fitz.open(stream=file.read(), filetype="pdf")  # Read PDF content
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        return text
+
+    if not file_name.endswith('.pdf'):
+        raise DocumentError("Unsupported file type")
+    if file.size is not None and file.size > settings.PDF_MAX_BYTES:
+        raise DocumentError(f"File is too large, the limit is {settings.PDF_MAX_BYTES} bytes", status_code=413)
+
+    if hasattr(file, "temporary_file_path"):
+        source = file.temporary_file_path()
     else:
-        raise ValueError("Unsupported file type")
-    
+        source = file.read()
+    return extract_text_from_pdf(source)
 
-def extract_responsibilities(text):
+
+@timed("extract_text_from_pdf")
+def extract_text_from_pdf(source):
+    """
+    Extract text from a PDF given as a file path or raw bytes, in the parsing pool when one is configured.
+    """
+    if settings.PDF_PARSER_WORKERS:
+        return get_parsing_pool().extract(source, pdf_limits())
+    return extract_pdf_text(source, pdf_limits())
+
+
+@timed("extract_responsibilities")
+def extract_responsibilities(text, tokens=None):
     """
     Extract responsibilities from the text by looking for common responsibility-related keywords.
-    You can adjust the keywords and patterns to fit your requirements.
+    You can adjust the keywords in RESPONSIBILITY_KEYWORDS to fit your requirements.
     """
-    # Define keywords/phrases that indicate responsibilities
-    responsibility_keywords = [
-        "responsible for", "design", "designing", "develop", "developing", "maintain", "maintaining", "manage", "managing", 
-        "collaborate", "collaborating", "lead", "coordinate", "coordinating", "optimize", "ship", "write", "test", "debug"
-    ] 
-    
-    found = []
-    for keyword in responsibility_keywords:
-        # Use a regex search to find if the keyword is present in the text
-        if re.search(r"\b" + re.escape(keyword) + r"\b", text, re.IGNORECASE):
-            found.append(keyword)
-    
+    found = responsibility_matcher.find_ids(text, tokens)
+
     # Return a comma-separated list of found responsibilities or a default message if none are found
     if found:
         return ", ".join(found)
@@ -157,27 +606,21 @@ def extract_responsibilities(text):
         return "Not specified"
 
 
-def extract_experience(text):
+@timed("extract_experience")
+def extract_experience(text, lowered=None):
     """
     Extract experience-related information (e.g., years of experience, role titles) from the text.
     Uses keywords and phrases to extract relevant experience info.
     """
-    experience_keywords = [
-        "years of experience", "experience", "worked as", "worked in", "responsible for", 
-        "developed", "managed", "led", "engineer", "developer"
-    ]
-    experience = []
+    if lowered is None:
+        lowered = text.lower()
 
     # Look for patterns related to years of experience or role details
-    for keyword in experience_keywords:
-        if keyword in text.lower():
-            experience.append(keyword)
-    
-    if not experience:
+    if not any(keyword in lowered for keyword in EXPERIENCE_KEYWORDS):
         return "Not specified"
-    
+
     # Assuming some basic patterns for experience like "3+ years"
-    years_of_experience = re.search(r"(\d+[\+\d]*)\s*(?:year|yrs|experience)", text, re.IGNORECASE)
+    years_of_experience = YEARS_OF_EXPERIENCE_PATTERN.search(text)
     if years_of_experience:
         return years_of_experience.group(1) + " years"
 
@@ -0,0 +1,388 @@
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from utils.embedding_codec import decode_vector
+from utils.skill_matrix import SkillMatrix
+from utils.utils import embeddings_are_current
+
+
+class EmbeddingIndex:
+    """
+    In-memory index of the embeddings stored on a Mongo collection, used to rank every
+    document against a query with one matrix-vector product instead of one call per pair.
+
+    Each row is [0.5 * text vector | 0.2 * responsibilities vector] with unit-length parts,
+    so a query built the same way scores exactly the text and responsibilities part of
+    `analyze_match` (skills are not part of the index). Documents without current
+    embeddings are skipped until they are re-encoded.
+
+    With `skills_field`, the skills of every document are kept in a sparse incidence matrix
+    alongside the rows, and a search given the query's skills adds the skills part too, giving
+    the full match score. `skills_required` tells which side lists the required skills: the
+    rows (an index of job descriptions) or the query (an index of resumes).
+
+    Above `ivf_threshold` rows the index is partitioned with k-means (IVF) and a search
+    only scores the rows of the `n_probe` partitions closest to the query. Rows added later
+    join their closest partition; once `repartition_rows` of them have been added (or the
+    threshold is crossed by adding rows), the partitions are rebuilt in a background thread.
+
+    Documents written by other processes (bulk_ingest, ingest workers, other web workers) are
+    picked up by a background refresh, started by a search at most every `staleness_seconds`:
+    when the collection's largest _id has moved, only the newer documents are read; when its
+    document count moved otherwise (deletions), the whole index is reloaded.
+    """
+    TEXT_WEIGHT = 0.5
+    SKILLS_WEIGHT = 0.3
+    RESPONSIBILITIES_WEIGHT = 0.2
+
+    def __init__(self, collection, ivf_threshold=None, n_lists=None, n_probe=None, skills_field=None,
+                 skills_required=False, repartition_rows=None, staleness_seconds=None):
+        self.collection = collection
+        self.skills_field = skills_field
+        self.skills_required = skills_required
+        self.ivf_threshold = ivf_threshold if ivf_threshold is not None else settings.VECTOR_INDEX_IVF_THRESHOLD
+        self.n_lists = n_lists if n_lists is not None else settings.VECTOR_INDEX_IVF_LISTS
+        self.n_probe = n_probe if n_probe is not None else settings.VECTOR_INDEX_IVF_PROBES
+        self.repartition_rows = (
+            repartition_rows if repartition_rows is not None else settings.VECTOR_INDEX_IVF_REPARTITION_ROWS
+        )
+        self.staleness_seconds = (
+            staleness_seconds if staleness_seconds is not None else settings.VECTOR_INDEX_STALENESS_SECONDS
+        )
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._ids = []
+        self._skills = SkillMatrix()
+        self._positions = {}
+        self._centroids = None
+        self._lists = None
+        # Rows covered by the last k-means run, and a counter that invalidates background
+        # partitioning started before a reload
+        self._partitioned_rows = 0
+        self._generation = 0
+        self._partitioning = False
+        # Collection (document count, largest _id) as of the last load or refresh, the newer
+        # documents that had no current embeddings yet, and when the collection was last checked
+        self._count = 0
+        self._latest = None
+        self._pending = set()
+        self._checked_at = 0.0
+        self._refreshing = False
+
+    def __len__(self):
+        return len(self._ids)
+
+    def load(self):
+        """
+        (Re)build the index from every document of the collection.
+        """
+        # Taken before reading, so documents written during the load move it and are picked up later
+        count, latest = self._marker()
+        ids, rows, skills = [], [], []
+        for document in self.collection.find({"embeddings": {"$exists": True}}, self._projection()):
+            embeddings = document["embeddings"]
+            if embeddings_are_current(embeddings):
+                ids.append(str(document["_id"]))
+                rows.append(self.row(embeddings))
+                if self.skills_field:
+                    skills.append(document.get(self.skills_field) or [])
+
+        with self._lock:
+            self._ids = ids
+            self._skills = SkillMatrix.from_skills(skills)
+            self._positions = {doc_id: i for i, doc_id in enumerate(ids)}
+            self._matrix = np.ascontiguousarray(np.vstack(rows), dtype=np.float32) if rows else None
+            self._centroids = None
+            self._lists = None
+            self._partitioned_rows = 0
+            self._generation += 1
+            self._count, self._latest, self._pending = count, latest, set()
+            self._checked_at = time.monotonic()
+            if self.n_lists and len(ids) >= self.ivf_threshold:
+                self._centroids, self._lists = self._cluster(self._matrix[:len(ids)])
+                self._partitioned_rows = len(ids)
+            self.loaded = True
+        return self
+
+    def add(self, doc_id, embeddings, skills=None):
+        """
+        Insert or replace the row of one document. Does nothing until the index is loaded,
+        since loading picks up every stored document anyway.
+        """
+        if not self.loaded or not embeddings_are_current(embeddings):
+            return
+        row = self.row(embeddings)
+        with self._lock:
+            position = self._positions.get(doc_id)
+            if position is not None:
+                self._matrix[position] = row
+                if self.skills_field:
+                    self._skills.replace(position, skills)
+                return
+            if self._matrix is None:
+                self._matrix = row[np.newaxis, :].copy()
+            else:
+                # Grow by doubling so inserts stay amortised O(dimension)
+                if len(self._ids) == len(self._matrix):
+                    grown = np.empty((len(self._matrix) * 2, self._matrix.shape[1]), dtype=np.float32)
+                    grown[:len(self._matrix)] = self._matrix
+                    self._matrix = grown
+                self._matrix[len(self._ids)] = row
+            self._positions[doc_id] = len(self._ids)
+            self._ids.append(doc_id)
+            if self.skills_field:
+                self._skills.append(skills)
+            if self._centroids is not None:
+                self._lists[int(np.argmax(self._centroids @ row))].append(len(self._ids) - 1)
+            if self._needs_partitioning():
+                self._partitioning = True
+                threading.Thread(target=self._repartition, name="vector-index-ivf", daemon=True).start()
+
+    def _projection(self):
+        return {"embeddings": 1, self.skills_field: 1} if self.skills_field else {"embeddings": 1}
+
+    def _marker(self):
+        """
+        (document count, largest _id) of the collection, two cheap reads that move when
+        documents are inserted or deleted.
+        """
+        latest = next(iter(self.collection.find({}, {"_id": 1}).sort("_id", -1).limit(1)), None)
+        return self.collection.estimated_document_count(), latest["_id"] if latest else None
+
+    def _refresh_if_stale(self):
+        if not self.loaded or not self.staleness_seconds:
+            return
+        with self._lock:
+            if self._refreshing or time.monotonic() - self._checked_at < self.staleness_seconds:
+                return
+            self._refreshing = True
+            self._checked_at = time.monotonic()
+        threading.Thread(target=self.refresh, name="vector-index-refresh", daemon=True).start()
+
+    def refresh(self):
+        """
+        Catch up with the documents written since the last load or refresh: add the rows of
+        the documents newer than the last largest _id (and of the earlier ones that have been
+        encoded since), or reload everything when the document count moved otherwise.
+        """
+        try:
+            count, latest = self._marker()
+            if (count, latest) == (self._count, self._latest) and not self._pending:
+                return
+            newer = {"_id": {"$lte": latest}} if self._latest is None else {"_id": {"$gt": self._latest, "$lte": latest}}
+            documents = list(self.collection.find(newer, self._projection())) if latest is not None else []
+            if count - self._count != len(documents):
+                self.load()
+                return
+            if self._pending:
+                documents += self.collection.find({"_id": {"$in": list(self._pending)}}, self._projection())
+
+            pending = set()
+            for document in documents:
+                embeddings = document.get("embeddings")
+                if embeddings is not None and embeddings_are_current(embeddings):
+                    self.add(str(document["_id"]), embeddings, document.get(self.skills_field) if self.skills_field else None)
+                else:
+                    pending.add(document["_id"])  # Still being ingested
+            self._count, self._latest, self._pending = count, latest, pending
+        except Exception as e:
+            print(f"ERROR: Could not refresh the vector index: {str(e)}")
+        finally:
+            self._refreshing = False
+
+    def _needs_partitioning(self):
+        if self._partitioning or not self.n_lists or len(self._ids) < self.ivf_threshold:
+            return False
+        return self._centroids is None or len(self._ids) - self._partitioned_rows >= self.repartition_rows
+
+    def _repartition(self):
+        """
+        Background thread: run k-means on the rows as they are now, then swap in the new
+        partitions, with the rows added in the meantime assigned to their closest one.
+        """
+        try:
+            with self._lock:
+                generation, count = self._generation, len(self._ids)
+                matrix = self._matrix[:count]
+            # `add` only appends after `count` or grows into a new array, so this view stays valid
+            centroids, lists = self._cluster(matrix)
+            with self._lock:
+                if generation != self._generation:
+                    return  # Reloaded meanwhile, with partitions of its own
+                if len(self._ids) > count:
+                    added = np.argmax(self._matrix[count:len(self._ids)] @ centroids.T, axis=1)
+                    for position, partition in enumerate(added, start=count):
+                        lists[int(partition)].append(position)
+                self._centroids, self._lists = centroids, lists
+                self._partitioned_rows = count
+        except Exception as e:
+            print(f"ERROR: Could not repartition the vector index: {str(e)}")
+        finally:
+            self._partitioning = False
+
+    def search(self, embeddings, k=10, skills=None):
+        """
+        Return the `k` best (document id, score) pairs for the query embeddings, best first.
+        The score is the text and responsibilities part of the match score (0 to 70), plus the
+        skills part when the index keeps skills and the query's `skills` are given (0 to 100).
+        """
+        self._refresh_if_stale()
+        query = self.row(embeddings, weighted=False)
+        with self._lock:
+            if not self._ids:
+                return []
+            matrix = self._matrix[:len(self._ids)]
+            if self._centroids is not None:
+                probe = np.argsort(self._centroids @ query)[::-1][:self.n_probe]
+                candidates = np.fromiter(
+                    (position for partition in probe for position in self._lists[partition]), dtype=np.int64
+                )
+                scores = matrix[candidates] @ query * 100
+            else:
+                candidates = None
+                scores = matrix @ query * 100
+            if skills is not None and self.skills_field:
+                scores += self.SKILLS_WEIGHT * self._skill_match(skills, candidates).astype(np.float32)
+            ids = self._ids
+
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        positions = candidates[top] if candidates is not None else top
+        return [(ids[position], float(scores[i])) for position, i in zip(positions, top)]
+
+    def _skill_match(self, skills, rows=None):
+        """
+        calculate_skill_match between the query's skills and every row (or the given rows).
+        """
+        if self.skills_required:
+            return self._skills.match_resume(skills, rows)
+        return self._skills.match_job(skills, rows).percentages
+
+    def skill_match(self, job_skills, doc_ids=None, masks=False):
+        """
+        Skill match of a job description against every indexed resume, or the given ones, in
+        one sparse product. Returns (document ids, SkillMatch); ids that are not indexed are left out.
+        """
+        self._refresh_if_stale()
+        with self._lock:
+            if doc_ids is None:
+                ids, rows = list(self._ids), None
+            else:
+                ids = [doc_id for doc_id in doc_ids if doc_id in self._positions]
+                rows = [self._positions[doc_id] for doc_id in ids]
+            return ids, self._skills.match_job(job_skills, rows, masks=masks)
+
+    def row(self, embeddings, weighted=True):
+        """
+        Turn stored embeddings into an index row (or an unweighted query vector).
+        """
+        text = self._unit(embeddings["text"])
+        responsibilities = embeddings.get("responsibilities")
+        responsibilities = self._unit(responsibilities) if responsibilities is not None else np.zeros_like(text)
+        if weighted:
+            text *= self.TEXT_WEIGHT
+            responsibilities *= self.RESPONSIBILITIES_WEIGHT
+        return np.concatenate([text, responsibilities])
+
+    @staticmethod
+    def _unit(vector):
+        vector = decode_vector(vector).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _cluster(self, matrix, iterations=10, sample_per_list=64, chunk_size=65536):
+        """
+        Cluster the rows with k-means on a sample and assign every row to its closest centroid.
+        Returns (centroids, row positions of every partition).
+        """
+        n_lists = min(self.n_lists, len(matrix))
+        rng = np.random.default_rng(0)
+        sample = matrix[rng.choice(len(matrix), min(len(matrix), n_lists * sample_per_list), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for partition in range(n_lists):
+                members = sample[assignment == partition]
+                if len(members):
+                    centroids[partition] = members.mean(axis=0)
+
+        # Assign in chunks so the (rows x lists) score matrix stays small
+        assignment = np.empty(len(matrix), dtype=np.int64)
+        for start in range(0, len(matrix), chunk_size):
+            assignment[start:start + chunk_size] = np.argmax(matrix[start:start + chunk_size] @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.searchsorted(assignment[order], np.arange(n_lists + 1))
+        return centroids, [order[bounds[i]:bounds[i + 1]].tolist() for i in range(n_lists)]
+
+
+_resume_index = None
+_resume_index_lock = threading.Lock()
+
+
+def peek_resume_index():
+    """
+    The resume index if this process has already loaded it, else None. Ingest paths use this
+    to keep a loaded index current without loading the whole collection themselves.
+    """
+    return _resume_index
+
+
+def load_resume_index_in_background():
+    """
+    Start loading the resume index without waiting for it; `peek_resume_index` returns it
+    once it is loaded.
+    """
+    threading.Thread(target=get_resume_index, name="vector-index-load", daemon=True).start()
+
+
+def get_resume_index():
+    """
+    Return the process-wide resume index, with skills, loading it from the `resumes` collection on first use.
+    """
+    global _resume_index
+    if _resume_index is None:
+        with _resume_index_lock:
+            if _resume_index is None:
+                _resume_index = EmbeddingIndex(settings.MONGO_DB["resumes"], skills_field="skills").load()
+    return _resume_index
+
+
+_job_index = None
+_job_index_lock = threading.Lock()
+
+
+def peek_job_index():
+    """
+    The job description index if this process has already loaded it, else None.
+    """
+    return _job_index
+
+
+def load_job_index_in_background():
+    """
+    Start loading the job description index without waiting for it; `peek_job_index` returns
+    it once it is loaded.
+    """
+    threading.Thread(target=get_job_index, name="vector-index-load", daemon=True).start()
+
+
+def get_job_index():
+    """
+    Return the process-wide job description index, with required skills, loading it from the
+    `job_descriptions` collection on first use.
+    """
+    global _job_index
+    if _job_index is None:
+        with _job_index_lock:
+            if _job_index is None:
+                _job_index = EmbeddingIndex(
+                    settings.MONGO_DB["job_descriptions"], skills_field="required_skills", skills_required=True
+                ).load()
+    return _job_index